@@ -0,0 +1,3 @@
+"""
+Benchmarks pour le car scrapper
+"""
@@ -0,0 +1,128 @@
+"""
+Temps jusqu'à la première page selon le mode de lancement du navigateur
+
+Chaque mesure est faite dans un nouveau processus Python (import de
+Playwright compris) contre le site d'inventaire local :
+
+- eager       : Chromium lancé dès la création du navigateur (ancien comportement)
+- lazy        : Chromium lancé à la première page (comportement par défaut)
+- headed      : avec fenêtre (seulement si un affichage est disponible, DISPLAY)
+- profile-cold / profile-warm : profil persistant (--user-data-dir) neuf puis réutilisé
+- daemon      : connexion au navigateur permanent (--browser-daemon start)
+
+Pour chaque mode : durée de création du scraper, durée jusqu'à la première
+page prête, et durée totale du processus. La ligne « sans page » mesure un
+processus qui n'a pas besoin du navigateur (ex: --show-all, --resume sans
+rien à reprendre, --http sans repli).
+
+Usage:
+    python -m benchmarks.bench_browser_startup --runs 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child(base_url: str, db_path: str, options: dict, eager: bool, navigate: bool):
+    """Mesure exécutée dans le sous-processus ; affiche le résultat en JSON"""
+    from car_scrapper import AlbiNavigator, AlbiScraper
+
+    start = time.perf_counter()
+    navigator = AlbiNavigator(base_url=base_url, **options)
+    if eager:
+        navigator.page
+    scraper = AlbiScraper(db_path, navigator=navigator)
+    constructed = time.perf_counter()
+    if navigate:
+        navigator.go_to_page(navigator.get_inventory_url(1))
+        assert 'promotion-item' in navigator.get_html(), "page 1 incomplète"
+    ready = time.perf_counter()
+    navigator.close()
+    scraper.database.close()
+    print(json.dumps({
+        'construct_ms': (constructed - start) * 1000,
+        'first_page_ms': (ready - start) * 1000,
+        'launch_ms': navigator.launch_ms,
+    }))
+
+
+def measure(base_url: str, db_path: str, options: dict, eager: bool = False, navigate: bool = True) -> dict:
+    command = [sys.executable, "-m", "benchmarks.bench_browser_startup", "--child", base_url, db_path,
+               "--options", json.dumps(options)]
+    if eager:
+        command.append("--eager")
+    if not navigate:
+        command.append("--no-navigate")
+    start = time.perf_counter()
+    output = subprocess.run(command, cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def print_row(label: str, results: list[dict]):
+    def median(key):
+        values = [result[key] for result in results if result[key] is not None]
+        return f"{statistics.median(values):>10.0f}" if values else f"{'-':>10}"
+    print(f"{label:<22} {median('construct_ms')} {median('first_page_ms')} "
+          f"{median('launch_ms')} {median('process_ms')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps jusqu'à la première page selon le lancement du navigateur")
+    parser.add_argument("--runs", type=int, default=3, help="Mesures par mode, médiane affichée (défaut: 3)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence du site local en secondes (défaut: 0)")
+    parser.add_argument("--child", nargs=2, metavar=("BASE_URL", "DB_PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--options", default="{}", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--no-navigate", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], json.loads(args.options), args.eager, not args.no_navigate)
+        return
+
+    from car_scrapper.browser_daemon import chromium_executable, start_daemon, stop_daemon
+    from benchmarks.inventory_site import serve_inventory
+
+    if not os.path.exists(chromium_executable()):
+        print("Chromium n'est pas installé : python -m playwright install chromium")
+        return
+
+    with serve_inventory(3, args.latency) as base_url, tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "startup.db")
+        profile_dir = os.path.join(tmp_dir, "profile")
+        state_file = os.path.join(tmp_dir, "daemon.json")
+
+        print(f"{'mode (médiane ms)':<22} {'création':>10} {'1re page':>10} {'lancement':>10} {'processus':>10}")
+        print_row("sans page, eager", [measure(base_url, db_path, {}, eager=True, navigate=False)
+                                       for _ in range(args.runs)])
+        print_row("sans page, lazy", [measure(base_url, db_path, {}, navigate=False) for _ in range(args.runs)])
+        print_row("eager", [measure(base_url, db_path, {}, eager=True) for _ in range(args.runs)])
+        print_row("lazy (headless)", [measure(base_url, db_path, {}) for _ in range(args.runs)])
+        if os.environ.get("DISPLAY"):
+            print_row("headed", [measure(base_url, db_path, {'headless': False}) for _ in range(args.runs)])
+
+        # Premier lancement : création du profil ; suivants : profil réutilisé
+        print_row("profile-cold", [measure(base_url, db_path, {'user_data_dir': profile_dir})])
+        print_row("profile-warm", [measure(base_url, db_path, {'user_data_dir': profile_dir})
+                                   for _ in range(args.runs)])
+
+        endpoint = start_daemon(user_data_dir=os.path.join(tmp_dir, "daemon-profile"), port=9333,
+                                state_file=state_file)
+        try:
+            print_row("daemon", [measure(base_url, db_path, {'cdp_endpoint': endpoint}) for _ in range(args.runs)])
+        finally:
+            stop_daemon(state_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark de la latence par appel de CarDatabase
+
+Compare l'ancienne approche (une connexion SQLite ouverte puis fermée à chaque
+appel) avec le pool de connexions persistantes de CarDatabase.
+
+Usage:
+    python -m benchmarks.bench_connections --cars 1000 --calls 5000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from car_scrapper import Car, CarDatabase
+
+
+def make_car(i: int) -> Car:
+    """Crée une voiture synthétique"""
+    return Car(
+        make=f"Marque{i % 20}",
+        model=f"Modele{i % 50}",
+        year=2010 + i % 15,
+        price=10000 + (i * 37) % 40000,
+        mileage=(i * 911) % 200000,
+        fuel="Électrique" if i % 7 == 0 else "Essence",
+        location="Laval",
+        options=["Bluetooth", "Caméra de recul"],
+        detail_url=f"https://example.com/voiture/{i}"
+    )
+
+
+def legacy_get_car_by_id(db_path: str, car_id: int):
+    """Reproduit l'ancien accès : connexion ouverte et fermée à chaque appel"""
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, make, model, year, price, mileage, fuel, location, options, detail_url
+            FROM Car WHERE id = ?
+        """, (car_id,))
+        row = cursor.fetchone()
+        if row:
+            json.loads(row[8])
+    # sqlite3.connect en context manager ne ferme pas la connexion
+    conn.close()
+    return row
+
+
+def legacy_car_exists(db_path: str, detail_url: str) -> bool:
+    """Reproduit l'ancien car_exists"""
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Car WHERE detail_url = ?", (detail_url,))
+        exists = cursor.fetchone()[0] > 0
+    conn.close()
+    return exists
+
+
+def timed(label: str, calls: int, func) -> float:
+    """Exécute func(i) `calls` fois et affiche la latence moyenne"""
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / calls * 1e6
+    print(f"{label:<40} {per_call_us:>10.1f} µs/appel")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des connexions CarDatabase")
+    parser.add_argument("--cars", type=int, default=1000, help="Nombre de voitures (défaut: 1000)")
+    parser.add_argument("--calls", type=int, default=5000, help="Nombre d'appels mesurés (défaut: 5000)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        database = CarDatabase(db_path)
+        for i in range(args.cars):
+            database.insert_car(make_car(i))
+
+        print(f"=== {args.cars} voitures, {args.calls} appels ===")
+        before = timed("get_car_by_id (connexion par appel)", args.calls,
+                       lambda i: legacy_get_car_by_id(db_path, i % args.cars + 1))
+        after = timed("get_car_by_id (pool)", args.calls,
+                      lambda i: database.get_car_by_id(i % args.cars + 1))
+        print(f"{'gain':<40} {before / after:>10.1f} x")
+
+        before = timed("car_exists (connexion par appel)", args.calls,
+                       lambda i: legacy_car_exists(db_path, make_car(i % args.cars).detail_url))
+        after = timed("car_exists (pool)", args.calls,
+                      lambda i: database.car_exists(make_car(i % args.cars).detail_url))
+        print(f"{'gain':<40} {before / after:>10.1f} x")
+
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
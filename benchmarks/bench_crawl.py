@@ -0,0 +1,66 @@
+"""
+Benchmark et vérification du crawl concurrent contre le site d'inventaire local
+
+Pour chaque niveau de concurrence, crawle toutes les pages du site local dans
+une base temporaire, vérifie que chaque annonce a été enregistrée et affiche
+le temps total et le débit en pages/seconde. Nécessite Chromium pour
+Playwright (`playwright install chromium`).
+
+Usage:
+    python -m benchmarks.bench_crawl --pages 12 --concurrency 1 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from car_scrapper import AlbiConcurrentCrawler, AlbiScraper, CarDatabase
+from benchmarks.inventory_site import serve_inventory
+
+
+CARS_PER_PAGE = 24
+
+
+def crawl_once(base_url: str, pages: int, concurrency: int, db_path: str) -> float:
+    """Crawle toutes les pages du site local et retourne la durée en secondes"""
+    scraper = AlbiScraper.__new__(AlbiScraper)
+    scraper.database = CarDatabase(db_path)
+    scraper.extractor_backend = "html.parser"
+    scraper.snapshot_store = None
+    crawler = AlbiConcurrentCrawler(concurrency=concurrency, base_url=base_url)
+    totals = scraper.new_totals()
+
+    start = time.perf_counter()
+    crawler.run(1, pages, lambda page_number, html: scraper.save_page(page_number, html, base_url, totals))
+    elapsed = time.perf_counter() - start
+
+    stored = scraper.database.get_car_count()
+    scraper.database.close()
+    if stored != pages * CARS_PER_PAGE:
+        raise AssertionError(f"{stored} voitures enregistrées, {pages * CARS_PER_PAGE} attendues")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du crawl concurrent")
+    parser.add_argument("--pages", type=int, default=12, help="Nombre de pages du site local (défaut: 12)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4],
+                        help="Niveaux de concurrence à mesurer (défaut: 1 4)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latence serveur par page, en secondes")
+    args = parser.parse_args()
+
+    with serve_inventory(args.pages, args.latency) as base_url, tempfile.TemporaryDirectory() as tmp_dir:
+        for concurrency in args.concurrency:
+            db_path = os.path.join(tmp_dir, f"crawl_{concurrency}.db")
+            try:
+                elapsed = crawl_once(base_url, args.pages, concurrency, db_path)
+            except AssertionError as e:
+                print(f"✗ concurrence {concurrency}: {e}")
+                sys.exit(1)
+            print(f"✓ concurrence {concurrency:<3} {elapsed:>7.2f} s  {args.pages / elapsed:>6.2f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
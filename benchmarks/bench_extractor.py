@@ -0,0 +1,59 @@
+"""
+Benchmark des moteurs d'extraction de AlbiPageExtractor
+
+Pour chaque moteur, extrait plusieurs fois les pages du corpus de référence et
+affiche le débit en annonces/seconde et le pic de mémoire Python (tracemalloc)
+pendant l'extraction d'une page.
+
+Usage:
+    python -m benchmarks.bench_extractor --repeat 20
+"""
+
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+from car_scrapper import AlbiPageExtractor
+from car_scrapper.extractor import LXML_AVAILABLE
+from benchmarks.check_extractors import BASE_URL, golden_pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des moteurs d'extraction")
+    parser.add_argument("--repeat", type=int, default=20, help="Nombre de passes sur le corpus (défaut: 20)")
+    args = parser.parse_args()
+
+    pages = []
+    for path in golden_pages():
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+
+    backends = [b for b in AlbiPageExtractor.BACKENDS if b != 'lxml' or LXML_AVAILABLE]
+    print(f"{'moteur':<12} {'annonces/s':>12} {'pic mémoire':>14}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = []
+        for backend in backends:
+            listings = 0
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for html in pages:
+                    listings += len(AlbiPageExtractor(html, BASE_URL, backend=backend).cars)
+            elapsed = time.perf_counter() - start
+
+            peak = 0
+            for html in pages:
+                tracemalloc.start()
+                AlbiPageExtractor(html, BASE_URL, backend=backend)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+            results.append((backend, listings / elapsed, peak))
+
+    for backend, rate, peak in results:
+        print(f"{backend:<12} {rate:>12.0f} {peak / 1024:>11.0f} Ko")
+
+
+if __name__ == "__main__":
+    main()
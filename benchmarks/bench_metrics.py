@@ -0,0 +1,95 @@
+"""
+Coût de l'instrumentation (metrics.METRICS) et rapport d'un scraping local
+
+1. Surcoût par appel de get_car_by_id et get_cars_with_filters : méthode
+   non instrumentée, métriques désactivées, métriques activées
+2. Scraping du site d'inventaire local (pipeline, navigateur HTTP) avec
+   les métriques activées : durée par phase et par méthode SQL
+
+Usage:
+    python -m benchmarks.bench_metrics --cars 5000 --calls 20000 --pages 10
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from car_scrapper import METRICS, AlbiHttpNavigator, AlbiScraper, CarDatabase
+from car_scrapper.metrics import PHASE_METRIC, QUERY_METRIC
+from benchmarks.bench_connections import make_car
+from benchmarks.inventory_site import serve_inventory
+
+
+def per_call_us(function, calls: int) -> float:
+    """Durée moyenne d'un appel en microsecondes (meilleure de 3 séries)"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for i in range(calls):
+            function(i)
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1_000_000
+
+
+def bench_overhead(db_path: str, cars: int, calls: int):
+    database = CarDatabase(db_path)
+    database.upsert_cars([make_car(i) for i in range(cars)])
+
+    # Méthodes d'origine, sans le décorateur timed_method
+    raw_get_by_id = CarDatabase.get_car_by_id.__wrapped__
+    raw_filters = CarDatabase.get_cars_with_filters.__wrapped__
+    cases = [
+        ("get_car_by_id",
+         lambda i: raw_get_by_id(database, i % cars + 1),
+         lambda i: database.get_car_by_id(i % cars + 1)),
+        ("get_cars_with_filters",
+         lambda i: raw_filters(database, {'make': 'Marque1'}, sort_by='price', count_mode='none'),
+         lambda i: database.get_cars_with_filters({'make': 'Marque1'}, sort_by='price', count_mode='none')),
+    ]
+
+    print(f"{'méthode':<24} {'sans':>10} {'désactivé':>10} {'activé':>10}  (µs par appel)")
+    for name, raw, instrumented in cases:
+        METRICS.disable()
+        raw_us = per_call_us(raw, calls)
+        disabled_us = per_call_us(instrumented, calls)
+        METRICS.enable()
+        enabled_us = per_call_us(instrumented, calls)
+        METRICS.disable()
+        print(f"{name:<24} {raw_us:>10.2f} {disabled_us:>10.2f} {enabled_us:>10.2f}  "
+              f"(désactivé {disabled_us - raw_us:+.2f} µs, activé {enabled_us - raw_us:+.2f} µs)")
+    database.close()
+    METRICS.reset()
+
+
+def scrape_report(db_path: str, pages: int):
+    METRICS.enable()
+    with serve_inventory(pages) as base_url:
+        navigator = AlbiHttpNavigator(base_url=base_url, fallback=False)
+        scraper = AlbiScraper(db_path=db_path, navigator=navigator)
+        scraper.scrap_from_page(1, pages, parse_workers=2)
+    report = METRICS.report()
+    METRICS.disable()
+
+    print(f"\n{'phase / méthode SQL':<28} {'appels':>7} {'total s':>9} {'moy. ms':>9} {'p99 ms':>9}")
+    for metric, label in ((PHASE_METRIC, 'phase'), (QUERY_METRIC, 'method')):
+        for series in sorted(report['histograms'].get(metric, []), key=lambda item: -item['total_s']):
+            print(f"{series['labels'][label]:<28} {series['count']:>7} {series['total_s']:>9.3f} "
+                  f"{series['mean_ms']:>9.2f} {series['p99_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût de l'instrumentation et rapport de scraping")
+    parser.add_argument("--cars", type=int, default=5000, help="Voitures en base pour la mesure du surcoût (défaut: 5000)")
+    parser.add_argument("--calls", type=int, default=20000, help="Appels par mesure (défaut: 20000)")
+    parser.add_argument("--pages", type=int, default=10, help="Pages du scraping local (défaut: 10, 0 pour l'ignorer)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bench_overhead(os.path.join(tmp_dir, "overhead.db"), args.cars, args.calls)
+        if args.pages:
+            scrape_report(os.path.join(tmp_dir, "scrape.db"), args.pages)
+
+
+if __name__ == "__main__":
+    main()
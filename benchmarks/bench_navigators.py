@@ -0,0 +1,59 @@
+"""
+Benchmark du temps par page et de la mémoire des navigateurs
+
+Charge les pages du site d'inventaire local avec AlbiHttpNavigator et, si
+demandé, avec AlbiNavigator (Playwright). Affiche le temps moyen par page et
+la mémoire résidente maximale du processus (navigateur Chromium compris pour
+Playwright, mesuré sur les processus enfants).
+
+Usage:
+    python -m benchmarks.bench_navigators --pages 20
+    python -m benchmarks.bench_navigators --pages 20 --with-browser
+"""
+
+import argparse
+import resource
+import time
+
+from car_scrapper import AlbiHttpNavigator, AlbiNavigator
+from benchmarks.inventory_site import serve_inventory
+
+
+def peak_rss_mb() -> float:
+    """Mémoire résidente maximale du processus et de ses enfants terminés, en Mo"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) / 1024
+
+
+def bench(label: str, navigator, pages: int):
+    """Charge `pages` pages d'inventaire et affiche le temps moyen par page"""
+    start = time.perf_counter()
+    for i in range(1, pages + 1):
+        navigator.go_to_page(navigator.get_inventory_url(i))
+        html = navigator.get_html()
+        assert 'promotion-item' in html, f"page {i} incomplète"
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed / pages * 1000:>9.1f} ms/page")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des navigateurs")
+    parser.add_argument("--pages", type=int, default=20, help="Nombre de pages chargées (défaut: 20)")
+    parser.add_argument("--with-browser", action="store_true",
+                        help="Mesurer aussi AlbiNavigator (nécessite Chromium)")
+    args = parser.parse_args()
+
+    with serve_inventory(args.pages) as base_url:
+        navigator = AlbiHttpNavigator(base_url=base_url, fallback=False)
+        bench("http", navigator, args.pages)
+        navigator.close()
+        print(f"{'':<12} RSS max: {peak_rss_mb():.0f} Mo")
+
+        if args.with_browser:
+            bench("playwright", AlbiNavigator(base_url=base_url), args.pages)
+            print(f"{'':<12} RSS max: {peak_rss_mb():.0f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark du pipeline de scraping contre le site d'inventaire local
+
+Compare la boucle séquentielle (chargement, extraction et écriture page par
+page avec AlbiScraper.save_page) au pipeline récupération → extraction →
+écriture de AlbiScraper.scrap_from_page, avec le navigateur HTTP. Vérifie
+que chaque annonce a été enregistrée et affiche le débit en pages/seconde.
+
+Usage:
+    python -m benchmarks.bench_pipeline --pages 40 --fetch-workers 1 4
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from car_scrapper import AlbiHttpNavigator, AlbiScraper
+from benchmarks.inventory_site import serve_inventory
+
+
+CARS_PER_PAGE = 24
+
+
+def new_scraper(base_url: str, db_path: str, extractor_backend: str) -> AlbiScraper:
+    navigator = AlbiHttpNavigator(base_url=base_url, fallback=False)
+    return AlbiScraper(db_path, navigator=navigator, extractor_backend=extractor_backend)
+
+
+def run_sequential(base_url: str, pages: int, db_path: str, extractor_backend: str) -> float:
+    """Boucle page par page sur un seul thread"""
+    scraper = new_scraper(base_url, db_path, extractor_backend)
+    totals = scraper.new_totals()
+    start = time.perf_counter()
+    for page_number in range(1, pages + 1):
+        scraper.navigator.go_to_page(scraper.navigator.get_inventory_url(page_number))
+        scraper.save_page(page_number, scraper.navigator.get_html(), base_url, totals)
+    return time.perf_counter() - start
+
+
+def run_pipeline(base_url: str, pages: int, db_path: str, extractor_backend: str, fetch_workers: int) -> float:
+    """Pipeline de scrap_from_page"""
+    scraper = new_scraper(base_url, db_path, extractor_backend)
+    start = time.perf_counter()
+    scraper.scrap_from_page(1, pages, fetch_workers=fetch_workers)
+    return time.perf_counter() - start
+
+
+def check_count(db_path: str, pages: int):
+    from car_scrapper import CarDatabase
+    stored = CarDatabase(db_path).get_car_count()
+    if stored != pages * CARS_PER_PAGE:
+        raise AssertionError(f"{stored} voitures enregistrées, {pages * CARS_PER_PAGE} attendues")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline de scraping")
+    parser.add_argument("--pages", type=int, default=40, help="Nombre de pages du site local (défaut: 40)")
+    parser.add_argument("--fetch-workers", type=int, nargs="+", default=[1, 4],
+                        help="Nombres de navigateurs du pipeline à mesurer (défaut: 1 4)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence serveur par page, en secondes")
+    parser.add_argument("--extractor", default="html.parser", help="Moteur d'extraction (défaut: html.parser)")
+    args = parser.parse_args()
+
+    with serve_inventory(args.pages, args.latency) as base_url, tempfile.TemporaryDirectory() as tmp_dir:
+        runs = [("séquentiel", None)] + [(f"pipeline x{workers}", workers) for workers in args.fetch_workers]
+        for label, fetch_workers in runs:
+            db_path = os.path.join(tmp_dir, f"{label.replace(' ', '_')}.db")
+            # Les messages par page du scraper sont masqués
+            with contextlib.redirect_stdout(io.StringIO()):
+                if fetch_workers is None:
+                    elapsed = run_sequential(base_url, args.pages, db_path, args.extractor)
+                else:
+                    elapsed = run_pipeline(base_url, args.pages, db_path, args.extractor, fetch_workers)
+            try:
+                check_count(db_path, args.pages)
+            except AssertionError as e:
+                print(f"✗ {label}: {e}")
+                sys.exit(1)
+            print(f"✓ {label:<14} {elapsed:>7.2f} s  {args.pages / elapsed:>6.2f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark de la sérialisation d'une page de /api/cars (50 voitures)
+
+Compare, sur une base temporaire :
+- objets : lignes -> objets Car -> dictionnaires (car_to_dict) -> json.dumps
+- direct : fabrique de lignes car_json_row (options insérées telles quelles)
+et affiche le débit en voitures/seconde pour la sérialisation seule et pour la
+requête complète (lecture SQL comprise), ainsi que la route /api/cars entière.
+
+Usage:
+    python -m benchmarks.bench_serialization --cars 5000 --repeat 2000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from car_scrapper import CarAPI, CarDatabase
+from car_scrapper.serialization import CAR_COLUMNS, ORJSON_AVAILABLE, car_json_row
+from benchmarks.bench_connections import make_car
+
+
+PAGE_SIZE = 50
+
+
+def rate(function, repeat: int) -> float:
+    """Voitures sérialisées par seconde pour `repeat` appels sur une page"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return repeat * PAGE_SIZE / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la sérialisation des voitures")
+    parser.add_argument("--cars", type=int, default=5000, help="Nombre de voitures en base (défaut: 5000)")
+    parser.add_argument("--repeat", type=int, default=2000, help="Nombre de pages sérialisées (défaut: 2000)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "serialization.db")
+        database = CarDatabase(db_path)
+        database.upsert_cars([make_car(i) for i in range(args.cars)])
+        with database.connection() as conn:
+            rows = conn.execute(f"SELECT {CAR_COLUMNS} FROM Car LIMIT {PAGE_SIZE}").fetchall()
+
+        def objects_only():
+            cars = [database._row_to_car(row) for row in rows]
+            return json.dumps([CarAPI.car_to_dict(car) for car in cars])
+
+        def direct_only():
+            return b'[' + b','.join(car_json_row(None, row) for row in rows) + b']'
+
+        def objects_query():
+            cars, _ = database.get_cars_with_filters({}, per_page=PAGE_SIZE, count_mode='none')
+            return json.dumps([CarAPI.car_to_dict(car) for car in cars])
+
+        def direct_query():
+            cars_json, _ = database.get_cars_with_filters({}, per_page=PAGE_SIZE, count_mode='none',
+                                                          row_factory=car_json_row)
+            return b'[' + b','.join(cars_json) + b']'
+
+        if json.loads(objects_only()) != json.loads(direct_only()):
+            raise AssertionError("Les deux sérialisations diffèrent")
+
+        api = CarAPI(db_path, cache_size=0)
+        client = api.app.test_client()
+
+        def route():
+            client.get(f"/api/cars?per_page={PAGE_SIZE}&count=none")
+
+        print(f"Encodeur JSON direct : {'orjson' if ORJSON_AVAILABLE else 'json'}")
+        print(f"{'mesure':<28} {'voitures/s':>12}")
+        for label, function in (("sérialisation objets", objects_only),
+                                ("sérialisation directe", direct_only),
+                                ("requête + objets", objects_query),
+                                ("requête + directe", direct_query),
+                                ("route /api/cars", route)):
+            repeat = args.repeat if label != "route /api/cars" else max(1, args.repeat // 10)
+            print(f"{label:<28} {rate(function, repeat):>12,.0f}")
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Vérifie le total renvoyé par /api/cars selon le paramètre `count`
+
+Sur une base de 3 000 voitures, chaque cas compare la pagination renvoyée
+(total_count, total_pages, count_capped) au nombre exact de voitures
+filtrées. Avec count=estimate, un filtre retenant plus de ESTIMATE_CAP
+voitures ne doit pas annoncer un total tronqué : total_count et total_pages
+valent None et count_capped vaut True. Le script échoue (code de sortie 1)
+si un cas ne renvoie pas la pagination attendue.
+
+Usage:
+    python -m benchmarks.check_count_modes
+"""
+
+import os
+import sys
+import tempfile
+
+from car_scrapper import CarAPI, CarDatabase
+from benchmarks.bench_connections import make_car
+
+
+CAR_COUNT = 3000
+PER_PAGE = 20
+
+# (description, paramètres de /api/cars, total attendu ou None, count_capped attendu)
+CASES = [
+    ("exact, sans filtre", "count=exact", CAR_COUNT, False),
+    ("exact, > plafond", "count=exact&fuel=essence", 2571, False),
+    ("estimation, sans filtre", "count=estimate", CAR_COUNT, False),
+    ("estimation, < plafond", "count=estimate&fuel=electrique", 429, False),
+    ("estimation, = plafond", "count=estimate&fuel=essence&price_gt=11000&year_gt=2018", 1000, False),
+    ("estimation, > plafond", "count=estimate&fuel=essence", None, True),
+    ("estimation, aucun", "count=estimate&make=inconnue", 0, False),
+    ("sans comptage", "count=none&fuel=essence", None, False),
+]
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "counts.db")
+        database = CarDatabase(db_path)
+        database.upsert_cars([make_car(i) for i in range(CAR_COUNT)])
+        database.close()
+
+        client = CarAPI(db_path, cache_size=0).app.test_client()
+        for description, query, expected_total, expected_capped in CASES:
+            pagination = client.get(f"/api/cars?per_page={PER_PAGE}&{query}").get_json()['pagination']
+            expected_pages = (expected_total + PER_PAGE - 1) // PER_PAGE if expected_total is not None else None
+            ok = (pagination['total_count'] == expected_total
+                  and pagination['total_pages'] == expected_pages
+                  and pagination['count_capped'] == expected_capped)
+            failures += not ok
+            print(f"{'✓' if ok else '✗'} {description:<25} total_count={pagination['total_count']} "
+                  f"total_pages={pagination['total_pages']} count_capped={pagination['count_capped']}")
+
+    if failures:
+        print(f"\n{failures} cas avec une pagination inattendue")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Vérifie que l'arrêt anticipé du mode incrémental ne récupère pas de pages
+inutiles, contre le site local
+
+Pour chaque cas, un premier scraping enregistre toutes les pages du site,
+puis un scraping incrémental (stop_after pages inchangées consécutives)
+est relancé sur le site inchangé : il doit s'arrêter après les stop_after
+premières pages. Le nombre de pages récupérées par ce second scraping
+(sans la lecture de la page 1 pour le nombre total de pages) ne doit pas
+dépasser 2 * stop_after - 1 : stop_after pages au plus entre la
+récupération et l'écriture, plus celles chargées pendant que l'écriture
+traite les premières. Le script échoue (code de sortie 1) sinon.
+
+Usage:
+    python -m benchmarks.check_early_stop --latency 0.01
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+from car_scrapper import AlbiHttpNavigator, AlbiScraper
+from benchmarks.inventory_site import serve_inventory
+
+
+# (pages du site, stop_after, processus d'extraction)
+CASES = [
+    (80, 2, 1),
+    (10, 2, 2),
+    (30, 3, 4),
+]
+
+
+def incremental_fetches(pages: int, stop_after: int, parse_workers: int, latency: float) -> int:
+    """Pages récupérées par un scraping incrémental relancé sur un site inchangé"""
+    served = []
+    with serve_inventory(pages, latency, served=served) as base_url, \
+            tempfile.TemporaryDirectory() as tmp_dir, \
+            contextlib.redirect_stdout(io.StringIO()):
+        scraper = AlbiScraper(os.path.join(tmp_dir, "early_stop.db"),
+                              navigator=AlbiHttpNavigator(base_url=base_url, fallback=False))
+        scraper.scrap_from_page(1, pages, parse_workers=parse_workers)
+        served.clear()
+        scraper.scrap_from_page(1, pages, incremental=True, stop_after=stop_after, parse_workers=parse_workers)
+        scraper.database.close()
+    # La page 1 est aussi lue une fois pour le nombre total de pages
+    return len(served) - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie les pages récupérées avant un arrêt anticipé")
+    parser.add_argument("--latency", type=float, default=0.01, help="Latence du site local en secondes (défaut: 0.01)")
+    args = parser.parse_args()
+
+    failures = 0
+    for pages, stop_after, parse_workers in CASES:
+        fetched = incremental_fetches(pages, stop_after, parse_workers, args.latency)
+        limit = 2 * stop_after - 1
+        ok = fetched <= limit
+        failures += not ok
+        print(f"{'✓' if ok else '✗'} {pages:>3} pages, stop_after={stop_after}, parse_workers={parse_workers} : "
+              f"{fetched} pages récupérées (au plus {limit})")
+
+    if failures:
+        print(f"\n{failures} cas récupérant trop de pages avant l'arrêt anticipé")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
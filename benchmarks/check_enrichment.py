@@ -0,0 +1,121 @@
+"""
+Vérifie l'enrichissement par les pages de détail contre le site local
+
+1. scraping de --pages pages puis enrichissement : toutes les voitures ont
+   leur VIN (identique à celui de leur fiche d'inventaire), et la limite de requêtes par site est respectée (durée minimale)
+2. second enrichissement : aucune page récupérée (rien n'a changé)
+3. annonces modifiées (prix) : seules celles-ci sont récupérées à nouveau
+4. même véhicule publié sous une autre URL : détecté par l'index des VIN
+5. page de détail introuvable : retentée au plus max_attempts fois
+6. route /api/cars/<id>/details
+
+Échoue (code de sortie 1) en cas d'écart.
+
+Usage:
+    python -m benchmarks.check_enrichment --pages 5 --rate 40 --workers 8
+"""
+
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from car_scrapper import AlbiHttpNavigator, AlbiScraper, CarAPI, CarDatabase, DetailEnricher
+from benchmarks.inventory_site import serve_inventory
+
+
+def enrich(db_path: str, workers: int, rate: float) -> tuple[dict, float]:
+    database = CarDatabase(db_path)
+    enricher = DetailEnricher(database, workers=workers, rate=rate, batch_size=20)
+    start = time.perf_counter()
+    totals = enricher.run()
+    elapsed = time.perf_counter() - start
+    enricher.close()
+    database.close()
+    return totals, elapsed
+
+
+def check(condition: bool, message: str):
+    print(f"{'✓' if condition else '✗'} {message}")
+    if not condition:
+        raise AssertionError(message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie l'enrichissement par les pages de détail")
+    parser.add_argument("--pages", type=int, default=5, help="Pages d'inventaire scrapées (défaut: 5)")
+    parser.add_argument("--rate", type=float, default=40.0, help="Requêtes par seconde vers le site (défaut: 40)")
+    parser.add_argument("--workers", type=int, default=8, help="Récupérations en parallèle (défaut: 8)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latence du site local en secondes (défaut: 0.02)")
+    args = parser.parse_args()
+
+    with serve_inventory(args.pages, args.latency) as base_url, tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "enrich.db")
+        navigator = AlbiHttpNavigator(base_url=base_url, fallback=False)
+        AlbiScraper(db_path, navigator=navigator).scrap_from_page(1, args.pages, parse_workers=2)
+        navigator.close()
+        database = CarDatabase(db_path)
+        car_count = database.get_car_count()
+
+        # 1. Toutes les voitures, au rythme imposé
+        totals, elapsed = enrich(db_path, args.workers, args.rate)
+        minimum = (car_count - 1) / args.rate
+        check(totals == {'queued': car_count, 'done': car_count, 'failed': 0},
+              f"premier passage : {totals['done']}/{car_count} pages de détail récupérées")
+        check(elapsed >= minimum, f"limite de {args.rate:g} requêtes/s respectée "
+                                  f"({elapsed:.2f} s pour {car_count} pages, minimum {minimum:.2f} s)")
+        with database.connection() as conn:
+            rows = conn.execute(
+                "SELECT Car.detail_url, car_detail.vin, Car.vin FROM Car JOIN car_detail ON car_id = Car.id"
+            ).fetchall()
+        # Annonce n° index : URL /vehicule/<100000 + index>/, VIN JM1BPBLL<index>
+        indexes = [int(re.search(r"/vehicule/(\d+)/", url).group(1)) - 100000 for url, _, _ in rows]
+        check(all(vin == f"JM1BPBLL{index:09d}" for index, (_, vin, _) in zip(indexes, rows)),
+              "VIN lus sur les pages de détail")
+        check(all(listing_vin == vin for _, vin, listing_vin in rows), "VIN des fiches d'inventaire identiques")
+
+        # 2. Rien de nouveau
+        totals, _ = enrich(db_path, args.workers, args.rate)
+        check(totals['queued'] == 0, "second passage : aucune page récupérée")
+
+        # 3. Annonces modifiées : même effet qu'un scraping qui voit un nouveau prix
+        changed = [database.get_car_by_id(car_id) for car_id in range(1, 6)]
+        for car in changed:
+            car.price -= 500
+        database.upsert_cars(changed)
+        totals, _ = enrich(db_path, args.workers, args.rate)
+        check(totals['queued'] == len(changed), f"annonces modifiées : {totals['queued']} pages récupérées à nouveau")
+
+        # 4. Même véhicule (annonce n° 3) publié sous une autre URL
+        relisted = database.get_car_by_id(changed[0].id)
+        relisted.detail_url = f"{base_url}/fr/vehicule/100003/nouvelle-annonce/"
+        relisted.location = "ALBI Occasion Laval"
+        database.upsert_cars([relisted])
+        totals, _ = enrich(db_path, args.workers, args.rate)
+        duplicates = database.get_vin_duplicates()
+        check(totals['queued'] == 1 and len(duplicates) == 1 and len(duplicates[0]['car_ids']) == 2,
+              f"VIN en double détecté : {duplicates}")
+
+        # 5. Page de détail introuvable : au plus 3 tentatives
+        missing = database.get_car_by_id(changed[0].id)
+        missing.detail_url = f"{base_url}/fr/annonce-retiree/1/"
+        database.upsert_cars([missing])
+        attempts = 0
+        while enrich(db_path, args.workers, args.rate)[0]['queued']:
+            attempts += 1
+        check(attempts == 3, f"page introuvable : {attempts} tentatives")
+
+        # 6. API
+        api = CarAPI(db_path)
+        client = api.app.test_client()
+        details = client.get(f"/api/cars/{duplicates[0]['car_ids'][0]}/details").get_json()
+        check(details['vin'] == duplicates[0]['vin'] and details['same_vin_car_ids'] == duplicates[0]['car_ids'][1:]
+              and details['transmission'] in ('Automatique', 'Manuelle'),
+              f"/api/cars/<id>/details : {details['vin']}, {details['transmission']}, {details['specs']}")
+        api.database.close()
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
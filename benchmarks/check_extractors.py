@@ -0,0 +1,78 @@
+"""
+Vérifie les moteurs d'extraction sur le corpus de pages de référence
+
+Chaque page benchmarks/golden/<nom>.html est associée au fichier
+<nom>.json contenant les voitures attendues. Tous les moteurs de
+AlbiPageExtractor doivent produire exactement ces voitures. Le script échoue
+(code de sortie 1) à la première différence.
+
+Usage:
+    python -m benchmarks.check_extractors
+    python -m benchmarks.check_extractors --update   # régénère les .json avec 'html.parser'
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+
+from car_scrapper import AlbiPageExtractor, Car
+from car_scrapper.extractor import LXML_AVAILABLE
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "golden")
+BASE_URL = "https://www.albioccasion.com"
+
+# Champs comparés : ceux de l'annonce (l'id n'existe qu'en base)
+LISTING_FIELDS = tuple(field for field in Car.__slots__ if field != 'id')
+
+
+def extract(html: str, backend: str) -> list[dict]:
+    """Extrait les voitures d'une page (messages d'erreur de parsing masqués)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        cars = AlbiPageExtractor(html, BASE_URL, backend=backend).cars
+    return [{field: getattr(car, field) for field in LISTING_FIELDS} for car in cars]
+
+
+def golden_pages() -> list[str]:
+    """Chemins des pages HTML du corpus"""
+    return sorted(glob.glob(os.path.join(GOLDEN_DIR, "*.html")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérification des moteurs d'extraction")
+    parser.add_argument("--update", action="store_true", help="Régénérer les fichiers .json attendus")
+    args = parser.parse_args()
+
+    backends = [b for b in AlbiPageExtractor.BACKENDS if b != 'lxml' or LXML_AVAILABLE]
+    failures = 0
+
+    for html_path in golden_pages():
+        json_path = html_path[:-len(".html")] + ".json"
+        with open(html_path, encoding="utf-8") as f:
+            html = f.read()
+
+        if args.update:
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(extract(html, 'html.parser'), f, ensure_ascii=False, indent=2)
+                f.write("\n")
+
+        with open(json_path, encoding="utf-8") as f:
+            expected = json.load(f)
+
+        for backend in backends:
+            ok = extract(html, backend) == expected
+            failures += not ok
+            print(f"{'✓' if ok else '✗'} {os.path.basename(html_path):<32} {backend:<12} {len(expected)} voitures")
+
+    if not LXML_AVAILABLE:
+        print("(moteur 'lxml' ignoré : paquet lxml non installé)")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Vérifie avec EXPLAIN QUERY PLAN que get_cars_with_filters et les requêtes
+d'historique (car_observations) utilisent les index
+
+Chaque cas associe des filtres, un tri et éventuellement un curseur à l'index
+attendu dans le plan de la requête réellement exécutée (construite par
+CarDatabase.build_page_query, tri départagé par id compris). Le script
+échoue (code de sortie 1) si un plan n'utilise pas l'index attendu, fait un
+parcours complet de la table, ou trie dans un B-tree temporaire alors que
+l'index doit fournir l'ordre.
+
+Les filtres textuels utilisent toujours un index (<champ>_norm, ...). Avec
+match='exact', l'index composite (marque, modèle ou carburant + prix ou
+année) fournit aussi le tri : ces cas échouent sur un tri temporaire. Par
+sous-chaîne (mode par défaut : valeurs du dictionnaire car_text_value) ou
+par préfixe, plusieurs valeurs normalisées correspondent et seules les
+voitures filtrées sont triées en mémoire (compromis documenté dans le
+README). Les cas utilisent des textes sélectifs : quand un texte retient
+la majorité des voitures (ex: 'marque1' retient marque1 et marque10 à
+marque19), SQLite préfère à raison un parcours de la table ou de l'index
+de tri.
+
+Usage:
+    python -m benchmarks.check_query_plans
+"""
+
+import os
+import sys
+import tempfile
+
+from car_scrapper import CarDatabase
+from car_scrapper.database import encode_cursor
+from benchmarks.bench_connections import make_car
+
+
+# (description, filtres, sort_by, sort_order, curseur (valeur, id) ou None,
+#  fragment attendu dans le plan, tri fourni par l'index)
+CASES = [
+    # Sous-chaîne (par défaut) : dictionnaire car_text_value puis index de Car ;
+    # une seule valeur retenue devient une égalité, triée par l'index composite
+    ("marque", {'make': 'que7'}, 'id', 'asc', None, "idx_car_make_norm", False),
+    ("marque triée par prix", {'make': 'que7', 'price_lt': 30000}, 'price', 'asc', None,
+     "idx_car_make_norm_price", True),
+    ("modèle", {'model': 'dele7'}, 'price', 'asc', None, "idx_car_model_norm_price", True),
+    ("carburant", {'fuel': 'electri'}, 'price', 'asc', None, "idx_car_fuel_norm_price", True),
+    ("marque + modèle", {'make': 'que7', 'model': 'dele7'}, 'id', 'asc', None, "_norm", False),
+    # Préfixe : plage de l'index
+    ("marque (préfixe)", {'make': 'Marque1', 'match': 'prefix'}, 'price', 'asc', None, "idx_car_make_norm", False),
+    ("carburant (préfixe)", {'fuel': 'élec', 'match': 'prefix'}, 'price', 'asc', None, "idx_car_fuel_norm", False),
+    # Nom exact : filtre et tri par le même index composite
+    ("marque exacte par prix", {'make': 'Marque1', 'match': 'exact'}, 'price', 'asc', None,
+     "idx_car_make_norm_price", True),
+    ("marque exacte par prix décr.", {'make': 'marque1', 'match': 'exact', 'price_lt': 30000}, 'price', 'desc', None,
+     "idx_car_make_norm_price", True),
+    ("marque exacte par année", {'make': 'Marque1', 'match': 'exact'}, 'year', 'asc', None,
+     "idx_car_make_norm_year", True),
+    ("modèle exact par prix", {'model': 'Modele4', 'match': 'exact'}, 'price', 'asc', None,
+     "idx_car_model_norm_price", True),
+    ("carburant exact par prix", {'fuel': 'Électrique', 'match': 'exact'}, 'price', 'asc', None,
+     "idx_car_fuel_norm_price", True),
+    ("marque exacte, curseur prix", {'make': 'Marque1', 'match': 'exact'}, 'price', 'asc', (20000, 10),
+     "idx_car_make_norm_price", True),
+    ("plage de prix", {'price_lt': 12000, 'price_gt': 11000}, 'price', 'asc', None, "idx_car_price", True),
+    ("plage d'années", {'year_gt': 2022}, 'year', 'asc', None, "idx_car_year", True),
+    ("tri par prix", {}, 'price', 'asc', None, "idx_car_price", True),
+    ("tri par prix décroissant", {}, 'price', 'desc', None, "idx_car_price", True),
+    ("tri par kilométrage", {}, 'mileage', 'asc', None, "idx_car_mileage", True),
+    ("tri par marque", {}, 'make', 'asc', None, "idx_car_make", True),
+    ("tri par modèle", {}, 'model', 'asc', None, "idx_car_model", True),
+    ("curseur par prix", {}, 'price', 'asc', (20000, 10), "idx_car_price", True),
+    ("curseur par année décr.", {}, 'year', 'desc', (2018, 10), "idx_car_year", True),
+    ("option", {'options': ['Bluetooth']}, 'id', 'asc', None, "idx_car_option_option", True),
+    ("option (nom normalisé)", {'options': ['bluetooth']}, 'id', 'asc', None, "idx_option_name_norm", True),
+]
+
+
+# (description, requête, paramètres, fragment attendu dans le plan)
+OBSERVATION_CASES = [
+    ("historique d'une voiture",
+     "SELECT observed_at, price FROM car_observations WHERE car_id = ? ORDER BY observed_at, id",
+     (42,), "idx_car_observations_car"),
+    ("baisses de prix récentes",
+     "SELECT observed_at, price FROM car_observations WHERE price_delta < 0 AND observed_at >= ? "
+     "ORDER BY observed_at DESC LIMIT 20",
+     ("2000-01-01 00:00:00",), "idx_car_observations_price_drop"),
+    ("nombre de baisses récentes",
+     "SELECT COUNT(*) FROM car_observations WHERE price_delta < 0 AND observed_at >= ?",
+     ("2000-01-01 00:00:00",), "idx_car_observations_price_drop"),
+]
+
+
+def explain(database: CarDatabase, filters: dict, sort_by: str, sort_order: str, cursor: tuple) -> list[str]:
+    """Retourne les lignes du plan de la requête de données de get_cars_with_filters"""
+    where_clause, params = database.build_where_clause(filters)
+    encoded = encode_cursor(sort_by, sort_order, *cursor) if cursor else None
+    query, query_params = database.build_page_query(where_clause, params, sort_by, sort_order, cursor=encoded)
+    with database.connection() as conn:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", query_params).fetchall()]
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = CarDatabase(os.path.join(tmp_dir, "plans.db"))
+        database.upsert_cars([make_car(i) for i in range(5000)])
+        with database.connection() as conn:
+            conn.execute("ANALYZE")
+
+        for description, filters, sort_by, sort_order, cursor, expected, sorted_by_index in CASES:
+            plan = explain(database, filters, sort_by, sort_order, cursor)
+            uses_index = any(expected in line for line in plan)
+            full_scan = any(line == "SCAN Car" for line in plan)
+            temp_sort = any("TEMP B-TREE" in line for line in plan)
+            ok = uses_index and not full_scan and not (sorted_by_index and temp_sort)
+            failures += not ok
+            print(f"{'✓' if ok else '✗'} {description:<25} {' | '.join(plan)}")
+
+        with database.connection() as conn:
+            for description, query, params, expected in OBSERVATION_CASES:
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()]
+                ok = any(expected in line for line in plan) and not any(line.startswith("SCAN") for line in plan)
+                failures += not ok
+                print(f"{'✓' if ok else '✗'} {description:<25} {' | '.join(plan)}")
+
+        database.close()
+
+    if failures:
+        print(f"\n{failures} plan(s) sans l'index attendu ou avec un tri temporaire")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
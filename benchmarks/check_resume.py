@@ -0,0 +1,132 @@
+"""
+Vérifie la reprise des scrapings interrompus (crawl_run) contre le site local
+
+1. un scraping de --pages pages est interrompu par Ctrl-C (SIGINT)
+2. sa reprise est tuée brutalement (SIGKILL, comme un plantage)
+3. une dernière reprise termine le scraping
+
+Après chaque étape, le script vérifie que les voitures en base sont
+exactement celles des pages marquées terminées (écriture atomique des
+voitures et du point de reprise), puis qu'à la fin toutes les pages sont
+enregistrées. Il affiche le nombre de pages récupérées plusieurs fois
+(pages en cours au moment du plantage) et échoue (code de sortie 1) en cas
+d'incohérence.
+
+Usage:
+    python -m benchmarks.check_resume --pages 30 --latency 0.05
+"""
+
+import argparse
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from car_scrapper import AlbiHttpNavigator, AlbiScraper, CarDatabase
+from benchmarks.inventory_site import serve_inventory
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CARS_PER_PAGE = 24
+
+
+def run_child(base_url: str, db_path: str, pages: int, resume: bool):
+    """Scraping exécuté dans un sous-processus (interrompu par le processus principal)"""
+    navigator = AlbiHttpNavigator(base_url=base_url, fallback=False)
+    scraper = AlbiScraper(db_path, navigator=navigator)
+    if resume:
+        scraper.resume_last_run(parse_workers=2, batch_size=48)
+    else:
+        scraper.scrap_from_page(1, pages, parse_workers=2, batch_size=48)
+
+
+def start_child(base_url: str, db_path: str, pages: int, resume: bool) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.check_resume", "--child", base_url, db_path, "--pages", str(pages)]
+    if resume:
+        command.append("--resume")
+    return subprocess.Popen(command, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+def wait_for_pages(served: list, count: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while len(served) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def check_consistency(db_path: str, step: str) -> dict:
+    """Les voitures en base correspondent exactement aux pages terminées du scraping"""
+    database = CarDatabase(db_path)
+    run = database.get_last_crawl_run()
+    with database.connection() as conn:
+        done_pages = {row[0] for row in conn.execute(
+            "SELECT page_number FROM crawl_run_page WHERE run_id = ? AND status = 'done'", (run['id'],)
+        )}
+        urls = [row[0] for row in conn.execute("SELECT detail_url FROM Car")]
+    database.close()
+
+    # Annonce n° index servie sur la page index // 24 + 1 (URL /vehicule/<100000 + index>/)
+    car_pages = Counter((int(re.search(r"/vehicule/(\d+)/", url).group(1)) - 100000) // CARS_PER_PAGE + 1
+                        for url in urls)
+    consistent = set(car_pages) == done_pages and all(count == CARS_PER_PAGE for count in car_pages.values())
+    print(f"{'✓' if consistent else '✗'} {step:<32} statut {run['status']:<12} "
+          f"pages {dict(sorted(run['pages'].items()))}, {len(urls)} voitures")
+    if not consistent:
+        raise AssertionError(f"{step} : voitures et pages terminées incohérentes")
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie la reprise des scrapings interrompus")
+    parser.add_argument("--pages", type=int, default=30, help="Nombre de pages du scraping (défaut: 30)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence du site local en secondes (défaut: 0.05)")
+    parser.add_argument("--child", nargs=2, metavar=("BASE_URL", "DB_PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--resume", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.pages, args.resume)
+        return
+
+    served = []
+    with serve_inventory(args.pages, args.latency, served=served) as base_url, \
+            tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "resume.db")
+
+        # 1. Ctrl-C au tiers du scraping : les pages récupérées sont écrites avant de quitter
+        child = start_child(base_url, db_path, args.pages, resume=False)
+        wait_for_pages(served, args.pages // 3)
+        os.killpg(child.pid, signal.SIGINT)
+        child.wait()
+        run = check_consistency(db_path, "après Ctrl-C")
+        if run['status'] != 'interrupted':
+            raise AssertionError("Le scraping interrompu devrait être 'interrupted'")
+
+        # 2. Plantage de la reprise aux deux tiers : seules les transactions validées comptent
+        child = start_child(base_url, db_path, args.pages, resume=True)
+        wait_for_pages(served, 2 * args.pages // 3)
+        os.killpg(child.pid, signal.SIGKILL)
+        child.wait()
+        check_consistency(db_path, "après plantage (SIGKILL)")
+
+        # 3. Reprise jusqu'au bout
+        child = start_child(base_url, db_path, args.pages, resume=True)
+        child.wait()
+        run = check_consistency(db_path, "après la dernière reprise")
+        if run['status'] != 'completed' or run['pages'] != {'done': args.pages}:
+            raise AssertionError("Le scraping repris devrait être terminé avec toutes ses pages")
+
+    # La page 1 est aussi lue une fois pour le nombre total de pages
+    fetches = Counter(served)
+    fetches[1] -= 1
+    refetched = sorted(page for page, count in fetches.items() if count > 1)
+    print(f"{sum(fetches.values())} récupérations pour {args.pages} pages ; "
+          f"pages récupérées plusieurs fois : {refetched or 'aucune'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Site d'inventaire local servant de substitut à Albi.ca pour les benchmarks
+
+Les pages générées reprennent le balisage lu par AlbiPageExtractor
+(liens a.promotion-item avec métadonnées schema.org, km-block,
+distance-container, option-container, overlay-gouv-rebate) et la pagination
+lue par parse_page_infos ; chaque annonce a sa page de détail (métadonnées
+schema.org lues par parse_detail_page). Le contenu est synthétique et
+déterministe.
+
+Usage:
+    python -m benchmarks.inventory_site --pages 20 --port 8765
+"""
+
+import argparse
+import html
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+MAKES = [
+    ("Mazda", ["Mazda3", "CX-5", "CX-30", "MX-5"]),
+    ("Kia", ["Niro", "Soul", "Sportage", "EV6"]),
+    ("Nissan", ["Leaf", "Rogue", "Sentra", "Kicks"]),
+    ("Toyota", ["Corolla", "RAV4", "Prius", "Camry"]),
+    ("Hyundai", ["Kona", "Ioniq 5", "Elantra", "Tucson"]),
+]
+
+OPTIONS = [
+    "Bluetooth", "Caméra de recul", "Toit ouvrant", "Sièges et volant chauffants",
+    "Démarreur à distance", "Groupe électrique", "Jantes de 17\"", "Système mains libres",
+]
+
+LOCATIONS = ["Showroom Mazda", "ALBI Le Géant Kia", "Albi Nissan Laval", "Albi Toyota Mirabel"]
+
+# Pages de détail : /fr/vehicule/<100000 + numéro de l'annonce>/<slug>/
+DETAIL_PATH = re.compile(r"^/fr/vehicule/(\d+)/")
+
+
+def render_listing(index: int) -> str:
+    """Génère le HTML d'une annonce de l'inventaire"""
+    make, models = MAKES[index % len(MAKES)]
+    model = models[(index // len(MAKES)) % len(models)]
+    year = 2015 + index % 10
+    price = 15000 + (index * 389) % 35000
+    mileage = (index * 7919) % 180000
+    electric = index % 6 == 0
+    options = [OPTIONS[(index + k) % len(OPTIONS)] for k in range(index % 5)]
+    location = LOCATIONS[index % len(LOCATIONS)]
+    vin = f"JM1BPBLL{index:09d}"
+
+    options_html = "".join(f"<li>{html.escape(option)}</li>" for option in options)
+    rebate_html = '<div class="overlay-gouv-rebate">Véhicule électrique</div>' if electric else ''
+    return f"""
+    <a class="promotion-item" href="/fr/vehicule/{100000 + index}/{make.lower()}-{model.lower()}-{year}/">
+        <div itemscope itemtype="http://schema.org/Car">
+            <meta itemprop="name" content="{make} {model} {year}">
+            <meta itemprop="brand" content="{make}">
+            <meta itemprop="model" content="{html.escape(model)}">
+            <meta itemprop="vehicleModelDate" content="{year}">
+            <meta itemprop="vehicleConfiguration" content="Base">
+            <meta itemprop="vehicleIdentificationNumber" content="{vin}">
+            <div itemprop="offers" itemscope itemtype="http://schema.org/Offer">
+                <meta itemprop="price" content="{price}">
+                <meta itemprop="priceCurrency" content="CAD">
+            </div>
+        </div>
+        {rebate_html}
+        <div class="km-block"><span>{mileage} km</span></div>
+        <div class="distance-container"><span>{html.escape(location)}</span></div>
+        <div class="option-container"><ul>{options_html}</ul></div>
+    </a>"""
+
+
+def render_detail_page(index: int) -> str:
+    """Génère la page de détail d'une annonce (mêmes valeurs que render_listing, plus les caractéristiques)"""
+    make, models = MAKES[index % len(MAKES)]
+    model = models[(index // len(MAKES)) % len(models)]
+    year = 2015 + index % 10
+    vin = f"JM1BPBLL{index:09d}"
+    transmission = "Manuelle" if index % 7 == 0 else "Automatique"
+    drive = ("Traction avant", "Traction intégrale", "Propulsion")[index % 3]
+    color = ("Blanc", "Noir", "Gris", "Rouge", "Bleu")[index % 5]
+    doors = 2 if model == "MX-5" else 4
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head><meta charset="utf-8"><title>{make} {html.escape(model)} {year}</title></head>
+<body>
+    <div itemscope itemtype="http://schema.org/Car">
+        <meta itemprop="name" content="{make} {html.escape(model)} {year}">
+        <meta itemprop="brand" content="{make}">
+        <meta itemprop="model" content="{html.escape(model)}">
+        <meta itemprop="vehicleModelDate" content="{year}">
+        <meta itemprop="vehicleIdentificationNumber" content="{vin}">
+        <meta itemprop="vehicleTransmission" content="{transmission}">
+        <meta itemprop="driveWheelConfiguration" content="{drive}">
+        <meta itemprop="color" content="{color}">
+        <meta itemprop="numberOfDoors" content="{doors}">
+        <h1>{make} {html.escape(model)} {year}</h1>
+        <table class="specs">
+            <tr><th>Transmission</th><td>{transmission}</td></tr>
+            <tr><th>Entraînement</th><td>{drive}</td></tr>
+            <tr><th>Couleur</th><td>{color}</td></tr>
+        </table>
+    </div>
+</body>
+</html>"""
+
+
+def render_inventory_page(page_number: int, total_pages: int, cars_per_page: int = 24) -> str:
+    """Génère une page d'inventaire complète avec sa pagination"""
+    start = (page_number - 1) * cars_per_page
+    listings = "".join(render_listing(i) for i in range(start, start + cars_per_page))
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head><meta charset="utf-8"><title>Inventaire - page {page_number}</title></head>
+<body>
+    <div class="inventory-list">{listings}
+    </div>
+    <div class="InventoryPaging">
+        <div class="pagination-container">
+            <span id="cph_ContainerLarger_pgr_Lower_ctl00_CurrentPageLabel">{page_number}</span>
+            <span id="cph_ContainerLarger_pgr_Lower_ctl00_TotalPagesLabel">{total_pages}</span>
+        </div>
+    </div>
+</body>
+</html>"""
+
+
+def make_handler(total_pages: int, latency: float, served: list = None):
+    """
+    Crée le gestionnaire HTTP servant les pages d'inventaire
+    Les numéros des pages servies sont ajoutés à `served` s'il est fourni
+    """
+    class InventoryHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            detail = DETAIL_PATH.match(url.path)
+            if url.path.rstrip('/') in ('', '/fr/inventaire'):
+                page_number = int(parse_qs(url.query).get('page', ['1'])[0])
+                body = render_inventory_page(page_number, total_pages).encode('utf-8')
+                status = 200
+                if served is not None:
+                    served.append(page_number)
+            elif detail:
+                body = render_detail_page(int(detail.group(1)) - 100000).encode('utf-8')
+                status = 200
+            else:
+                body = b"Not found"
+                status = 404
+
+            if latency:
+                time.sleep(latency)
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return InventoryHandler
+
+
+@contextmanager
+def serve_inventory(total_pages: int = 10, latency: float = 0.0, port: int = 0, served: list = None):
+    """
+    Lance le site local dans un thread et fournit son URL de base
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(total_pages, latency, served))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Site d'inventaire local")
+    parser.add_argument("--pages", type=int, default=20, help="Nombre de pages d'inventaire (défaut: 20)")
+    parser.add_argument("--port", type=int, default=8765, help="Port d'écoute (défaut: 8765)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence ajoutée par réponse, en secondes")
+    args = parser.parse_args()
+
+    with serve_inventory(args.pages, args.latency, args.port) as base_url:
+        print(f"Inventaire servi sur {base_url}/fr/inventaire/?page=1 (Ctrl-C pour arrêter)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
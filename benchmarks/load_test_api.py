@@ -0,0 +1,175 @@
+"""
+Test de charge de l'API REST : moteur flask contre moteur asgi
+
+Pour chaque moteur, lance `server.py` dans un sous-processus sur une base
+temporaire, puis `--clients` clients HTTP (connexions persistantes, un
+thread chacun) envoient pendant `--duration` secondes un mélange de
+requêtes : listes filtrées et triées, pages profondes, détails, recherche
+plein texte et statistiques. Le cache de réponses est désactivé par défaut
+pour mesurer les requêtes SQL et non le cache.
+
+Affiche les requêtes/seconde, les latences p50 / p99 et le nombre d'erreurs.
+
+Usage:
+    python -m benchmarks.load_test_api --cars 20000 --clients 32 --duration 10
+    python -m benchmarks.load_test_api --engines asgi --workers 16 --cache-size 1024
+"""
+
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from car_scrapper import CarDatabase
+from benchmarks.bench_connections import make_car
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request_mix(cars: int, seed: int) -> list[str]:
+    """Liste d'URL représentative, tirée au hasard (graine fixe)"""
+    rng = random.Random(seed)
+    urls = []
+    for _ in range(500):
+        kind = rng.random()
+        if kind < 0.35:
+            make = f"Marque{rng.randrange(20)}"
+            sort_by = rng.choice(["price", "year", "mileage"])
+            urls.append(f"/api/cars?make={make}&sort_by={sort_by}&sort_order={rng.choice(['asc', 'desc'])}")
+        elif kind < 0.50:
+            urls.append(f"/api/cars?price_lt={rng.randrange(15000, 50000)}&page={rng.randrange(1, 20)}")
+        elif kind < 0.75:
+            urls.append(f"/api/cars/{rng.randrange(1, cars + 1)}")
+        elif kind < 0.90:
+            urls.append(f"/api/search?q=Modele{rng.randrange(50)}")
+        else:
+            urls.append("/api/stats")
+    return urls
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/stats")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Le serveur ne répond pas sur le port {port}")
+
+
+def client_loop(port: int, urls: list[str], deadline: float, seed: int, latencies: list, errors: list):
+    """Un client : requêtes en boucle sur une connexion persistante"""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while time.perf_counter() < deadline:
+        url = rng.choice(urls)
+        started = time.perf_counter()
+        try:
+            conn.request("GET", url)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(url)
+            # Le serveur de développement Flask ferme la connexion après chaque réponse
+            if response.will_close:
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            errors.append(url)
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run_engine(engine: str, db_path: str, urls: list[str], args) -> dict:
+    port = free_port()
+    command = [sys.executable, os.path.join(ROOT_DIR, "server.py"), "--engine", engine,
+               "--host", "127.0.0.1", "--port", str(port), "--db-path", db_path,
+               "--workers", str(args.workers), "--cache-size", str(args.cache_size)]
+    server = subprocess.Popen(command, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        # Préchauffage : connexions du pool, pages SQLite en cache
+        deadline = time.perf_counter() + 1.0
+        client_loop(port, urls, deadline, 0, [], [])
+
+        latencies, errors = [], []
+        deadline = time.perf_counter() + args.duration
+        threads = [
+            threading.Thread(target=client_loop, args=(port, urls, deadline, i, latencies, errors))
+            for i in range(args.clients)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        'engine': engine,
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'API (flask contre asgi)")
+    parser.add_argument("--cars", type=int, default=20000, help="Nombre de voitures en base (défaut: 20000)")
+    parser.add_argument("--clients", type=int, default=32, help="Clients simultanés (défaut: 32)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Durée par moteur en secondes (défaut: 10)")
+    parser.add_argument("--engines", nargs="+", choices=["flask", "asgi"], default=["flask", "asgi"],
+                        help="Moteurs à comparer (défaut: flask asgi)")
+    parser.add_argument("--workers", type=int, default=8, help="Threads du moteur asgi (défaut: 8)")
+    parser.add_argument("--cache-size", type=int, default=0, help="Cache de réponses (défaut: 0, désactivé)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du mélange de requêtes (défaut: 42)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "load_test.db")
+        database = CarDatabase(db_path)
+        database.upsert_cars([make_car(i) for i in range(args.cars)])
+        database.close()
+        urls = request_mix(args.cars, args.seed)
+
+        print(f"{args.cars} voitures, {args.clients} clients, {args.duration:.0f} s par moteur, "
+              f"cache {'désactivé' if not args.cache_size else args.cache_size}")
+        print(f"{'moteur':<8} {'requêtes':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'erreurs':>8}")
+        for engine in args.engines:
+            result = run_engine(engine, db_path, urls, args)
+            print(f"{result['engine']:<8} {result['requests']:>9} {result['rps']:>9.1f} "
+                  f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Suite de benchmarks de CarDatabase et CarAPI sur données synthétiques
+
+Pour chaque taille de jeu de données (voir benchmarks.synthetic), mesure :
+- get_cars_with_filters : chaque filtre, chaque tri, pages profondes
+  (OFFSET et curseur), get_car_by_id, recherche plein texte
+- /api/stats et /api/cars via le client de test Flask (cache désactivé)
+- écritures : insertion, mise à jour et réécriture inchangée de lots
+- charge HTTP : clients simultanés sur un mélange de routes, via le client
+  de test Flask ou un serveur local (--url)
+
+Les résultats (temps médian par opération, ou débit et p99 pour la charge)
+sont écrits dans un fichier JSON. Avec --compare, ils sont comparés à un
+fichier de référence et le script échoue (code de sortie 1) si une mesure
+se dégrade de plus de --threshold.
+
+Usage:
+    python -m benchmarks.suite --sizes 10000 100000 --output baseline.json
+    python -m benchmarks.suite --sizes 10000 --compare baseline.json --threshold 0.25
+    python -m benchmarks.suite --sizes 1000000 --url http://127.0.0.1:5000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from car_scrapper import CarAPI, CarDatabase
+from car_scrapper.serialization import ORJSON_AVAILABLE
+from benchmarks.synthetic import DEFAULT_SEED, generate_cars, dataset_path
+
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "car_scrapper_benchmarks")
+
+# (nom, filtres, tri)
+# Les filtres textuels sont mesurés dans le mode par défaut de l'API
+# (match='contains', valeurs cherchées dans car_text_value), sauf mention « exacte »
+FILTER_CASES = [
+    ("aucun filtre", {}, 'id'),
+    ("marque", {'make': 'Mazda'}, 'id'),
+    ("modèle", {'model': 'Qashqai'}, 'id'),
+    ("carburant", {'fuel': 'electrique'}, 'id'),
+    ("prix max", {'price_lt': 15000}, 'id'),
+    ("plage de prix", {'price_gt': 20000, 'price_lt': 22000}, 'id'),
+    ("année min", {'year_gt': 2024}, 'id'),
+    ("option", {'options': ['Toit ouvrant']}, 'id'),
+    ("deux options", {'options': ['Toit ouvrant', 'Navigation GPS']}, 'id'),
+    ("marque + prix", {'make': 'Kia', 'price_lt': 25000}, 'price'),
+    ("marque exacte + prix", {'make': 'Kia', 'match': 'exact', 'price_lt': 25000}, 'price'),
+]
+
+SORT_CASES = [
+    (sort_by, sort_order)
+    for sort_by in ('price', 'year', 'mileage', 'make', 'model')
+    for sort_order in ('asc', 'desc')
+]
+
+# Mélange de routes du test de charge
+LOAD_URLS = [
+    "/api/cars?make=Mazda&sort_by=price",
+    "/api/cars?price_lt=20000&sort_by=year&sort_order=desc",
+    "/api/cars?model=Rogue&page=3",
+    "/api/cars?option=Toit%20ouvrant&count=estimate",
+    "/api/search?q=sportage",
+    "/api/stats",
+]
+
+WRITE_BATCH = 1000
+
+
+def median_ms(function, repeat: int, warmup: int = 2) -> float:
+    """Temps médian d'un appel en millisecondes"""
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def record(results: dict, key: str, value: float, unit: str = "ms", better: str = "lower"):
+    results[key] = {'value': round(value, 4), 'unit': unit, 'better': better}
+    print(f"  {key:<52} {value:>12.3f} {unit}")
+
+
+def bench_queries(results: dict, prefix: str, database: CarDatabase, count: int, repeat: int):
+    """Lectures : filtres, tris, pages profondes, accès par id et recherche"""
+    for name, filters, sort_by in FILTER_CASES:
+        record(results, f"{prefix}/filtre {name}",
+               median_ms(lambda: database.get_cars_with_filters(filters, sort_by=sort_by), repeat))
+
+    for sort_by, sort_order in SORT_CASES:
+        record(results, f"{prefix}/tri {sort_by} {sort_order}",
+               median_ms(lambda: database.get_cars_with_filters({}, sort_by=sort_by, sort_order=sort_order,
+                                                                count_mode='none'), repeat))
+
+    # Page profonde : au milieu de la table, par OFFSET puis par curseur
+    deep_page = max(1, count // 20 // 2)
+    record(results, f"{prefix}/page profonde offset",
+           median_ms(lambda: database.get_cars_with_filters({}, sort_by='price', page=deep_page,
+                                                            count_mode='none'), repeat))
+    cars, _ = database.get_cars_with_filters({}, sort_by='price', page=deep_page - 1, count_mode='none')
+    cursor = database.make_cursor(cars[-1], sort_by='price') if cars else None
+    record(results, f"{prefix}/page profonde curseur",
+           median_ms(lambda: database.get_cars_with_filters({}, sort_by='price', cursor=cursor,
+                                                            count_mode='none'), repeat))
+
+    rng = random.Random(DEFAULT_SEED)
+    ids = [rng.randint(1, count) for _ in range(repeat * 20)]
+    id_iter = iter(ids * 2)
+    record(results, f"{prefix}/get_car_by_id",
+           median_ms(lambda: database.get_car_by_id(next(id_iter)), repeat * 10))
+
+    record(results, f"{prefix}/recherche plein texte",
+           median_ms(lambda: database.search_cars("mazda cx-5"), repeat))
+
+
+def bench_api(results: dict, prefix: str, db_path: str, repeat: int):
+    """Routes de l'API via le client de test Flask, sans cache de réponses"""
+    api = CarAPI(db_path, cache_size=0)
+    client = api.app.test_client()
+    for name, url in (("/api/stats", "/api/stats"),
+                      ("/api/cars", "/api/cars?per_page=50"),
+                      ("/api/cars filtrée", "/api/cars?make=Kia&price_lt=25000&sort_by=price")):
+        def call():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} : statut {response.status_code}")
+        record(results, f"{prefix}/api {name}", median_ms(call, repeat))
+    api.database.close()
+
+
+def bench_writes(results: dict, prefix: str, db_path: str, count: int, repeat: int, tmp_dir: str):
+    """
+    Écritures sur une copie de la base : lot de voitures nouvelles, lot de
+    voitures modifiées (prix) et lot inchangé (ignoré grâce aux empreintes)
+    """
+    copy_path = os.path.join(tmp_dir, "writes.db")
+    shutil.copy(db_path, copy_path)
+    database = CarDatabase(copy_path)
+    rounds = max(5, repeat // 3)
+
+    # Lots générés à l'avance : seule l'écriture est mesurée
+    new_batches = iter([list(generate_cars(WRITE_BATCH, DEFAULT_SEED, start=count + i * WRITE_BATCH))
+                        for i in range(rounds + 1)])
+
+    def insert_batch():
+        database.upsert_cars(next(new_batches))
+
+    existing = list(generate_cars(WRITE_BATCH, DEFAULT_SEED, start=0))
+    price_shift = [0]
+
+    def update_batch():
+        price_shift[0] += 1
+        for car in existing:
+            car.price += 1 if price_shift[0] % 2 else -1
+        database.upsert_cars(existing)
+
+    def unchanged_batch():
+        database.upsert_cars(existing)
+
+    for name, function in (("insertion", insert_batch), ("mise à jour", update_batch),
+                           ("lot inchangé", unchanged_batch)):
+        record(results, f"{prefix}/écriture {name} ({WRITE_BATCH} voitures)",
+               median_ms(function, rounds, warmup=1))
+    database.close()
+    os.remove(copy_path)
+
+
+def load_client(target, urls: list[str], deadline: float, seed: int, latencies: list, errors: list):
+    """Un client du test de charge : client de test Flask ou connexion HTTP persistante"""
+    rng = random.Random(seed)
+    conn = None
+    while time.perf_counter() < deadline:
+        url = rng.choice(urls)
+        started = time.perf_counter()
+        try:
+            if isinstance(target, str):
+                if conn is None:
+                    parts = urlsplit(target)
+                    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+                conn.request("GET", url)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+                if response.will_close:
+                    conn.close()
+                    conn = None
+            else:
+                status = target.get(url).status_code
+        except (OSError, http.client.HTTPException):
+            status = None
+            if conn is not None:
+                conn.close()
+                conn = None
+        latencies.append(time.perf_counter() - started)
+        if status is None or status >= 500:
+            errors.append(url)
+    if conn is not None:
+        conn.close()
+
+
+def bench_load(results: dict, prefix: str, db_path: str, clients: int, duration: float, url: str = None):
+    """Charge HTTP : débit et p99 de `clients` clients simultanés pendant `duration` secondes"""
+    api = None
+    if url:
+        target = url
+    else:
+        api = CarAPI(db_path, cache_size=0)
+        target = api.app.test_client()
+
+    load_client(target, LOAD_URLS, time.perf_counter() + 0.5, 0, [], [])
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=load_client, args=(target, LOAD_URLS, deadline, i, latencies, errors))
+               for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if api is not None:
+        api.database.close()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0.0
+    record(results, f"{prefix}/charge req/s ({clients} clients)", len(latencies) / elapsed, "req/s", "higher")
+    record(results, f"{prefix}/charge p99 ({clients} clients)", p99)
+    if errors:
+        print(f"  ✗ {len(errors)} erreurs pendant le test de charge")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare les résultats à la référence et retourne les mesures dégradées
+    au-delà de `threshold` (0.25 = 25 % plus lent, ou 25 % de débit en moins)
+    """
+    regressions = []
+    print(f"\n=== COMPARAISON (seuil {threshold:.0%}) ===")
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None or not reference['value']:
+            continue
+        ratio = current['value'] / reference['value']
+        # Variation positive = dégradation, quel que soit le sens de la mesure
+        change = ratio - 1 if current['better'] == 'lower' else 1 - ratio
+        regressed = change > threshold
+        if regressed:
+            regressions.append(key)
+        print(f"{'✗' if regressed else '✓'} {key:<52} {reference['value']:>10.3f} → "
+              f"{current['value']:>10.3f} {current['unit']:<6} ({change:+.0%})")
+    missing = sorted(set(baseline) - set(results))
+    if missing:
+        print(f"{len(missing)} mesures de la référence non exécutées")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks CarDatabase / CarAPI")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000],
+                        help="Tailles des jeux de données (défaut: 10000 ; ex: 10000 100000 1000000)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"Graine (défaut: {DEFAULT_SEED})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Répertoire des bases générées, réutilisées d'une exécution à l'autre")
+    parser.add_argument("--repeat", type=int, default=30, help="Répétitions par mesure (défaut: 30)")
+    parser.add_argument("--clients", type=int, default=8, help="Clients du test de charge (défaut: 8)")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="Durée du test de charge en secondes (défaut: 5, 0 pour l'ignorer)")
+    parser.add_argument("--url", help="Serveur local à charger (ex: http://127.0.0.1:5000) "
+                                      "au lieu du client de test Flask")
+    parser.add_argument("--no-writes", action="store_true", help="Ne pas mesurer les écritures")
+    parser.add_argument("--output", help="Fichier JSON où écrire les résultats")
+    parser.add_argument("--compare", help="Fichier JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Dégradation tolérée par rapport à la référence (défaut: 0.25)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count in args.sizes:
+            db_path = dataset_path(args.cache_dir, count, args.seed)
+            prefix = str(count)
+            print(f"\n=== {count} voitures ===")
+            database = CarDatabase(db_path)
+            bench_queries(results, prefix, database, count, args.repeat)
+            database.close()
+            bench_api(results, prefix, db_path, args.repeat)
+            if not args.no_writes:
+                bench_writes(results, prefix, db_path, count, args.repeat, tmp_dir)
+            if args.duration > 0:
+                bench_load(results, prefix, db_path, args.clients, args.duration, args.url)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'orjson': ORJSON_AVAILABLE,
+            'machine': platform.machine(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nRésultats écrits dans {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} régressions au-delà de {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✓ Aucune régression")
+
+
+if __name__ == "__main__":
+    main()
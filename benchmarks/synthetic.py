@@ -0,0 +1,182 @@
+"""
+Générateur reproductible de voitures réalistes pour les benchmarks
+
+Les voitures imitent l'inventaire réel (marques et modèles des concession-
+naires ALBI, options en français, prix dépendant de l'âge et du
+kilométrage) avec une graine fixe : deux bases de même taille et même
+graine sont identiques, ce qui rend les mesures comparables d'une exécution
+à l'autre.
+
+Usage:
+    python -m benchmarks.synthetic --cars 100000 --db-path synthetic.db
+"""
+
+import argparse
+import os
+import random
+import shutil
+import time
+
+from car_scrapper import Car, CarDatabase
+
+
+# Tailles de référence des jeux de données
+SIZES = (10_000, 100_000, 1_000_000)
+
+DEFAULT_SEED = 42
+
+CURRENT_YEAR = 2026
+
+# Marque -> (poids, [(modèle, prix neuf, carburant forcé ou None)])
+MAKES = {
+    'Nissan': (22, [('Qashqai', 32000, None), ('Rogue', 38000, None), ('Kicks', 26000, None),
+                    ('Sentra', 24000, None), ('Altima', 33000, None), ('Pathfinder', 48000, None),
+                    ('Frontier', 45000, None), ('Leaf', 42000, 'Électrique'), ('Ariya', 55000, 'Électrique')]),
+    'Kia': (18, [('Seltos', 30000, None), ('Sportage', 36000, None), ('Sorento', 45000, None),
+                 ('Forte', 23000, None), ('Soul', 25000, None), ('Telluride', 55000, None),
+                 ('Niro', 38000, 'Hybride'), ('EV6', 58000, 'Électrique')]),
+    'Mazda': (16, [('Mazda3', 26000, None), ('Mazda3 Sport', 28000, None), ('CX-30', 31000, None),
+                   ('CX-5', 36000, None), ('CX-50', 42000, None), ('CX-90', 55000, None),
+                   ('MX-5', 40000, None)]),
+    'Hyundai': (14, [('Elantra', 24000, None), ('Kona', 29000, None), ('Tucson', 35000, None),
+                     ('Santa Fe', 44000, None), ('Venue', 23000, None), ('Ioniq 5', 56000, 'Électrique')]),
+    'Toyota': (8, [('Corolla', 25000, None), ('RAV4', 37000, None), ('Camry', 34000, None),
+                   ('Highlander', 50000, None), ('Tacoma', 48000, None), ('Prius', 36000, 'Hybride')]),
+    'Honda': (6, [('Civic', 29000, None), ('CR-V', 38000, None), ('HR-V', 31000, None),
+                  ('Accord', 37000, None), ('Pilot', 52000, None)]),
+    'Chevrolet': (5, [('Equinox', 34000, None), ('Trax', 25000, None), ('Silverado', 55000, None),
+                      ('Malibu', 30000, None), ('Bolt EV', 40000, 'Électrique')]),
+    'Ford': (4, [('Escape', 35000, None), ('F-150', 58000, None), ('Explorer', 50000, None),
+                 ('Mustang Mach-E', 60000, 'Électrique')]),
+    'Mitsubishi': (3, [('RVR', 27000, None), ('Outlander', 36000, None), ('Mirage', 18000, None)]),
+    'Volkswagen': (2, [('Jetta', 27000, None), ('Tiguan', 37000, None), ('Golf GTI', 38000, None)]),
+    'Subaru': (1, [('Crosstrek', 31000, None), ('Forester', 36000, None), ('Outback', 40000, None)]),
+    'Buick': (1, [('Encore GX', 33000, None), ('Envision', 43000, None)]),
+}
+
+LOCATIONS = {
+    'Nissan': ['ALBI Nissan Vaudreuil', 'ALBI Nissan Mont-Tremblant', 'ALBI Nissan Repentigny',
+               'ALBI Nissan de Mascouche'],
+    'Kia': ['ALBI Le Géant Kia', 'ALBI Kia St-Eustache'],
+    'Mazda': ['ALBI Le Géant Mazda', 'Showroom Mazda', 'Front Mazda'],
+    'Hyundai': ['ALBI Hyundai Laval', 'ALBI Hyundai Mascouche'],
+}
+USED_CAR_LOCATIONS = ['ALBI Occasion Mascouche', 'ALBI Occasion Laval']
+
+# (option, probabilité de présence)
+OPTIONS = [
+    ('Détecteurs angles morts', 0.6), ('Groupe électrique', 0.6), ('Sièges et volant chauffants', 0.5),
+    ('Sièges chauffants', 0.35), ('Démarreur à distance', 0.35), ('Système mains libres', 0.35),
+    ('Contrôles au volant', 0.3), ('Démarrage sans clé', 0.3), ('Sièges électriques', 0.2),
+    ('Climatiseur', 0.15), ('Automatique', 0.15), ('Caméra de recul', 0.3), ('Toit ouvrant', 0.12),
+    ('Apple CarPlay', 0.25), ('Android Auto', 0.25), ('Navigation GPS', 0.15), ('Hayon électrique', 0.08),
+    ('Système audio BOSE', 0.06), ('Sièges mémoires', 0.05), ('Sièges chauffants et ventilés', 0.04),
+    ('Régulateur de vitesse adaptatif', 0.12), ('Traction intégrale', 0.25), ('Manuelle 6 Vitesses', 0.03),
+]
+WHEEL_SIZES = ['Jantes de 15"', 'Jantes de 16"', 'Jantes de 17"', 'Jantes de 18"', 'Jantes de 19"']
+
+FUELS = [('Essence', 0.86), ('Hybride', 0.09), ('Diesel', 0.05)]
+
+
+def generate_car(rng: random.Random, index: int) -> Car:
+    """Crée la voiture numéro `index` à partir du générateur `rng`"""
+    makes = list(MAKES)
+    make = rng.choices(makes, weights=[MAKES[m][0] for m in makes])[0]
+    model, new_price, forced_fuel = rng.choice(MAKES[make][1])
+
+    # Surtout des voitures récentes, quelques-unes de plus de 10 ans
+    age = min(int(rng.expovariate(1 / 3.5)), 16)
+    year = CURRENT_YEAR - age
+    mileage = 0 if age == 0 and rng.random() < 0.5 else int(max(0, rng.gauss(16000, 5000)) * max(age, 0.3))
+    fuel = forced_fuel or rng.choices([f for f, _ in FUELS], weights=[w for _, w in FUELS])[0]
+
+    # Dépréciation par année et par kilomètre, prix arrondi à x95
+    price = new_price * (0.86 ** age) * max(0.4, 1 - mileage / 600_000) * rng.uniform(0.9, 1.1)
+    price = max(3995, int(price / 100) * 100 - 5)
+
+    options = [name for name, probability in OPTIONS if rng.random() < probability]
+    options.append(rng.choice(WHEEL_SIZES))
+    rng.shuffle(options)
+
+    location = rng.choice(LOCATIONS.get(make, USED_CAR_LOCATIONS) if rng.random() < 0.8 else USED_CAR_LOCATIONS)
+    slug = f"{make}-{model}-{year}".lower().replace(' ', '-')
+    return Car(
+        make=make,
+        model=model,
+        year=year,
+        price=price,
+        mileage=mileage,
+        fuel=fuel,
+        location=location,
+        options=options,
+        detail_url=f"https://www.albioccasion.com/fr/vehicule/{100000 + index}/{slug}/"
+    )
+
+
+def generate_cars(count: int, seed: int = DEFAULT_SEED, start: int = 0):
+    """Génère `count` voitures reproductibles (numéros start à start + count - 1)"""
+    rng = random.Random(f"{seed}:{start}")
+    for index in range(start, start + count):
+        yield generate_car(rng, index)
+
+
+def build_database(db_path: str, count: int, seed: int = DEFAULT_SEED, batch_size: int = 10_000) -> CarDatabase:
+    """Remplit une base vide avec `count` voitures, par lots d'une transaction"""
+    database = CarDatabase(db_path)
+    batch = []
+    for car in generate_cars(count, seed):
+        batch.append(car)
+        if len(batch) >= batch_size:
+            database.upsert_cars(batch)
+            batch.clear()
+    if batch:
+        database.upsert_cars(batch)
+    with database.connection() as conn:
+        conn.execute("ANALYZE")
+    return database
+
+
+def dataset_path(cache_dir: str, count: int, seed: int = DEFAULT_SEED) -> str:
+    """
+    Chemin de la base de `count` voitures dans `cache_dir`, générée au premier
+    appel puis réutilisée (la génération d'un million de voitures prend
+    plusieurs minutes)
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    db_path = os.path.join(cache_dir, f"cars_{count}_{seed}.db")
+    if not os.path.exists(db_path):
+        print(f"Génération de {count} voitures (graine {seed}) dans {db_path}...")
+        started = time.perf_counter()
+        tmp_path = f"{db_path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        database = build_database(tmp_path, count, seed)
+        with database.connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        database.close()
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(tmp_path + suffix):
+                os.remove(tmp_path + suffix)
+        shutil.move(tmp_path, db_path)
+        print(f"Base générée en {time.perf_counter() - started:.1f} s")
+    return db_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère une base de voitures synthétiques")
+    parser.add_argument("--cars", type=int, default=SIZES[0], help=f"Nombre de voitures (défaut: {SIZES[0]})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"Graine (défaut: {DEFAULT_SEED})")
+    parser.add_argument("--db-path", default="synthetic.db", help="Base à créer (défaut: synthetic.db)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db_path):
+        parser.error(f"{args.db_path} existe déjà")
+    started = time.perf_counter()
+    database = build_database(args.db_path, args.cars, args.seed)
+    print(f"{database.get_car_count()} voitures générées dans {args.db_path} "
+          f"en {time.perf_counter() - started:.1f} s")
+    database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,18 @@ Car Scrapper - Un outil de scraping pour les sites de vente de voitures
 """
 
 from .models import Car, PageInfo
+from .metrics import METRICS, MetricsRegistry
 from .database import CarDatabase
 from .extractor import AlbiPageExtractor
 from .navigator import AlbiNavigator
+from .http_navigator import AlbiHttpNavigator
+from .crawler import AlbiConcurrentCrawler
+from .snapshots import SnapshotStore
+from .enrichment import DetailEnricher
+from .pipeline import ScrapePipeline
 from .scraper import AlbiScraper
 from .api import CarAPI
+from .asgi import AsyncCarAPI
 
 __version__ = "1.0.0"
 __author__ = "Car Scrapper Team"
@@ -15,9 +22,17 @@ __author__ = "Car Scrapper Team"
 __all__ = [
     "Car",
     "PageInfo", 
+    "METRICS",
+    "MetricsRegistry",
     "CarDatabase",
     "AlbiPageExtractor",
     "AlbiNavigator",
+    "AlbiHttpNavigator",
+    "AlbiConcurrentCrawler",
+    "SnapshotStore",
+    "DetailEnricher",
+    "ScrapePipeline",
     "AlbiScraper",
-    "CarAPI"
+    "CarAPI",
+    "AsyncCarAPI"
 ] 
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""
+Instantané en colonnes NumPy de la table Car pour les statistiques
+"""
+
+import threading
+from .database import TEXT_FIELDS, CarDatabase, normalize_text
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# Centiles retournés pour chaque colonne numérique
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+
+class CarSnapshot:
+    """
+    Copie en mémoire de la table Car, une colonne par tableau NumPy
+
+    Marque, modèle et carburant sont stockés sous forme de codes entiers
+    (catégories), ce qui ramène les filtres textuels à un test sur
+    quelques dizaines de catégories suivi d'un np.isin vectorisé. Les paires
+    (voiture, option) de car_option servent au filtre par options.
+    L'instantané correspond à une génération des données (voir
+    CarDatabase.get_data_version).
+    """
+    NUMERIC_COLUMNS = ('price', 'mileage', 'year')
+
+    def __init__(self, generation: int, columns: dict, categories: dict, options: dict,
+                 car_options: tuple):
+        self.generation = generation
+        self.columns = columns
+        # Pour chaque champ catégoriel : (valeurs affichées, valeurs normalisées)
+        self.categories = categories
+        # Identifiants des options par nom normalisé et paires (ids des voitures, ids des options)
+        self.options = options
+        self.car_options = car_options
+        self.size = len(columns['price'])
+
+    @classmethod
+    def load(cls, database: CarDatabase, generation: int = None) -> 'CarSnapshot':
+        """Lit la table Car en une requête et construit les colonnes"""
+        if not NUMPY_AVAILABLE:
+            raise ImportError("Les statistiques détaillées nécessitent le paquet numpy (pip install numpy)")
+
+        if generation is None:
+            generation = database.get_data_version()[0]
+        with database.connection() as conn:
+            rows = conn.execute("SELECT id, price, mileage, year, make, model, fuel FROM Car").fetchall()
+            option_rows = conn.execute("SELECT id, name_norm FROM option").fetchall()
+            pairs = conn.execute("SELECT car_id, option_id FROM car_option").fetchall()
+
+        car_id, price, mileage, year, make, model, fuel = zip(*rows) if rows else ((),) * 7
+        pair_car_ids, pair_option_ids = zip(*pairs) if pairs else ((), ())
+        columns = {
+            'id': np.array(car_id, dtype=np.int64),
+            'price': np.array(price, dtype=np.int64),
+            'mileage': np.array(mileage, dtype=np.int64),
+            'year': np.array(year, dtype=np.int64),
+        }
+        categories = {}
+        for field, values in (('make', make), ('model', model), ('fuel', fuel)):
+            labels, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+            columns[f'{field}_code'] = codes.astype(np.int32)
+            categories[field] = (list(labels), [normalize_text(label) for label in labels])
+        options = {}
+        for option_id, name_norm in option_rows:
+            options.setdefault(name_norm, []).append(option_id)
+        car_options = (np.array(pair_car_ids, dtype=np.int64), np.array(pair_option_ids, dtype=np.int64))
+        return cls(generation, columns, categories, options, car_options)
+
+    def filter_mask(self, filters: dict):
+        """
+        Masque booléen des voitures correspondant aux filtres, avec les mêmes
+        règles que CarDatabase.build_where_clause (sous-chaîne, préfixe ou nom
+        exact normalisé selon filters['match'] pour marque, modèle et carburant,
+        bornes strictes pour prix et année, toutes les options demandées)
+        """
+        mask = np.ones(self.size, dtype=bool)
+        match = filters.get('match') or 'contains'
+        matches = {
+            'contains': lambda value, text: text in value,
+            'prefix': str.startswith,
+            'exact': str.__eq__,
+        }[match]
+        for field in TEXT_FIELDS:
+            text = normalize_text(filters.get(field) or '')
+            if text:
+                _, normalized = self.categories[field]
+                matching = [code for code, value in enumerate(normalized) if matches(value, text)]
+                mask &= np.isin(self.columns[f'{field}_code'], matching)
+
+        bounds = (('price_lt', 'price', np.less), ('price_gt', 'price', np.greater),
+                  ('year_lt', 'year', np.less), ('year_gt', 'year', np.greater))
+        for key, column, compare in bounds:
+            if filters.get(key) is not None:
+                mask &= compare(self.columns[column], filters[key])
+
+        if filters.get('options'):
+            pair_car_ids, pair_option_ids = self.car_options
+            for name in filters['options']:
+                option_ids = self.options.get(normalize_text(name), [])
+                car_ids = pair_car_ids[np.isin(pair_option_ids, option_ids)]
+                mask &= np.isin(self.columns['id'], car_ids)
+        return mask
+
+    def distribution(self, filters: dict, bins: int = 20) -> dict:
+        """
+        Histogrammes, centiles, minimum, maximum et moyenne du prix, du
+        kilométrage et de l'année des voitures filtrées
+        Les années ont une classe par année
+        """
+        mask = self.filter_mask(filters)
+        result = {'total_cars': int(mask.sum())}
+        for column in self.NUMERIC_COLUMNS:
+            values = self.columns[column][mask]
+            if not values.size:
+                result[column] = None
+                continue
+
+            if column == 'year':
+                edges = np.arange(values.min(), values.max() + 2)
+            else:
+                edges = bins
+            counts, edges = np.histogram(values, bins=edges)
+            percentiles = np.percentile(values, PERCENTILES)
+            result[column] = {
+                'min': int(values.min()),
+                'max': int(values.max()),
+                'mean': round(float(values.mean()), 2),
+                'percentiles': {f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, percentiles)},
+                'histogram': {
+                    'edges': [round(float(edge), 2) for edge in edges],
+                    'counts': counts.tolist()
+                }
+            }
+        return result
+
+    def by_make(self, filters: dict) -> list[dict]:
+        """
+        Agrégats par marque des voitures filtrées : nombre, prix et kilométrage
+        moyens, prix médian et prix au kilomètre (somme des prix sur somme des
+        kilométrages, voitures neuves à 0 km exclues), par nombre décroissant
+        """
+        mask = self.filter_mask(filters)
+        codes = self.columns['make_code'][mask]
+        price = self.columns['price'][mask]
+        mileage = self.columns['mileage'][mask]
+        labels, _ = self.categories['make']
+        length = len(labels)
+
+        counts = np.bincount(codes, minlength=length)
+        price_sums = np.bincount(codes, weights=price, minlength=length)
+        mileage_sums = np.bincount(codes, weights=mileage, minlength=length)
+        driven = mileage > 0
+        driven_price_sums = np.bincount(codes[driven], weights=price[driven], minlength=length)
+        driven_mileage_sums = np.bincount(codes[driven], weights=mileage[driven], minlength=length)
+
+        # Prix médian : tri par (marque, prix) puis découpage par marque
+        order = np.lexsort((price, codes))
+        sorted_prices = price[order]
+        boundaries = np.cumsum(counts)[:-1]
+        medians = [float(np.median(group)) if group.size else None
+                   for group in np.split(sorted_prices, boundaries)]
+
+        makes = []
+        for code in np.flatnonzero(counts):
+            makes.append({
+                'make': labels[code],
+                'count': int(counts[code]),
+                'average_price': round(price_sums[code] / counts[code], 2),
+                'median_price': medians[code],
+                'average_mileage': round(mileage_sums[code] / counts[code], 2),
+                'price_per_km': round(driven_price_sums[code] / driven_mileage_sums[code], 4)
+                if driven_mileage_sums[code] else None
+            })
+        makes.sort(key=lambda item: (-item['count'], item['make']))
+        return makes
+
+
+class SnapshotManager:
+    """
+    Fournit l'instantané de la génération courante, reconstruit seulement
+    quand les données ont changé (un seul rechargement à la fois)
+    """
+    def __init__(self, database: CarDatabase):
+        self.database = database
+        self.snapshot = None
+        self.rebuilds = 0
+        self._lock = threading.Lock()
+
+    def get(self) -> CarSnapshot:
+        generation = self.database.get_data_version()[0]
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+        with self._lock:
+            if self.snapshot is None or self.snapshot.generation != generation:
+                self.snapshot = CarSnapshot.load(self.database, generation)
+                self.rebuilds += 1
+            return self.snapshot
@@ -2,175 +2,479 @@
 API REST pour le car scrapper
 """
 
-from flask import Flask, request, jsonify
-from .database import CarDatabase
+import csv
+import hashlib
+import io
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import Flask, Response, g, request, jsonify
+from .analytics import NUMPY_AVAILABLE, SnapshotManager
+from .cache import ResponseCache
+from .database import TEXT_MATCH_MODES, CarDatabase
+from .metrics import METRICS, REQUEST_METRIC, REQUESTS_METRIC
 from .models import Car
+from .serialization import car_json_row, dumps
 import json
 
 
 class CarAPI:
     """
     API REST pour les voitures
+    
+    Les réponses des routes de lecture sont mises en cache (voir ResponseCache)
+    et portent un ETag dérivé de la génération des données : une requête avec
+    If-None-Match reçoit un 304 sans interroger les voitures tant qu'aucun
+    scraping n'a modifié la base. `cache_size=0` désactive le cache.
+    Avec `metrics=True`, la durée de chaque requête est mesurée par route et
+    les métriques (API et requêtes SQL) sont exposées sur /metrics. Les
+    mesures sont enregistrées dans le registre du processus, qui reste à
+    activer explicitement (METRICS.enable(), fait par server.py --metrics) :
+    créer une API ne change pas l'instrumentation du reste du processus.
     """
-    def __init__(self, db_path: str = "cars.db"):
+    def __init__(self, db_path: str = "cars.db", cache_size: int = 1024,
+                 cache_max_bytes: int = 32 * 1024 * 1024, cache_ttl: float = 300.0, pool_size: int = 8,
+                 metrics: bool = False):
         self.app = Flask(__name__)
-        self.database = CarDatabase(db_path)
+        self.database = CarDatabase(db_path, pool_size=pool_size)
+        self.cache = ResponseCache(cache_size, cache_max_bytes, cache_ttl) if cache_size else None
+        # Instantané NumPy des voitures pour /api/stats/* (rechargé quand les données changent)
+        self.snapshots = SnapshotManager(self.database)
         self.setup_routes()
+        if metrics:
+            self.setup_metrics()
+    
+    @staticmethod
+    def cache_key() -> tuple:
+        """
+        Clé de cache de la requête courante : chemin et paramètres non vides,
+        triés (l'ordre des paramètres dans l'URL ne compte pas)
+        """
+        params = sorted(
+            (name, value.strip()) for name, value in request.args.items(multi=True) if value.strip()
+        )
+        return (request.path, tuple(params))
+    
+    def cached(self, view):
+        """
+        Décorateur des routes de lecture : sert la réponse depuis le cache si la
+        génération des données n'a pas changé et répond 304 si le client a déjà
+        la version courante (If-None-Match)
+        Seules les réponses 200 sont mises en cache
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if self.cache is None:
+                return view(*args, **kwargs)
+            
+            generation, changed_at = self.database.get_data_version()
+            key = self.cache_key()
+            etag = hashlib.sha1(f"{generation}:{key}".encode('utf-8')).hexdigest()[:20]
+            last_modified = datetime.strptime(changed_at, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+            
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                cached = self.cache.get(key, generation)
+                if cached is not None:
+                    body, mimetype = cached
+                    response = Response(body, mimetype=mimetype)
+                else:
+                    response = self.app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    self.cache.put(key, generation, response.get_data(), response.mimetype)
+            
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            # Le client doit revalider à chaque fois (réponse 304 si inchangée)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        return wrapper
+    
+    @staticmethod
+    def parse_filters() -> dict:
+        """Lit les paramètres de filtrage de la requête courante"""
+        make = request.args.get('make', '').strip()
+        model = request.args.get('model', '').strip()
+        fuel = request.args.get('fuel', '').strip()
+        match = request.args.get('match', 'contains')
+        if match not in TEXT_MATCH_MODES:
+            raise ValueError(f"Le paramètre match doit valoir {', '.join(repr(mode) for mode in TEXT_MATCH_MODES)}")
+        return {
+            'make': make if make else None,
+            'model': model if model else None,
+            'fuel': fuel if fuel else None,
+            'match': match,
+            'price_lt': request.args.get('price_lt', type=int),
+            'price_gt': request.args.get('price_gt', type=int),
+            'year_lt': request.args.get('year_lt', type=int),
+            'year_gt': request.args.get('year_gt', type=int),
+            # Paramètre répétable : option=Bluetooth&option=Toit ouvrant
+            'options': [option.strip() for option in request.args.getlist('option') if option.strip()]
+        }
+    
+    @staticmethod
+    def parse_since(value: str, default_days: int = 7) -> str:
+        """
+        Convertit le paramètre since (date ou date et heure ISO 8601, UTC par
+        défaut) au format des dates SQLite ; `default_days` jours en arrière s'il est absent
+        """
+        if not value:
+            since = datetime.now(timezone.utc) - timedelta(days=default_days)
+        else:
+            try:
+                since = datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"Date invalide pour since: {value} (attendu: AAAA-MM-JJ ou AAAA-MM-JJTHH:MM:SS)")
+            if since.tzinfo is not None:
+                since = since.astimezone(timezone.utc)
+        return since.strftime('%Y-%m-%d %H:%M:%S')
+    
+    @staticmethod
+    def car_to_dict(car: Car) -> dict:
+        """Convertit une voiture en dictionnaire pour JSON"""
+        return {
+            'id': car.id,
+            'make': car.make,
+            'model': car.model,
+            'year': car.year,
+            'price': car.price,
+            'mileage': car.mileage,
+            'fuel': car.fuel,
+            'location': car.location,
+            'options': car.options,
+            'detail_url': car.detail_url
+        }
+    
+    # Colonnes de l'export CSV (les options sont séparées par des points-virgules)
+    EXPORT_COLUMNS = ['id', 'make', 'model', 'year', 'price', 'mileage', 'fuel', 'location', 'options', 'detail_url']
+    
+    # Nombre de voitures envoyées par morceau de réponse
+    EXPORT_CHUNK_SIZE = 500
+    
+    def export_chunks(self, cars, export_format: str):
+        """
+        Génère le corps de l'export morceau par morceau (NDJSON : un objet JSON
+        par ligne, `cars` fournit les lignes déjà encodées ; CSV : ligne
+        d'en-tête puis une ligne par voiture, `cars` fournit des objets Car)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == 'csv':
+            writer.writerow(self.EXPORT_COLUMNS)
+        
+        for count, car in enumerate(cars, 1):
+            if export_format == 'csv':
+                car_data = self.car_to_dict(car)
+                car_data['options'] = '; '.join(car_data['options'])
+                writer.writerow([car_data[column] for column in self.EXPORT_COLUMNS])
+            else:
+                # Ligne déjà encodée en JSON par car_json_row
+                buffer.write(car.decode('utf-8'))
+                buffer.write('\n')
+            
+            if count % self.EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
     
     def setup_routes(self):
         """Configure les routes de l'API"""
         
         @self.app.route('/api/cars', methods=['GET'])
+        @self.cached
         def get_cars():
             """Récupère les voitures avec filtres, pagination et tri"""
             try:
                 # Paramètres de pagination
-                page = request.args.get('page', 1, type=int)
-                per_page = min(request.args.get('per_page', 20, type=int), 50)
+                page = max(1, request.args.get('page', 1, type=int))
+                per_page = max(1, min(request.args.get('per_page', 20, type=int), 50))
+                cursor = request.args.get('cursor', '').strip() or None
+                count_mode = request.args.get('count', 'exact')
+                if count_mode not in ('exact', 'estimate', 'none'):
+                    count_mode = 'exact'
                 
                 # Paramètres de recherche
-                make = request.args.get('make', '').strip()
-                model = request.args.get('model', '').strip()
-                fuel = request.args.get('fuel', '').strip()
-                price_lt = request.args.get('price_lt', type=int)
-                price_gt = request.args.get('price_gt', type=int)
-                year_lt = request.args.get('year_lt', type=int)
-                year_gt = request.args.get('year_gt', type=int)
+                filters = self.parse_filters()
                 
                 # Paramètres de tri
                 sort_by = request.args.get('sort_by', 'id')
                 sort_order = request.args.get('sort_order', 'asc')
                 
-                # Préparer les filtres
-                filters = {
-                    'make': make if make else None,
-                    'model': model if model else None,
-                    'fuel': fuel if fuel else None,
-                    'price_lt': price_lt,
-                    'price_gt': price_gt,
-                    'year_lt': year_lt,
-                    'year_gt': year_gt
-                }
-                
-                # Récupérer les voitures avec filtres, tri et pagination directement en SQL
-                cars, total_count = self.database.get_cars_with_filters(
+                # Récupérer les voitures avec filtres, tri et pagination directement en SQL,
+                # chaque ligne étant directement encodée en JSON (sans objet Car)
+                cars_json, total_count = self.database.get_cars_with_filters(
                     filters=filters,
                     sort_by=sort_by,
                     sort_order=sort_order,
                     page=page,
-                    per_page=per_page
+                    per_page=per_page,
+                    cursor=cursor,
+                    count_mode=count_mode,
+                    row_factory=car_json_row
                 )
                 
-                # Convertir en dictionnaires pour JSON
-                cars_data = []
-                for car in cars:
-                    cars_data.append({
-                        'id': getattr(car, 'id', None),
-                        'make': car.make,
-                        'model': car.model,
-                        'year': car.year,
-                        'price': car.price,
-                        'mileage': car.mileage,
-                        'fuel': car.fuel,
-                        'location': car.location,
-                        'options': car.options,
-                        'detail_url': car.detail_url
-                    })
+                # Curseur de la page suivante (absent si la page est incomplète)
+                next_cursor = None
+                if len(cars_json) == per_page:
+                    next_cursor = self.database.make_cursor(json.loads(cars_json[-1]), sort_by, sort_order)
                 
-                return jsonify({
-                    'cars': cars_data,
+                # Les voitures déjà encodées sont insérées telles quelles dans la réponse
+                envelope = dumps({
                     'pagination': {
                         'page': page,
                         'per_page': per_page,
                         'total_count': total_count,
-                        'total_pages': (total_count + per_page - 1) // per_page
+                        'total_pages': (total_count + per_page - 1) // per_page if total_count is not None else None,
+                        'count_mode': count_mode,
+                        # Estimation au-delà de ESTIMATE_CAP : total inconnu (total_count à None)
+                        'count_capped': count_mode == 'estimate' and total_count is None,
+                        'next_cursor': next_cursor
                     },
                     'filters': {
-                        'make': make,
-                        'model': model,
-                        'fuel': fuel,
-                        'price_lt': price_lt,
-                        'price_gt': price_gt,
-                        'year_lt': year_lt,
-                        'year_gt': year_gt
+                        key: (value if value is not None or key.endswith(('_lt', '_gt')) else '')
+                        for key, value in filters.items()
                     },
                     'sorting': {
                         'sort_by': sort_by,
                         'sort_order': sort_order
                     }
                 })
+                body = b'{"cars":[' + b','.join(cars_json) + b'],' + envelope[1:]
+                return Response(body, mimetype='application/json')
+                
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        @self.app.route('/api/cars/export', methods=['GET'])
+        def export_cars():
+            """Exporte toutes les voitures filtrées en NDJSON ou CSV, en flux continu"""
+            try:
+                export_format = request.args.get('format', 'ndjson')
+                if export_format not in ('ndjson', 'csv'):
+                    return jsonify({'error': "Le paramètre format doit valoir 'ndjson' ou 'csv'"}), 400
+                
+                # Les paramètres sont lus avant le début du flux
+                cars = self.database.iter_cars(
+                    filters=self.parse_filters(),
+                    sort_by=request.args.get('sort_by', 'id'),
+                    sort_order=request.args.get('sort_order', 'asc'),
+                    batch_size=self.EXPORT_CHUNK_SIZE,
+                    row_factory=car_json_row if export_format == 'ndjson' else None
+                )
+                mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+                return Response(
+                    self.export_chunks(cars, export_format),
+                    mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=cars.{export_format}'}
+                )
                 
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
         @self.app.route('/api/cars/<int:car_id>', methods=['GET'])
+        @self.cached
         def get_car(car_id):
             """Récupère une voiture spécifique par ID"""
             try:
                 car = self.database.get_car_by_id(car_id)
                 if car:
-                    return jsonify({
-                        'id': getattr(car, 'id', None),
-                        'make': car.make,
-                        'model': car.model,
-                        'year': car.year,
-                        'price': car.price,
-                        'mileage': car.mileage,
-                        'fuel': car.fuel,
-                        'location': car.location,
-                        'options': car.options,
-                        'detail_url': car.detail_url
-                    })
+                    return jsonify(self.car_to_dict(car))
                 else:
                     return jsonify({'error': 'Voiture non trouvée'}), 404
                     
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
-        @self.app.route('/api/stats', methods=['GET'])
-        def get_stats():
-            """Récupère les statistiques de la base de données"""
+        @self.app.route('/api/cars/<int:car_id>/history', methods=['GET'])
+        @self.cached
+        def get_car_history(car_id):
+            """Récupère l'historique des prix et kilométrages d'une voiture"""
             try:
-                all_cars = self.database.get_all_cars()
-                
-                # Statistiques par marque
-                makes = {}
-                fuels = {'Essence': 0, 'Électrique': 0}
-                total_price = 0
-                total_mileage = 0
-                years = []
-                
-                for car in all_cars:
-                    # Comptage par marque
-                    makes[car.make] = makes.get(car.make, 0) + 1
-                    
-                    # Comptage par carburant
-                    fuels[car.fuel] = fuels.get(car.fuel, 0) + 1
-                    
-                    # Calculs pour moyennes
-                    total_price += car.price
-                    total_mileage += car.mileage
-                    years.append(car.year)
+                if not self.database.get_car_by_id(car_id):
+                    return jsonify({'error': 'Voiture non trouvée'}), 404
                 
-                avg_price = total_price / len(all_cars) if all_cars else 0
-                avg_mileage = total_mileage / len(all_cars) if all_cars else 0
-                avg_year = sum(years) / len(years) if years else 0
+                return jsonify({
+                    'car_id': car_id,
+                    'observations': self.database.get_car_history(car_id)
+                })
+                
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        @self.app.route('/api/cars/<int:car_id>/details', methods=['GET'])
+        @self.cached
+        def get_car_details(car_id):
+            """Récupère les détails lus sur la page d'une voiture (VIN, transmission, caractéristiques)"""
+            try:
+                if not self.database.get_car_by_id(car_id):
+                    return jsonify({'error': 'Voiture non trouvée'}), 404
+                
+                details = self.database.get_car_details(car_id)
+                if details is None:
+                    return jsonify({'error': 'Page de détail pas encore récupérée'}), 404
+                return jsonify(details)
+                
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        @self.app.route('/api/price-drops', methods=['GET'])
+        def get_price_drops():
+            """Récupère les baisses de prix observées depuis une date (7 derniers jours par défaut)"""
+            try:
+                since = self.parse_since(request.args.get('since', '').strip())
+                page = max(1, request.args.get('page', 1, type=int))
+                per_page = max(1, min(request.args.get('per_page', 20, type=int), 50))
+                
+                drops, total_count = self.database.get_price_drops(since, page=page, per_page=per_page)
                 
                 return jsonify({
-                    'total_cars': len(all_cars),
-                    'makes': makes,
-                    'fuels': fuels,
-                    'averages': {
-                        'price': round(avg_price, 2),
-                        'mileage': round(avg_mileage, 2),
-                        'year': round(avg_year, 1)
+                    'since': since,
+                    'price_drops': [
+                        {
+                            'observed_at': drop['observed_at'],
+                            'old_price': drop['old_price'],
+                            'new_price': drop['new_price'],
+                            'price_delta': drop['price_delta'],
+                            'car': self.car_to_dict(drop['car'])
+                        }
+                        for drop in drops
+                    ],
+                    'pagination': {
+                        'page': page,
+                        'per_page': per_page,
+                        'total_count': total_count,
+                        'total_pages': (total_count + per_page - 1) // per_page
                     }
                 })
                 
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        @self.app.route('/api/search', methods=['GET'])
+        @self.cached
+        def search_cars():
+            """Recherche plein texte classée par pertinence, avec les filtres de /api/cars"""
+            try:
+                query = request.args.get('q', '').strip()
+                if not query:
+                    return jsonify({'error': 'Le paramètre q est requis'}), 400
+                
+                page = max(1, request.args.get('page', 1, type=int))
+                per_page = max(1, min(request.args.get('per_page', 20, type=int), 50))
+                filters = self.parse_filters()
+                
+                cars, total_count = self.database.search_cars(
+                    query,
+                    filters=filters,
+                    page=page,
+                    per_page=per_page
+                )
+                
+                return jsonify({
+                    'query': query,
+                    'cars': [self.car_to_dict(car) for car in cars],
+                    'pagination': {
+                        'page': page,
+                        'per_page': per_page,
+                        'total_count': total_count,
+                        'total_pages': (total_count + per_page - 1) // per_page
+                    }
+                })
+                
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        @self.app.route('/api/stats', methods=['GET'])
+        @self.cached
+        def get_stats():
+            """Récupère les statistiques de la base de données"""
+            try:
+                return jsonify(self.database.get_stats())
+                
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        @self.app.route('/api/options', methods=['GET'])
+        @self.cached
+        def get_options():
+            """Récupère les options et leur nombre de voitures"""
+            try:
+                return jsonify({'options': self.database.get_option_counts()})
+                
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        @self.app.route('/api/stats/distribution', methods=['GET'])
+        @self.cached
+        def get_distribution():
+            """Histogrammes et centiles du prix, du kilométrage et de l'année, avec les filtres de /api/cars"""
+            try:
+                if not NUMPY_AVAILABLE:
+                    return jsonify({'error': 'Statistiques indisponibles : le paquet numpy est requis'}), 501
+                
+                bins = min(max(request.args.get('bins', 20, type=int), 1), 200)
+                filters = self.parse_filters()
+                distribution = self.snapshots.get().distribution(filters, bins=bins)
+                distribution['bins'] = bins
+                return jsonify(distribution)
+                
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        @self.app.route('/api/stats/by-make', methods=['GET'])
+        @self.cached
+        def get_stats_by_make():
+            """Agrégats par marque (nombre, prix moyen et médian, prix au km), avec les filtres de /api/cars"""
+            try:
+                if not NUMPY_AVAILABLE:
+                    return jsonify({'error': 'Statistiques indisponibles : le paquet numpy est requis'}), 501
+                
+                filters = self.parse_filters()
+                return jsonify({'makes': self.snapshots.get().by_make(filters)})
+                
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
     
-
+    def setup_metrics(self):
+        """
+        Mesure chaque requête (durée jusqu'à la réponse, par route et méthode ;
+        pour l'export en flux, jusqu'au début de l'envoi) et ajoute la route /metrics
+        """
+        @self.app.before_request
+        def start_timer():
+            g.metrics_start = time.perf_counter()
+        
+        @self.app.after_request
+        def record_request(response):
+            start = g.pop('metrics_start', None)
+            if start is not None:
+                route = request.url_rule.rule if request.url_rule is not None else 'non trouvée'
+                METRICS.observe(REQUEST_METRIC, time.perf_counter() - start, route=route, method=request.method)
+                METRICS.inc(REQUESTS_METRIC, route=route, method=request.method, status=str(response.status_code))
+            return response
+        
+        @self.app.route('/metrics', methods=['GET'])
+        def get_metrics():
+            """Métriques au format texte de Prometheus"""
+            return Response(METRICS.render_prometheus(), mimetype='text/plain; version=0.0.4')
     
     def run(self, host: str = '0.0.0.0', port: int = 5000, debug: bool = False):
         """Lance le serveur Flask"""
@@ -0,0 +1,152 @@
+"""
+Variante ASGI de l'API REST pour servir de nombreux clients simultanés
+"""
+
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from .api import CarAPI
+
+
+class AsyncCarAPI:
+    """
+    Application ASGI exposant les mêmes routes que CarAPI
+
+    Les connexions HTTP sont gérées par la boucle asyncio du serveur ASGI
+    (uvicorn) ; chaque requête est traitée par les routes de CarAPI (mêmes
+    requêtes CarDatabase, même cache, mêmes ETag) dans un pool borné de
+    `workers` threads. Le pool de connexions SQLite a la même taille : chaque
+    thread réutilise une connexion de lecture déjà ouverte. Au-delà de
+    `workers` requêtes en cours, les suivantes attendent sans bloquer la boucle.
+    Les réponses en flux (export) sont envoyées morceau par morceau.
+    """
+    def __init__(self, db_path: str = "cars.db", workers: int = 8, **api_options):
+        self.api = CarAPI(db_path, pool_size=workers, **api_options)
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="car-api")
+        self._slots = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._handle_http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        """Démarrage et arrêt du serveur : libère les threads et les connexions à l'arrêt"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                self.api.database.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def build_environ(scope, body: bytes) -> dict:
+        """Construit l'environnement WSGI de la requête ASGI"""
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+        return environ
+
+    def _start_response(self, environ: dict):
+        """
+        Exécute la route (dans un thread du pool) jusqu'au premier morceau
+        Une réponse de taille connue est lue entièrement ; une réponse en flux
+        est retournée avec son itérateur pour la suite
+        Retourne (statut, en-têtes, morceaux, itérateur ou None)
+        """
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = headers
+
+        iterable = self.api.app.wsgi_app(environ, start_response)
+        iterator = iter(iterable)
+        chunks = [chunk for chunk in [next(iterator, b'')] if chunk]
+        headers = response['headers']
+        if any(name.lower() == 'content-length' for name, _ in headers):
+            chunks.extend(chunk for chunk in iterator if chunk)
+            self._close(iterable)
+            return response['status'], headers, chunks, None
+        return response['status'], headers, chunks, (iterable, iterator)
+
+    @staticmethod
+    def _close(iterable):
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+    async def _handle_http(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        environ = self.build_environ(scope, body)
+
+        async with self._slots:
+            status, headers, chunks, stream = await loop.run_in_executor(
+                self.executor, self._start_response, environ
+            )
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            })
+            if stream is None:
+                await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+                return
+
+            iterable, iterator = stream
+            try:
+                for chunk in chunks:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                while True:
+                    chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                    if chunk is None:
+                        break
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                await send({'type': 'http.response.body', 'body': b''})
+            finally:
+                # Libère la connexion SQLite d'un export interrompu
+                await loop.run_in_executor(self.executor, self._close, iterable)
+
+    def run(self, host: str = '0.0.0.0', port: int = 5000):
+        """Lance l'application sous uvicorn"""
+        try:
+            import uvicorn
+        except ImportError:
+            raise ImportError("Le moteur ASGI nécessite le paquet uvicorn (pip install uvicorn)")
+        uvicorn.run(self, host=host, port=port, log_level="warning")
@@ -0,0 +1,110 @@
+"""
+Navigateur permanent partagé par les scrapings successifs
+
+Chromium est lancé une fois, en arrière-plan, avec un port de débogage
+(CDP) et un profil persistant ; chaque scraping s'y connecte
+(AlbiNavigator(cdp_endpoint=...)) au lieu de lancer son propre navigateur.
+L'adresse et le PID du navigateur sont enregistrés dans un fichier d'état.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import time
+import httpx
+from playwright.sync_api import sync_playwright
+
+
+DEFAULT_STATE_FILE = ".browser_daemon.json"
+DEFAULT_PROFILE_DIR = ".browser_profile"
+DEFAULT_PORT = 9222
+
+
+def chromium_executable() -> str:
+    """Chemin du Chromium installé par Playwright (playwright install chromium)"""
+    playwright = sync_playwright().start()
+    try:
+        return playwright.chromium.executable_path
+    finally:
+        playwright.stop()
+
+
+def endpoint_alive(endpoint: str, timeout: float = 1.0) -> bool:
+    """Indique si un navigateur répond sur l'adresse CDP `endpoint`"""
+    try:
+        return httpx.get(f"{endpoint}/json/version", timeout=timeout).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+def read_state(state_file: str = DEFAULT_STATE_FILE) -> dict:
+    """État du navigateur permanent (pid, endpoint, user_data_dir), None s'il ne répond pas"""
+    try:
+        with open(state_file, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if endpoint_alive(state['endpoint']) else None
+
+
+def daemon_endpoint(state_file: str = DEFAULT_STATE_FILE) -> str:
+    """Adresse CDP du navigateur permanent, None s'il n'est pas lancé"""
+    state = read_state(state_file)
+    return state['endpoint'] if state else None
+
+
+def start_daemon(user_data_dir: str = DEFAULT_PROFILE_DIR, port: int = DEFAULT_PORT, headless: bool = True,
+                 state_file: str = DEFAULT_STATE_FILE, timeout: float = 15.0) -> str:
+    """
+    Lance le navigateur permanent (s'il ne l'est pas déjà) et retourne son
+    adresse CDP
+    """
+    state = read_state(state_file)
+    if state:
+        print(f"Navigateur permanent déjà lancé (PID {state['pid']}, {state['endpoint']})")
+        return state['endpoint']
+
+    user_data_dir = os.path.abspath(user_data_dir)
+    command = [
+        chromium_executable(),
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={user_data_dir}",
+        "--no-first-run",
+        "--no-default-browser-check",
+    ]
+    if headless:
+        command.append("--headless=new")
+    command.append("about:blank")
+    # Nouvelle session : un Ctrl-C dans le terminal n'arrête pas le navigateur
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+
+    endpoint = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while not endpoint_alive(endpoint):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError(f"Le navigateur permanent ne répond pas sur {endpoint}")
+        time.sleep(0.1)
+
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump({'pid': process.pid, 'endpoint': endpoint, 'user_data_dir': user_data_dir}, f)
+    print(f"Navigateur permanent lancé (PID {process.pid}, {endpoint}, profil {user_data_dir})")
+    return endpoint
+
+
+def stop_daemon(state_file: str = DEFAULT_STATE_FILE) -> bool:
+    """Arrête le navigateur permanent ; retourne False s'il n'était pas lancé"""
+    state = read_state(state_file)
+    if os.path.exists(state_file):
+        os.remove(state_file)
+    if state is None:
+        print("Aucun navigateur permanent lancé")
+        return False
+    try:
+        os.kill(state['pid'], signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    print(f"Navigateur permanent arrêté (PID {state['pid']})")
+    return True
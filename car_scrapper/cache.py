@@ -0,0 +1,66 @@
+"""
+Cache des réponses de l'API REST
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    Cache LRU des corps de réponse, versionné par la génération des données
+
+    Une entrée n'est servie que si elle a été calculée pour la génération
+    courante (voir CarDatabase.get_data_version) et depuis moins de `ttl`
+    secondes. Les entrées les moins récemment utilisées sont évincées au-delà
+    de `max_entries` entrées ou de `max_bytes` octets de corps.
+    """
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, generation: int):
+        """Retourne (corps, type MIME) si l'entrée est à jour, sinon None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, body, mimetype, stored_at = entry
+                if entry_generation == generation and time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body, mimetype
+                # Entrée périmée : données modifiées depuis ou TTL dépassé
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, generation: int, body: bytes, mimetype: str):
+        """Enregistre un corps de réponse (ignoré s'il dépasse à lui seul la limite mémoire)"""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (generation, body, mimetype, time.monotonic())
+            self.size_bytes += len(body)
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple):
+        _, body, _, _ = self._entries.pop(key)
+        self.size_bytes -= len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
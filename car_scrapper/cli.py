@@ -3,7 +3,9 @@ Interface en ligne de commande pour car_scrapper
 """
 
 import argparse
-from . import AlbiScraper
+import time
+from . import METRICS, AlbiScraper, AlbiNavigator, AlbiHttpNavigator, AlbiPageExtractor
+from .browser_daemon import DEFAULT_PROFILE_DIR, daemon_endpoint, read_state, start_daemon, stop_daemon
 
 
 def main():
@@ -33,6 +35,138 @@ def main():
         help="Chemin vers la base de données (défaut: cars.db)"
     )
     
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Nombre de pages chargées en parallèle (défaut: 1, séquentiel)"
+    )
+    
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=1,
+        help="Nombre de navigateurs du pipeline séquentiel (défaut: 1)"
+    )
+    
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=200,
+        help="Nombre de voitures écrites par transaction dans le pipeline (défaut: 200)"
+    )
+    
+    parser.add_argument(
+        "--http",
+        action="store_true",
+        help="Récupérer les pages en HTTP sans navigateur (Playwright seulement en repli)"
+    )
+    
+    parser.add_argument(
+        "--headed",
+        action="store_true",
+        help="Afficher la fenêtre du navigateur (sans interface par défaut)"
+    )
+    
+    parser.add_argument(
+        "--user-data-dir",
+        type=str,
+        default=None,
+        help="Profil Chromium persistant (cache HTTP, cookies) réutilisé d'un scraping à l'autre"
+    )
+    
+    parser.add_argument(
+        "--browser-daemon",
+        choices=("start", "stop", "status"),
+        default=None,
+        help="Gérer le navigateur permanent auquel les scrapings suivants se connectent"
+    )
+    
+    parser.add_argument(
+        "--extractor",
+        choices=AlbiPageExtractor.BACKENDS,
+        default="html.parser",
+        help="Moteur d'extraction HTML (défaut: html.parser ; lxml est le plus rapide)"
+    )
+    
+    parser.add_argument(
+        "--snapshot-dir",
+        type=str,
+        default="snapshots",
+        help="Dossier des instantanés HTML des pages récupérées (défaut: snapshots)"
+    )
+    
+    parser.add_argument(
+        "--no-snapshots",
+        action="store_true",
+        help="Ne pas conserver les instantanés HTML"
+    )
+    
+    parser.add_argument(
+        "--reextract",
+        action="store_true",
+        help="Rejouer l'extraction sur les instantanés stockés, sans navigateur"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Nombre de processus d'extraction (pipeline et --reextract, défaut: nombre de CPU)"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Ne pas réécrire les pages inchangées depuis le dernier passage"
+    )
+    
+    parser.add_argument(
+        "--stop-after",
+        type=int,
+        default=2,
+        help="Avec --incremental, arrêter après K pages consécutives inchangées (défaut: 2, 0 pour désactiver)"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reprendre le dernier scraping interrompu (seulement les pages non terminées)"
+    )
+    
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help="Après le scraping, récupérer la page de détail des voitures nouvelles ou modifiées (VIN, transmission)"
+    )
+    
+    parser.add_argument(
+        "--enrich-only",
+        action="store_true",
+        help="Récupérer seulement les pages de détail en attente, sans scraper l'inventaire"
+    )
+    
+    parser.add_argument(
+        "--enrich-workers",
+        type=int,
+        default=4,
+        help="Nombre de récupérations de pages de détail en parallèle (défaut: 4)"
+    )
+    
+    parser.add_argument(
+        "--enrich-rate",
+        type=float,
+        default=2.0,
+        help="Requêtes par seconde au plus vers un même site pendant l'enrichissement (défaut: 2, 0 sans limite)"
+    )
+    
+    parser.add_argument(
+        "--metrics-report",
+        type=str,
+        default=None,
+        help="Mesurer les phases du scraping et les requêtes SQL, et écrire le rapport JSON dans ce fichier"
+    )
+    
     parser.add_argument(
         "--show-all",
         action="store_true",
@@ -40,16 +174,76 @@ def main():
     )
     
     args = parser.parse_args()
+    if args.resume and args.concurrency > 1:
+        parser.error("--resume s'applique au scraping séquentiel (sans --concurrency)")
+    if args.enrich and (args.browser_daemon or args.enrich_only or args.show_all):
+        parser.error("--enrich s'applique après un scraping ou --reextract (sinon --enrich-only)")
+    snapshot_dir = None if args.no_snapshots else args.snapshot_dir
+    
+    if args.metrics_report:
+        METRICS.enable()
     
-    if args.show_all:
-        # Afficher seulement les voitures de la base de données (sans initialiser le scraper)
-        AlbiScraper.display_cars_from_db(args.db_path)
-    else:
-        # Créer le scraper complet pour le scraping
-        scraper = AlbiScraper(db_path=args.db_path)
+    started = time.perf_counter()
+    try:
+        if args.browser_daemon:
+            # Lancer, arrêter ou interroger le navigateur permanent
+            if args.browser_daemon == "start":
+                start_daemon(user_data_dir=args.user_data_dir or DEFAULT_PROFILE_DIR, headless=not args.headed)
+            elif args.browser_daemon == "stop":
+                stop_daemon()
+            else:
+                state = read_state()
+                print(f"Navigateur permanent lancé (PID {state['pid']}, {state['endpoint']})" if state
+                      else "Aucun navigateur permanent lancé")
+        elif args.enrich_only:
+            # Récupérer les pages de détail en attente
+            AlbiScraper.enrich_details(args.db_path, workers=args.enrich_workers, rate=args.enrich_rate)
+        elif args.show_all:
+            # Afficher seulement les voitures de la base de données (sans initialiser le scraper)
+            AlbiScraper.display_cars_from_db(args.db_path)
+        elif args.reextract:
+            # Rejouer l'extraction sur les pages déjà récupérées
+            AlbiScraper.reextract_snapshots(args.db_path, args.snapshot_dir, args.workers,
+                                            extractor_backend=args.extractor)
+        elif args.concurrency > 1:
+            # Scraper les pages en parallèle avec un pool de contextes de navigateur
+            AlbiScraper.scrap_concurrently(args.db_path, args.start_page, args.pages, args.concurrency,
+                                           extractor_backend=args.extractor, snapshot_dir=snapshot_dir,
+                                           incremental=args.incremental, headless=not args.headed)
+        else:
+            # Navigateur lancé à la première page, ou connexion au navigateur permanent
+            browser_options = {'headless': not args.headed, 'user_data_dir': args.user_data_dir,
+                               'cdp_endpoint': daemon_endpoint()}
+            if browser_options['cdp_endpoint']:
+                print(f"Connexion au navigateur permanent {browser_options['cdp_endpoint']}")
+            if args.http:
+                navigator = AlbiHttpNavigator(browser_options=browser_options)
+            else:
+                navigator = AlbiNavigator(**browser_options)
+            scraper = AlbiScraper(db_path=args.db_path, navigator=navigator, extractor_backend=args.extractor,
+                                  snapshot_dir=snapshot_dir)
+            
+            try:
+                if args.resume:
+                    # Reprendre les pages non terminées du dernier scraping
+                    scraper.resume_last_run(fetch_workers=args.fetch_workers, parse_workers=args.workers,
+                                            batch_size=args.batch_size)
+                else:
+                    # Scraper les pages
+                    scraper.scrap_from_page(args.start_page, args.pages, incremental=args.incremental,
+                                            stop_after=args.stop_after, fetch_workers=args.fetch_workers,
+                                            parse_workers=args.workers, batch_size=args.batch_size)
+            finally:
+                navigator.close()
         
-        # Scraper les pages
-        scraper.scrap_from_page(args.start_page, args.pages)
+        if args.enrich:
+            # Pages de détail des voitures nouvelles ou modifiées par ce scraping
+            AlbiScraper.enrich_details(args.db_path, workers=args.enrich_workers, rate=args.enrich_rate)
+    finally:
+        if args.metrics_report:
+            METRICS.write_report(args.metrics_report, elapsed_s=round(time.perf_counter() - started, 3),
+                                 arguments=vars(args))
+            print(f"Rapport de métriques écrit dans {args.metrics_report}")
 
 
 if __name__ == "__main__":
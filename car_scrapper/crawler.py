@@ -0,0 +1,161 @@
+"""
+Crawler concurrent pour les pages d'inventaire
+"""
+
+import asyncio
+import time
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from .metrics import METRICS, PAGES_METRIC, PHASE_METRIC
+from .navigator import AlbiNavigator, parse_page_infos, should_block_request
+
+
+class AlbiConcurrentCrawler:
+    """
+    Crawler asynchrone pour Albi.ca
+
+    Un pool de `concurrency` contextes de navigateur (cookies et cache isolés)
+    récupère les pages d'inventaire en parallèle. Chaque HTML est transmis au
+    callback `on_page` dès son arrivée, dans un thread séparé pour ne pas
+    bloquer la boucle asyncio pendant l'extraction et l'écriture en base.
+    La disponibilité des pages et le blocage des ressources suivent les
+    mêmes règles que AlbiNavigator.
+    """
+    def __init__(self, concurrency: int = 4, base_url: str = AlbiNavigator.BASE_URL, headless: bool = True,
+                 ready_timeout: int = 15000, block_resources: bool = True):
+        self.concurrency = max(1, concurrency)
+        self.base_url = base_url
+        self.headless = headless
+        self.ready_timeout = ready_timeout
+        self.block_resources = block_resources
+        self.timings = []
+        self.blocked_requests = 0
+
+    def get_inventory_url(self, page_number: int):
+        return f"{self.base_url}/fr/inventaire/?page={page_number}"
+
+    async def _route_request(self, route):
+        """Bloque les ressources inutiles, laisse passer les autres"""
+        if should_block_request(route.request.resource_type, route.request.url):
+            self.blocked_requests += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_context(self, browser):
+        """Crée un contexte de navigateur avec le blocage des ressources"""
+        context = await browser.new_context()
+        if self.block_resources:
+            await context.route("**/*", self._route_request)
+        return context
+
+    async def _fetch_page(self, page, page_number: int) -> str:
+        """Charge une page d'inventaire et retourne son HTML dès qu'elle est prête"""
+        page_url = self.get_inventory_url(page_number)
+        start = time.perf_counter()
+        await page.goto(page_url, wait_until="domcontentloaded")
+        navigated = time.perf_counter()
+
+        deadline = navigated + self.ready_timeout / 1000
+        for selector in AlbiNavigator.READY_SELECTORS:
+            remaining_ms = max(1, (deadline - time.perf_counter()) * 1000)
+            try:
+                await page.wait_for_selector(selector, state="attached", timeout=remaining_ms)
+            except PlaywrightTimeoutError:
+                print(f"Page {page_number} incomplète après {self.ready_timeout} ms (sélecteur {selector} absent)")
+                break
+        ready = time.perf_counter()
+
+        self.timings.append({
+            'page_url': page_url,
+            'navigation_ms': round((navigated - start) * 1000, 1),
+            'ready_ms': round((ready - navigated) * 1000, 1),
+            'total_ms': round((ready - start) * 1000, 1),
+        })
+        METRICS.observe(PHASE_METRIC, ready - start, phase='go_to_page')
+        with METRICS.time(PHASE_METRIC, phase='get_html'):
+            return await page.content()
+
+    async def _worker(self, browser, pages_queue: asyncio.Queue, results_queue: asyncio.Queue):
+        """Récupère les pages de la file avec son propre contexte de navigateur"""
+        context = await self._new_context(browser)
+        page = await context.new_page()
+        try:
+            while True:
+                page_number = await pages_queue.get()
+                if page_number is None:
+                    break
+                try:
+                    html = await self._fetch_page(page, page_number)
+                except Exception as e:
+                    print(f"Erreur lors du chargement de la page {page_number}: {e}")
+                    METRICS.inc(PAGES_METRIC, result='fetch_error')
+                    html = None
+                await results_queue.put((page_number, html))
+        finally:
+            await context.close()
+
+    async def crawl(self, start_page_number: int, number_of_pages_to_scrap: int, on_page) -> int:
+        """
+        Récupère les pages [start, start + n) et appelle on_page(page_number, html)
+        pour chacune, dans l'ordre d'arrivée
+        Le nombre de pages est borné par la pagination lue sur la première page
+        Retourne le nombre de pages traitées
+        """
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=self.headless)
+            try:
+                # La première page donne le nombre total de pages
+                context = await self._new_context(browser)
+                first_html = await self._fetch_page(await context.new_page(), start_page_number)
+                await context.close()
+
+                total_pages = parse_page_infos(first_html).total_pages
+                if total_pages < start_page_number:
+                    print(f"Le numéro de page de départ ({start_page_number}) est supérieur au nombre total de pages ({total_pages})")
+                    return 0
+                if start_page_number + number_of_pages_to_scrap > total_pages:
+                    number_of_pages_to_scrap = total_pages - start_page_number + 1
+                    print(f"Le nombre de pages à scraper dépasse le nombre total de pages, {number_of_pages_to_scrap} pages seront scrapées")
+
+                await asyncio.to_thread(on_page, start_page_number, first_html)
+
+                # Répartir les pages restantes entre les contextes du pool
+                remaining = range(start_page_number + 1, start_page_number + number_of_pages_to_scrap)
+                pages_queue = asyncio.Queue()
+                for page_number in remaining:
+                    pages_queue.put_nowait(page_number)
+
+                workers_count = min(self.concurrency, len(remaining))
+                for _ in range(workers_count):
+                    pages_queue.put_nowait(None)
+
+                # File bornée : les contextes attendent si l'écriture prend du retard
+                results_queue = asyncio.Queue(maxsize=self.concurrency * 2)
+                workers = [
+                    asyncio.create_task(self._worker(browser, pages_queue, results_queue))
+                    for _ in range(workers_count)
+                ]
+
+                async def consume():
+                    for _ in remaining:
+                        page_number, html = await results_queue.get()
+                        if html is not None:
+                            await asyncio.to_thread(on_page, page_number, html)
+
+                # Un contexte qui échoue hors de _fetch_page (création du
+                # contexte ou de la page) interrompt le crawl au lieu de
+                # laisser la lecture des résultats attendre indéfiniment
+                tasks = [asyncio.create_task(consume()), *workers]
+                try:
+                    await asyncio.gather(*tasks)
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                return number_of_pages_to_scrap
+            finally:
+                await browser.close()
+
+    def run(self, start_page_number: int, number_of_pages_to_scrap: int, on_page) -> int:
+        """Version synchrone de crawl()"""
+        return asyncio.run(self.crawl(start_page_number, number_of_pages_to_scrap, on_page))
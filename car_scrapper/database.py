@@ -4,20 +4,155 @@ Gestionnaire de base de données pour les voitures
 
 import sqlite3
 import json
+import base64
+import queue
+import re
+import unicodedata
+from contextlib import contextmanager
+from .metrics import QUERY_METRIC, timed_method
 from .models import Car
 
 
+def normalize_text(value: str) -> str:
+    """
+    Normalise un texte pour la recherche : minuscules et sans accents
+    Exemple: "Électrique" -> "electrique"
+    """
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+# Champs des filtres textuels (colonnes <champ>_norm et dictionnaire car_text_value)
+TEXT_FIELDS = ('make', 'model', 'fuel')
+
+# Correspondance des filtres textuels :
+# - 'contains' (par défaut) : sous-chaîne, cherchée dans le dictionnaire car_text_value
+# - 'prefix' : début du nom, plage de l'index (<champ>_norm, ...)
+# - 'exact' : nom complet, l'index (<champ>_norm, prix ou année) fournit aussi le tri
+TEXT_MATCH_MODES = ('contains', 'prefix', 'exact')
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """
+    Borne supérieure exclusive des chaînes commençant par `prefix`
+    Permet d'écrire un filtre par préfixe sous forme de plage indexable
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def encode_cursor(sort_by: str, sort_order: str, value, car_id: int) -> str:
+    """
+    Encode un curseur de pagination opaque (champ de tri, ordre, valeur, id)
+    """
+    payload = json.dumps({'s': sort_by, 'o': sort_order.upper(), 'v': value, 'id': car_id})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> tuple:
+    """
+    Décode un curseur de pagination et vérifie qu'il correspond au tri demandé
+    Retourne (valeur, id) ; lève ValueError si le curseur est invalide
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        value, car_id = payload['v'], int(payload['id'])
+    except Exception:
+        raise ValueError("Curseur de pagination invalide")
+    if payload.get('s') != sort_by or payload.get('o') != sort_order.upper():
+        raise ValueError("Le curseur ne correspond pas au tri demandé")
+    return value, car_id
+
+
 class CarDatabase:
     """
     Gestionnaire de base de données pour les voitures
+    
+    Les connexions SQLite sont conservées dans un pool et réutilisées d'un appel
+    à l'autre : chaque méthode emprunte une connexion déjà ouverte (pragmas
+    appliqués, requêtes préparées en cache) au lieu d'en ouvrir une nouvelle.
+    Quand les métriques sont activées (voir metrics.METRICS), la durée de
+    chaque méthode exécutant du SQL est enregistrée avec son nom en étiquette.
     """
-    def __init__(self, db_path: str = "cars.db"):
+    # Pragmas appliqués à chaque nouvelle connexion
+    PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,       # 16 Mo de cache de pages
+        "mmap_size": 268435456,     # 256 Mo mappés en mémoire
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    }
+    
+    # Champs autorisés pour le tri
+    SORT_FIELDS = ['id', 'make', 'model', 'year', 'price', 'mileage', 'fuel', 'location']
+    
+    # Nombre maximal de lignes comptées en mode 'estimate'
+    ESTIMATE_CAP = 1000
+    
+    def __init__(self, db_path: str = "cars.db", pool_size: int = 8, cached_statements: int = 256):
         self.db_path = db_path
+        self.pool_size = pool_size
+        self.cached_statements = cached_statements
+        self._pool = queue.LifoQueue(maxsize=pool_size)
         self.init_database()
     
+    def _create_connection(self) -> sqlite3.Connection:
+        """Ouvre une nouvelle connexion configurée avec les pragmas"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        for name, value in self.PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        # normalize_text en SQL, pour les triggers qui tiennent option.name_norm
+        conn.create_function('normalize_text', 1, normalize_text, deterministic=True)
+        return conn
+    
+    def _acquire(self) -> sqlite3.Connection:
+        """Emprunte une connexion au pool (ou en crée une si le pool est vide)"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._create_connection()
+    
+    def _release(self, conn: sqlite3.Connection):
+        """Rend une connexion au pool (ou la ferme si le pool est plein)"""
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+    
+    @contextmanager
+    def connection(self):
+        """
+        Fournit une connexion du pool pour la durée d'une transaction
+        Commit en cas de succès, rollback en cas d'exception
+        """
+        conn = self._acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._release(conn)
+    
+    def close(self):
+        """Ferme toutes les connexions inactives du pool"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+    
+    @timed_method(QUERY_METRIC)
     def init_database(self):
         """Initialise la base de données et crée la table si elle n'existe pas"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS Car (
@@ -35,23 +170,578 @@ class CarDatabase:
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            
+            # Appliquer les migrations manquantes (version stockée dans PRAGMA user_version)
+            migrations = [
+                self._migrate_search_columns,
+                self._migrate_stats_table,
+                self._migrate_full_text_search,
+                self._migrate_page_snapshots,
+                self._migrate_fingerprints,
+                self._migrate_observations,
+                self._migrate_data_generation,
+                self._migrate_options,
+                self._migrate_crawl_runs,
+                self._migrate_car_details,
+                self._migrate_text_values,
+                self._migrate_listing_vin,
+            ]
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            for target_version, migration in enumerate(migrations, 1):
+                if version < target_version:
+                    migration(cursor)
+                    cursor.execute(f"PRAGMA user_version = {target_version}")
             conn.commit()
     
+    def _migrate_search_columns(self, cursor: sqlite3.Cursor):
+        """
+        Migration 1 : colonnes de recherche normalisées (minuscules, sans accents)
+        et index pour les filtres et les tris de get_cars_with_filters
+        """
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(Car)").fetchall()}
+        for column in ('make_norm', 'model_norm', 'fuel_norm'):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE Car ADD COLUMN {column} TEXT")
+        
+        # Remplir les colonnes normalisées des voitures existantes
+        rows = cursor.execute("SELECT id, make, model, fuel FROM Car WHERE make_norm IS NULL").fetchall()
+        cursor.executemany(
+            "UPDATE Car SET make_norm = ?, model_norm = ?, fuel_norm = ? WHERE id = ?",
+            [(normalize_text(make), normalize_text(model), normalize_text(fuel), car_id)
+             for car_id, make, model, fuel in rows]
+        )
+        
+        # Index de filtrage (colonne normalisée + champ de tri le plus courant)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_make_norm_price ON Car (make_norm, price)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_make_norm_year ON Car (make_norm, year)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_model_norm_price ON Car (model_norm, price)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_fuel_norm_price ON Car (fuel_norm, price)")
+        
+        # Index de tri et de plage (champs autorisés pour sort_by)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_price ON Car (price)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_year ON Car (year)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_mileage ON Car (mileage)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_make ON Car (make)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_model ON Car (model)")
+    
+    def _migrate_stats_table(self, cursor: sqlite3.Cursor):
+        """
+        Migration 2 : table car_stats d'agrégats par (marque, carburant),
+        tenue à jour par des triggers sur Car pour que /api/stats ne dépende
+        que du nombre de marques et non du nombre de voitures
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS car_stats (
+                make TEXT NOT NULL,
+                fuel TEXT NOT NULL,
+                car_count INTEGER NOT NULL,
+                price_sum INTEGER NOT NULL,
+                mileage_sum INTEGER NOT NULL,
+                year_sum INTEGER NOT NULL,
+                PRIMARY KEY (make, fuel)
+            )
+        ''')
+        
+        # Ajout d'une voiture dans son groupe
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_stats_insert AFTER INSERT ON Car
+            BEGIN
+                INSERT INTO car_stats (make, fuel, car_count, price_sum, mileage_sum, year_sum)
+                VALUES (NEW.make, NEW.fuel, 1, NEW.price, NEW.mileage, NEW.year)
+                ON CONFLICT(make, fuel) DO UPDATE
+                SET car_count = car_count + 1, price_sum = price_sum + NEW.price,
+                    mileage_sum = mileage_sum + NEW.mileage, year_sum = year_sum + NEW.year;
+            END
+        ''')
+        
+        # Retrait d'une voiture de son groupe
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_stats_delete AFTER DELETE ON Car
+            BEGIN
+                UPDATE car_stats
+                SET car_count = car_count - 1, price_sum = price_sum - OLD.price,
+                    mileage_sum = mileage_sum - OLD.mileage, year_sum = year_sum - OLD.year
+                WHERE make = OLD.make AND fuel = OLD.fuel;
+                DELETE FROM car_stats WHERE make = OLD.make AND fuel = OLD.fuel AND car_count <= 0;
+            END
+        ''')
+        
+        # Mise à jour : retrait de l'ancien groupe puis ajout au nouveau
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_stats_update
+            AFTER UPDATE OF make, fuel, price, mileage, year ON Car
+            BEGIN
+                UPDATE car_stats
+                SET car_count = car_count - 1, price_sum = price_sum - OLD.price,
+                    mileage_sum = mileage_sum - OLD.mileage, year_sum = year_sum - OLD.year
+                WHERE make = OLD.make AND fuel = OLD.fuel;
+                DELETE FROM car_stats WHERE make = OLD.make AND fuel = OLD.fuel AND car_count <= 0;
+                INSERT INTO car_stats (make, fuel, car_count, price_sum, mileage_sum, year_sum)
+                VALUES (NEW.make, NEW.fuel, 1, NEW.price, NEW.mileage, NEW.year)
+                ON CONFLICT(make, fuel) DO UPDATE
+                SET car_count = car_count + 1, price_sum = price_sum + NEW.price,
+                    mileage_sum = mileage_sum + NEW.mileage, year_sum = year_sum + NEW.year;
+            END
+        ''')
+        
+        self._rebuild_stats(cursor)
+    
+    def _migrate_full_text_search(self, cursor: sqlite3.Cursor):
+        """
+        Migration 3 : index plein texte FTS5 (marque, modèle, carburant,
+        localisation, options) synchronisé avec Car par des triggers
+        
+        La table FTS a pour contenu externe la vue car_search_source, qui
+        expose les options JSON sous forme de texte (accents décodés).
+        """
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS car_search_source AS
+            SELECT id, make, model, fuel, location,
+                   (SELECT group_concat(value, ' ') FROM json_each(Car.options)) AS options
+            FROM Car
+        ''')
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS car_fts USING fts5(
+                make, model, fuel, location, options,
+                content='car_search_source', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+        # Classement BM25 par défaut : marque et modèle pèsent plus que les options
+        cursor.execute("INSERT INTO car_fts (car_fts, rank) VALUES ('rank', 'bm25(4.0, 4.0, 1.0, 2.0, 1.0)')")
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_fts_insert AFTER INSERT ON Car
+            BEGIN
+                INSERT INTO car_fts (rowid, make, model, fuel, location, options)
+                VALUES (NEW.id, NEW.make, NEW.model, NEW.fuel, NEW.location,
+                        (SELECT group_concat(value, ' ') FROM json_each(NEW.options)));
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_fts_delete AFTER DELETE ON Car
+            BEGIN
+                INSERT INTO car_fts (car_fts, rowid, make, model, fuel, location, options)
+                VALUES ('delete', OLD.id, OLD.make, OLD.model, OLD.fuel, OLD.location,
+                        (SELECT group_concat(value, ' ') FROM json_each(OLD.options)));
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_fts_update
+            AFTER UPDATE OF make, model, fuel, location, options ON Car
+            BEGIN
+                INSERT INTO car_fts (car_fts, rowid, make, model, fuel, location, options)
+                VALUES ('delete', OLD.id, OLD.make, OLD.model, OLD.fuel, OLD.location,
+                        (SELECT group_concat(value, ' ') FROM json_each(OLD.options)));
+                INSERT INTO car_fts (rowid, make, model, fuel, location, options)
+                VALUES (NEW.id, NEW.make, NEW.model, NEW.fuel, NEW.location,
+                        (SELECT group_concat(value, ' ') FROM json_each(NEW.options)));
+            END
+        ''')
+        
+        # Indexer les voitures existantes ('rebuild' ne sait pas lire une vue
+        # contenant une sous-requête corrélée, on réindexe donc explicitement)
+        cursor.execute("INSERT INTO car_fts (car_fts) VALUES ('delete-all')")
+        cursor.execute('''
+            INSERT INTO car_fts (rowid, make, model, fuel, location, options)
+            SELECT id, make, model, fuel, location, options FROM car_search_source
+        ''')
+    
+    def _migrate_page_snapshots(self, cursor: sqlite3.Cursor):
+        """
+        Migration 4 : métadonnées des instantanés HTML des pages d'inventaire
+        (le contenu compressé est stocké sur disque par SnapshotStore)
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS page_snapshot (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_hash TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                base_url TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_snapshot_page ON page_snapshot (base_url, page_number, fetched_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_snapshot_hash ON page_snapshot (content_hash)")
+    
+    def _migrate_fingerprints(self, cursor: sqlite3.Cursor):
+        """
+        Migration 5 : empreintes des voitures (colonne Car.fingerprint) et des
+        pages d'inventaire (table page_fingerprint) pour le crawl incrémental
+        """
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(Car)").fetchall()}
+        if 'fingerprint' not in columns:
+            cursor.execute("ALTER TABLE Car ADD COLUMN fingerprint TEXT")
+        
+        # Calculer l'empreinte des voitures existantes
+        rows = cursor.execute('''
+            SELECT id, make, model, year, price, mileage, fuel, location, options, detail_url
+            FROM Car WHERE fingerprint IS NULL
+        ''').fetchall()
+        cursor.executemany(
+            "UPDATE Car SET fingerprint = ? WHERE id = ?",
+            [(self._row_to_car(row).fingerprint(), row[0]) for row in rows]
+        )
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS page_fingerprint (
+                base_url TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                listing_count INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (base_url, page_number)
+            )
+        ''')
+    
+    def _migrate_observations(self, cursor: sqlite3.Cursor):
+        """
+        Migration 6 : historique des prix et kilométrages (table car_observations)
+        Une ligne est ajoutée par des triggers à l'insertion d'une voiture puis
+        seulement quand son prix ou son kilométrage change, avec l'écart par
+        rapport à l'observation précédente
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS car_observations (
+                id INTEGER PRIMARY KEY,
+                car_id INTEGER NOT NULL,
+                observed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                price INTEGER NOT NULL,
+                mileage INTEGER NOT NULL,
+                price_delta INTEGER,
+                mileage_delta INTEGER
+            )
+        ''')
+        # Historique d'une voiture : parcours de l'index dans l'ordre chronologique
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_observations_car ON car_observations (car_id, observed_at)")
+        # Baisses de prix récentes : index partiel limité aux baisses, ordonné par date
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_car_observations_price_drop
+            ON car_observations (observed_at) WHERE price_delta < 0
+        ''')
+        
+        # Observation initiale des voitures existantes
+        cursor.execute('''
+            INSERT INTO car_observations (car_id, observed_at, price, mileage)
+            SELECT id, COALESCE(updated_at, CURRENT_TIMESTAMP), price, mileage FROM Car
+        ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_observations_insert AFTER INSERT ON Car
+            BEGIN
+                INSERT INTO car_observations (car_id, price, mileage)
+                VALUES (NEW.id, NEW.price, NEW.mileage);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_observations_update
+            AFTER UPDATE OF price, mileage ON Car
+            WHEN OLD.price IS NOT NEW.price OR OLD.mileage IS NOT NEW.mileage
+            BEGIN
+                INSERT INTO car_observations (car_id, price, mileage, price_delta, mileage_delta)
+                VALUES (NEW.id, NEW.price, NEW.mileage, NEW.price - OLD.price, NEW.mileage - OLD.mileage);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_observations_delete AFTER DELETE ON Car
+            BEGIN
+                DELETE FROM car_observations WHERE car_id = OLD.id;
+            END
+        ''')
+    
+    def _migrate_data_generation(self, cursor: sqlite3.Cursor):
+        """
+        Migration 7 : numéro de génération des données (table data_generation)
+        Incrémenté par des triggers à chaque écriture dans Car : deux lectures
+        avec la même génération voient les mêmes voitures (cache de l'API)
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS data_generation (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                generation INTEGER NOT NULL,
+                changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, 1)")
+        
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_data_generation_{event.lower()} AFTER {event} ON Car
+                BEGIN
+                    UPDATE data_generation SET generation = generation + 1, changed_at = CURRENT_TIMESTAMP
+                    WHERE id = 1;
+                END
+            ''')
+    
+    def _migrate_options(self, cursor: sqlite3.Cursor):
+        """
+        Migration 8 : options normalisées
+        - option : dictionnaire des noms d'options (un identifiant par nom),
+          avec le nom normalisé (name_norm, filtre option=) et le nombre de
+          voitures qui l'ont (car_count, tenu par triggers)
+        - car_option : association voiture/option (position dans la liste)
+        Les deux tables sont tenues à jour par des triggers depuis Car.options,
+        qui reste la copie JSON lue avec chaque voiture
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS option (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                name_norm TEXT NOT NULL,
+                car_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS car_option (
+                car_id INTEGER NOT NULL,
+                option_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (car_id, option_id)
+            ) WITHOUT ROWID
+        ''')
+        # Options d'un nom normalisé, puis voitures ayant ces options (filtre option=)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_option_name_norm ON option (name_norm)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_option_option ON car_option (option_id, car_id)")
+        
+        # Nombre de voitures par option
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_option_insert AFTER INSERT ON car_option
+            BEGIN
+                UPDATE option SET car_count = car_count + 1 WHERE id = NEW.option_id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_option_delete AFTER DELETE ON car_option
+            BEGIN
+                UPDATE option SET car_count = car_count - 1 WHERE id = OLD.option_id;
+            END
+        ''')
+        
+        # Synchronisation depuis Car.options (une position par option, doublons ignorés)
+        # Pas de INSERT OR IGNORE : la clause de conflit de l'écriture sur Car
+        # remplacerait celle du trigger ; name_norm est calculé par la fonction
+        # SQL normalize_text (enregistrée sur chaque connexion du pool)
+        link_options = '''
+                INSERT INTO option (name, name_norm)
+                SELECT DISTINCT value, normalize_text(value) FROM json_each(NEW.options)
+                WHERE NOT EXISTS (SELECT 1 FROM option WHERE option.name = json_each.value);
+                INSERT INTO car_option (car_id, option_id, position)
+                SELECT NEW.id, option.id, MIN(json_each.key)
+                FROM json_each(NEW.options) JOIN option ON option.name = json_each.value
+                GROUP BY option.id;
+        '''
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_car_options_insert AFTER INSERT ON Car
+            BEGIN
+                {link_options}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_car_options_update AFTER UPDATE OF options ON Car
+            WHEN OLD.options IS NOT NEW.options
+            BEGIN
+                DELETE FROM car_option WHERE car_id = OLD.id;
+                {link_options}
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_options_delete AFTER DELETE ON Car
+            BEGIN
+                DELETE FROM car_option WHERE car_id = OLD.id;
+            END
+        ''')
+        
+        # Migration des listes JSON existantes
+        cursor.execute('''
+            INSERT OR IGNORE INTO option (name, name_norm)
+            SELECT json_each.value, normalize_text(json_each.value) FROM Car, json_each(Car.options)
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO car_option (car_id, option_id, position)
+            SELECT Car.id, option.id, MIN(json_each.key)
+            FROM Car, json_each(Car.options) JOIN option ON option.name = json_each.value
+            GROUP BY Car.id, option.id
+        ''')
+    
+    def _migrate_crawl_runs(self, cursor: sqlite3.Cursor):
+        """
+        Migration 9 : points de reprise des scrapings
+        - crawl_run : un scraping, avec ses paramètres (JSON) et son statut
+          ('running', 'interrupted' ou 'completed')
+        - crawl_run_page : statut de chaque page du scraping ('pending',
+          'done', 'unchanged', 'failed' ou 'skipped') et son empreinte
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_run (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                base_url TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'running',
+                resume_count INTEGER NOT NULL DEFAULT 0,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_run_page (
+                run_id INTEGER NOT NULL,
+                page_number INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                fingerprint TEXT,
+                listing_count INTEGER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (run_id, page_number)
+            ) WITHOUT ROWID
+        ''')
+    
+    def _migrate_car_details(self, cursor: sqlite3.Cursor):
+        """
+        Migration 10 : détails récupérés sur la page de chaque voiture (table
+        car_detail, une ligne par voiture) avec l'empreinte de l'annonce au
+        moment de la récupération : une voiture est à enrichir si elle n'a pas
+        de détails ou si son empreinte a changé depuis
+        Index sur le VIN : même véhicule publié sous plusieurs URL
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS car_detail (
+                car_id INTEGER PRIMARY KEY,
+                listing_fingerprint TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 1,
+                vin TEXT,
+                transmission TEXT,
+                specs TEXT,
+                error TEXT,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_detail_vin ON car_detail (vin) WHERE vin IS NOT NULL")
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_car_detail_delete AFTER DELETE ON Car
+            BEGIN
+                DELETE FROM car_detail WHERE car_id = OLD.id;
+            END
+        ''')
+    
+    def _migrate_text_values(self, cursor: sqlite3.Cursor):
+        """
+        Migration 11 : dictionnaire car_text_value des valeurs normalisées
+        distinctes de marque, modèle et carburant, avec leur nombre de voitures
+        (tenu par triggers). Un filtre par sous-chaîne parcourt ce dictionnaire
+        (quelques centaines de valeurs) puis recherche les voitures des valeurs
+        retenues dans les index de la migration 1, au lieu de parcourir Car
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS car_text_value (
+                field TEXT NOT NULL,
+                value TEXT NOT NULL,
+                car_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (field, value)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Pas de INSERT OR IGNORE (voir _migrate_options) : upsert explicite
+        def add_values(row: str, condition: str = "") -> str:
+            return "".join(f'''
+                INSERT INTO car_text_value (field, value, car_count)
+                SELECT '{field}', {row}.{field}_norm, 1 WHERE {row}.{field}_norm IS NOT NULL {condition.format(field=field)}
+                ON CONFLICT (field, value) DO UPDATE SET car_count = car_count + 1;''' for field in TEXT_FIELDS)
+        
+        def remove_values(row: str, condition: str = "") -> str:
+            return "".join(f'''
+                UPDATE car_text_value SET car_count = car_count - 1
+                WHERE field = '{field}' AND value = {row}.{field}_norm {condition.format(field=field)};'''
+                for field in TEXT_FIELDS)
+        
+        changed = "AND OLD.{field}_norm IS NOT NEW.{field}_norm"
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_car_text_value_insert AFTER INSERT ON Car
+            BEGIN
+                {add_values("NEW")}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_car_text_value_update
+            AFTER UPDATE OF make_norm, model_norm, fuel_norm ON Car
+            BEGIN
+                {remove_values("OLD", changed)}
+                {add_values("NEW", changed)}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_car_text_value_delete AFTER DELETE ON Car
+            BEGIN
+                {remove_values("OLD")}
+            END
+        ''')
+        
+        # Valeurs des voitures existantes
+        for field in TEXT_FIELDS:
+            cursor.execute(f'''
+                INSERT INTO car_text_value (field, value, car_count)
+                SELECT '{field}', {field}_norm, COUNT(*) FROM Car WHERE {field}_norm IS NOT NULL GROUP BY {field}_norm
+                ON CONFLICT (field, value) DO UPDATE SET car_count = excluded.car_count
+            ''')
+    
+    def _migrate_listing_vin(self, cursor: sqlite3.Cursor):
+        """
+        Migration 12 : VIN publié sur la fiche d'inventaire (colonne Car.vin),
+        hors empreinte de l'annonce pour ne pas réécrire ni réenrichir les
+        voitures existantes ; index pour les VIN publiés sous plusieurs URL
+        """
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(Car)").fetchall()}
+        if 'vin' not in columns:
+            cursor.execute("ALTER TABLE Car ADD COLUMN vin TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_vin ON Car (vin) WHERE vin IS NOT NULL")
+
+    def _rebuild_stats(self, cursor: sqlite3.Cursor):
+        """Recalcule entièrement car_stats à partir de la table Car (GROUP BY)"""
+        cursor.execute("DELETE FROM car_stats")
+        cursor.execute('''
+            INSERT INTO car_stats (make, fuel, car_count, price_sum, mileage_sum, year_sum)
+            SELECT make, fuel, COUNT(*), SUM(price), SUM(mileage), SUM(year)
+            FROM Car GROUP BY make, fuel
+        ''')
+    
+    @timed_method(QUERY_METRIC)
+    def rebuild_stats(self):
+        """Recalcule la table d'agrégats car_stats (réparation après un import manuel)"""
+        with self.connection() as conn:
+            self._rebuild_stats(conn.cursor())
+            # Les statistiques servies peuvent avoir changé
+            conn.execute("UPDATE data_generation SET generation = generation + 1, changed_at = CURRENT_TIMESTAMP")
+    
+    @timed_method(QUERY_METRIC)
+    def get_data_version(self) -> tuple[int, str]:
+        """
+        Retourne (génération, date UTC de la dernière écriture dans Car)
+        La génération change à chaque modification des voitures
+        """
+        with self.connection() as conn:
+            return conn.execute("SELECT generation, changed_at FROM data_generation WHERE id = 1").fetchone()
+    
+    @timed_method(QUERY_METRIC)
     def car_exists(self, detail_url: str) -> bool:
         """Vérifie si une voiture existe déjà dans la base de données"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM Car WHERE detail_url = ?", (detail_url,))
             return cursor.fetchone()[0] > 0
     
+    @timed_method(QUERY_METRIC)
     def insert_car(self, car: Car) -> bool:
         """Insère une nouvelle voiture dans la base de données"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO Car (make, model, year, price, mileage, fuel, location, options, detail_url)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    INSERT INTO Car (make, model, year, price, mileage, fuel, location, options, detail_url,
+                                     make_norm, model_norm, fuel_norm, fingerprint, vin)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     car.make,
                     car.model,
@@ -61,7 +751,12 @@ class CarDatabase:
                     car.fuel,
                     car.location,
                     json.dumps(car.options),
-                    car.detail_url
+                    car.detail_url,
+                    normalize_text(car.make),
+                    normalize_text(car.model),
+                    normalize_text(car.fuel),
+                    car.fingerprint(),
+                    car.vin
                 ))
                 conn.commit()
                 return True
@@ -72,16 +767,23 @@ class CarDatabase:
             print(f"Erreur lors de l'insertion: {e}")
             return False
     
+    @timed_method(QUERY_METRIC)
     def update_car(self, car: Car) -> bool:
-        """Met à jour une voiture existante dans la base de données"""
+        """
+        Met à jour une voiture existante dans la base de données
+        La ligne (et updated_at) n'est réécrite que si l'empreinte ou le VIN
+        a changé (sans VIN, celui déjà enregistré est conservé)
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    UPDATE Car 
-                    SET make = ?, model = ?, year = ?, price = ?, mileage = ?, 
-                        fuel = ?, location = ?, options = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE detail_url = ?
+                    UPDATE Car
+                    SET make = ?, model = ?, year = ?, price = ?, mileage = ?,
+                        fuel = ?, location = ?, options = ?,
+                        make_norm = ?, model_norm = ?, fuel_norm = ?, fingerprint = ?,
+                        vin = COALESCE(?, vin), updated_at = CURRENT_TIMESTAMP
+                    WHERE detail_url = ? AND (fingerprint IS NOT ? OR vin IS NOT COALESCE(?, vin))
                 ''', (
                     car.make,
                     car.model,
@@ -91,17 +793,142 @@ class CarDatabase:
                     car.fuel,
                     car.location,
                     json.dumps(car.options),
-                    car.detail_url
+                    normalize_text(car.make),
+                    normalize_text(car.model),
+                    normalize_text(car.fuel),
+                    car.fingerprint(),
+                    car.vin,
+                    car.detail_url,
+                    car.fingerprint(),
+                    car.vin
                 ))
                 conn.commit()
-                return cursor.rowcount > 0
+                if cursor.rowcount > 0:
+                    return True
+            
+            # Aucune ligne modifiée : voiture inchangée ou inexistante
+            return self.car_exists(car.detail_url)
         except Exception as e:
             print(f"Erreur lors de la mise à jour: {e}")
             return False
-    
+
+    @timed_method(QUERY_METRIC)
+    def upsert_cars(self, cars: list[Car]) -> dict:
+        """
+        Insère ou met à jour un lot de voitures dans une seule transaction
+        Les voitures dont l'empreinte n'a pas changé ne sont pas réécrites
+        (aucune requête d'écriture n'est exécutée pour elles)
+        Retourne les compteurs {'inserted', 'updated', 'unchanged', 'errors'}
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+        if not cars:
+            return counts
+
+        try:
+            with self.connection() as conn:
+                counts = self._write_cars(conn.cursor(), cars)
+        except Exception as e:
+            print(f"Erreur lors de l'enregistrement du lot: {e}")
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': len(cars)}
+
+        return counts
+
+    def _write_cars(self, cursor: sqlite3.Cursor, cars: list[Car]) -> dict:
+        """Écrit un lot de voitures dans la transaction en cours (voir upsert_cars)"""
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+
+        # Récupérer en une fois les empreintes et VIN déjà présents (par paquets de 500)
+        urls = [car.detail_url for car in cars]
+        existing = {}
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT detail_url, fingerprint, vin FROM Car WHERE detail_url IN ({placeholders})", chunk
+            )
+            existing.update((url, (fingerprint, vin)) for url, fingerprint, vin in cursor.fetchall())
+
+        for car in cars:
+            fingerprint = car.fingerprint()
+            # Le VIN est hors empreinte : une annonce inchangée dont le VIN apparaît est complétée
+            if car.detail_url in existing and existing[car.detail_url][0] == fingerprint \
+                    and car.vin in (None, existing[car.detail_url][1]):
+                counts['unchanged'] += 1
+                continue
+
+            cursor.execute('''
+                INSERT INTO Car (make, model, year, price, mileage, fuel, location, options, detail_url,
+                                 make_norm, model_norm, fuel_norm, fingerprint, vin)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(detail_url) DO UPDATE
+                SET make = excluded.make, model = excluded.model, year = excluded.year,
+                    price = excluded.price, mileage = excluded.mileage, fuel = excluded.fuel,
+                    location = excluded.location, options = excluded.options,
+                    make_norm = excluded.make_norm, model_norm = excluded.model_norm,
+                    fuel_norm = excluded.fuel_norm, fingerprint = excluded.fingerprint,
+                    vin = COALESCE(excluded.vin, vin), updated_at = CURRENT_TIMESTAMP
+                WHERE fingerprint IS NOT excluded.fingerprint OR vin IS NOT COALESCE(excluded.vin, vin)
+            ''', (
+                car.make,
+                car.model,
+                car.year,
+                car.price,
+                car.mileage,
+                car.fuel,
+                car.location,
+                json.dumps(car.options),
+                car.detail_url,
+                normalize_text(car.make),
+                normalize_text(car.model),
+                normalize_text(car.fuel),
+                fingerprint,
+                car.vin
+            ))
+
+            if car.detail_url not in existing:
+                counts['inserted'] += 1
+                existing[car.detail_url] = (fingerprint, car.vin)
+            else:
+                counts['updated'] += 1
+                existing[car.detail_url] = (fingerprint, car.vin or existing[car.detail_url][1])
+        return counts
+
+    @timed_method(QUERY_METRIC)
+    def save_pages(self, cars: list[Car], pages: list[tuple], run_id: int = None) -> dict:
+        """
+        Enregistre dans une seule transaction les voitures d'un lot de pages,
+        l'empreinte de chaque page (base_url, page_number, fingerprint,
+        listing_count) et, si `run_id` est fourni, leur statut 'done' dans
+        crawl_run_page : une page n'est marquée terminée que si ses voitures
+        sont écrites, et inversement
+        Retourne les compteurs de upsert_cars
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                counts = self._write_cars(cursor, cars)
+                cursor.executemany('''
+                    INSERT INTO page_fingerprint (base_url, page_number, fingerprint, listing_count)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(base_url, page_number) DO UPDATE
+                    SET fingerprint = excluded.fingerprint, listing_count = excluded.listing_count,
+                        updated_at = CURRENT_TIMESTAMP
+                ''', pages)
+                if run_id is not None:
+                    self._set_run_pages(cursor, run_id, [
+                        (page_number, 'done', fingerprint, listing_count)
+                        for _, page_number, fingerprint, listing_count in pages
+                    ])
+        except Exception as e:
+            print(f"Erreur lors de l'enregistrement du lot: {e}")
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': len(cars)}
+
+        return counts
+
+    @timed_method(QUERY_METRIC)
     def get_all_cars(self) -> list[Car]:
         """Récupère toutes les voitures de la base de données"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT make, model, year, price, mileage, fuel, location, options, detail_url FROM Car")
             rows = cursor.fetchall()
@@ -124,16 +951,429 @@ class CarDatabase:
             
             return cars
     
+    @timed_method(QUERY_METRIC)
     def get_car_count(self) -> int:
         """Retourne le nombre total de voitures dans la base de données"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM Car")
             return cursor.fetchone()[0]
     
+    @timed_method(QUERY_METRIC)
+    def add_snapshot(self, content_hash: str, codec: str, base_url: str, page_number: int,
+                     size: int, stored_size: int):
+        """Enregistre les métadonnées d'un instantané de page"""
+        with self.connection() as conn:
+            conn.execute('''
+                INSERT INTO page_snapshot (content_hash, codec, base_url, page_number, size, stored_size)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (content_hash, codec, base_url, page_number, size, stored_size))
+    
+    @timed_method(QUERY_METRIC)
+    def get_page_fingerprint(self, base_url: str, page_number: int) -> str:
+        """Retourne l'empreinte enregistrée d'une page d'inventaire (None si inconnue)"""
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT fingerprint FROM page_fingerprint WHERE base_url = ? AND page_number = ?",
+                (base_url, page_number)
+            ).fetchone()
+            return row[0] if row else None
+    
+    @timed_method(QUERY_METRIC)
+    def create_crawl_run(self, base_url: str, page_numbers: list[int], params: dict) -> int:
+        """Enregistre un nouveau scraping et ses pages (toutes 'pending'), retourne son identifiant"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO crawl_run (base_url, params) VALUES (?, ?)",
+                (base_url, json.dumps(params, sort_keys=True))
+            )
+            run_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT INTO crawl_run_page (run_id, page_number) VALUES (?, ?)",
+                [(run_id, page_number) for page_number in page_numbers]
+            )
+            return run_id
+    
+    @timed_method(QUERY_METRIC)
+    def get_last_crawl_run(self) -> dict:
+        """
+        Retourne le dernier scraping enregistré (paramètres, statut et nombre
+        de pages par statut), ou None s'il n'y en a aucun
+        """
+        with self.connection() as conn:
+            row = conn.execute('''
+                SELECT id, base_url, params, status, resume_count, started_at, updated_at, finished_at
+                FROM crawl_run ORDER BY id DESC LIMIT 1
+            ''').fetchone()
+            if row is None:
+                return None
+            pages = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM crawl_run_page WHERE run_id = ? GROUP BY status", (row[0],)
+            ).fetchall())
+            return {
+                'id': row[0],
+                'base_url': row[1],
+                'params': json.loads(row[2]),
+                'status': row[3],
+                'resume_count': row[4],
+                'started_at': row[5],
+                'updated_at': row[6],
+                'finished_at': row[7],
+                'pages': pages
+            }
+    
+    @timed_method(QUERY_METRIC)
+    def get_unfinished_pages(self, run_id: int) -> list[int]:
+        """Pages d'un scraping restant à faire (jamais traitées ou en erreur), dans l'ordre"""
+        with self.connection() as conn:
+            rows = conn.execute('''
+                SELECT page_number FROM crawl_run_page
+                WHERE run_id = ? AND status IN ('pending', 'failed')
+                ORDER BY page_number
+            ''', (run_id,)).fetchall()
+            return [row[0] for row in rows]
+    
+    def _set_run_pages(self, cursor: sqlite3.Cursor, run_id: int, pages: list[tuple]):
+        """Met à jour le statut de pages (page_number, statut, empreinte, nombre d'annonces) d'un scraping"""
+        cursor.executemany('''
+            UPDATE crawl_run_page
+            SET status = ?, fingerprint = COALESCE(?, fingerprint),
+                listing_count = COALESCE(?, listing_count), updated_at = CURRENT_TIMESTAMP
+            WHERE run_id = ? AND page_number = ?
+        ''', [(status, fingerprint, listing_count, run_id, page_number)
+              for page_number, status, fingerprint, listing_count in pages])
+        cursor.execute("UPDATE crawl_run SET updated_at = CURRENT_TIMESTAMP WHERE id = ?", (run_id,))
+    
+    @timed_method(QUERY_METRIC)
+    def set_crawl_page_status(self, run_id: int, page_number: int, status: str,
+                              fingerprint: str = None, listing_count: int = None):
+        """Enregistre le statut d'une page d'un scraping ('unchanged', 'failed'...)"""
+        with self.connection() as conn:
+            self._set_run_pages(conn.cursor(), run_id, [(page_number, status, fingerprint, listing_count)])
+    
+    @timed_method(QUERY_METRIC)
+    def resume_crawl_run(self, run_id: int):
+        """Marque un scraping comme repris"""
+        with self.connection() as conn:
+            conn.execute('''
+                UPDATE crawl_run
+                SET status = 'running', resume_count = resume_count + 1,
+                    updated_at = CURRENT_TIMESTAMP, finished_at = NULL
+                WHERE id = ?
+            ''', (run_id,))
+    
+    @timed_method(QUERY_METRIC)
+    def finish_crawl_run(self, run_id: int, skip_pending: bool = False) -> str:
+        """
+        Termine un scraping : 'completed' si toutes ses pages sont traitées,
+        sinon 'interrupted' (pages à reprendre avec get_unfinished_pages)
+        Avec `skip_pending` (arrêt anticipé du mode incrémental), les pages
+        jamais traitées sont marquées 'skipped' et ne seront pas reprises
+        Retourne le statut enregistré
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if skip_pending:
+                cursor.execute('''
+                    UPDATE crawl_run_page SET status = 'skipped', updated_at = CURRENT_TIMESTAMP
+                    WHERE run_id = ? AND status = 'pending'
+                ''', (run_id,))
+            remaining = cursor.execute(
+                "SELECT COUNT(*) FROM crawl_run_page WHERE run_id = ? AND status IN ('pending', 'failed')",
+                (run_id,)
+            ).fetchone()[0]
+            status = 'interrupted' if remaining else 'completed'
+            cursor.execute('''
+                UPDATE crawl_run SET status = ?, updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (status, run_id))
+            return status
+    
+    @timed_method(QUERY_METRIC)
+    def get_car_history(self, car_id: int) -> list[dict]:
+        """Retourne les observations de prix et de kilométrage d'une voiture, de la plus ancienne à la plus récente"""
+        with self.connection() as conn:
+            rows = conn.execute('''
+                SELECT observed_at, price, mileage, price_delta, mileage_delta
+                FROM car_observations WHERE car_id = ?
+                ORDER BY observed_at, id
+            ''', (car_id,)).fetchall()
+        return [
+            {
+                'observed_at': observed_at,
+                'price': price,
+                'mileage': mileage,
+                'price_delta': price_delta,
+                'mileage_delta': mileage_delta
+            }
+            for observed_at, price, mileage, price_delta, mileage_delta in rows
+        ]
+    
+    @timed_method(QUERY_METRIC)
+    def get_price_drops(self, since: str, page: int = 1, per_page: int = 20) -> tuple[list[dict], int]:
+        """
+        Retourne les baisses de prix observées depuis `since` ('AAAA-MM-JJ HH:MM:SS', UTC),
+        de la plus récente à la plus ancienne, avec la voiture concernée
+        Retourne (baisses, nombre total)
+        """
+        page = max(1, page)
+        per_page = max(1, per_page)
+        with self.connection() as conn:
+            # Les deux requêtes parcourent seulement la plage de dates de l'index partiel
+            total_count = conn.execute(
+                "SELECT COUNT(*) FROM car_observations WHERE price_delta < 0 AND observed_at >= ?",
+                (since,)
+            ).fetchone()[0]
+            rows = conn.execute('''
+                SELECT o.observed_at, o.price - o.price_delta, o.price, o.price_delta,
+                       c.id, c.make, c.model, c.year, c.price, c.mileage, c.fuel, c.location, c.options, c.detail_url
+                FROM car_observations AS o INDEXED BY idx_car_observations_price_drop
+                JOIN Car AS c ON c.id = o.car_id
+                WHERE o.price_delta < 0 AND o.observed_at >= ?
+                ORDER BY o.observed_at DESC
+                LIMIT ? OFFSET ?
+            ''', (since, per_page, (page - 1) * per_page)).fetchall()
+        
+        drops = [
+            {
+                'observed_at': row[0],
+                'old_price': row[1],
+                'new_price': row[2],
+                'price_delta': row[3],
+                'car': self._row_to_car(row[4:])
+            }
+            for row in rows
+        ]
+        return drops, total_count
+    
+    @timed_method(QUERY_METRIC)
+    def get_cars_to_enrich(self, max_attempts: int = 3, limit: int = None) -> list[tuple]:
+        """
+        Voitures dont la page de détail est à récupérer : sans détails, dont
+        l'annonce a changé depuis la récupération, ou en erreur moins de
+        `max_attempts` fois pour l'annonce actuelle
+        Retourne des tuples (id, detail_url, fingerprint) par id croissant
+        """
+        with self.connection() as conn:
+            return conn.execute('''
+                SELECT Car.id, Car.detail_url, Car.fingerprint
+                FROM Car LEFT JOIN car_detail ON car_detail.car_id = Car.id
+                WHERE car_detail.car_id IS NULL
+                   OR car_detail.listing_fingerprint IS NOT Car.fingerprint
+                   OR (car_detail.status = 'failed' AND car_detail.attempts < ?)
+                ORDER BY Car.id
+                LIMIT ?
+            ''', (max_attempts, -1 if limit is None else limit)).fetchall()
+    
+    @timed_method(QUERY_METRIC)
+    def save_car_details(self, details: list[dict]):
+        """
+        Enregistre un lot de résultats d'enrichissement dans une transaction
+        Chaque dict contient car_id, listing_fingerprint, status ('done' ou
+        'failed'), vin, transmission, specs (JSON) et error. Un échec conserve
+        les détails récupérés précédemment ; le nombre de tentatives repart
+        à 1 quand l'empreinte de l'annonce change
+        """
+        if not details:
+            return
+        with self.connection() as conn:
+            conn.executemany('''
+                INSERT INTO car_detail (car_id, listing_fingerprint, status, vin, transmission, specs, error)
+                VALUES (:car_id, :listing_fingerprint, :status, :vin, :transmission, :specs, :error)
+                ON CONFLICT(car_id) DO UPDATE
+                SET attempts = CASE WHEN listing_fingerprint IS excluded.listing_fingerprint
+                                    THEN attempts + 1 ELSE 1 END,
+                    listing_fingerprint = excluded.listing_fingerprint, status = excluded.status,
+                    vin = COALESCE(excluded.vin, vin), transmission = COALESCE(excluded.transmission, transmission),
+                    specs = COALESCE(excluded.specs, specs), error = excluded.error,
+                    fetched_at = CURRENT_TIMESTAMP
+            ''', details)
+            # Les détails servis par l'API ont changé
+            conn.execute("UPDATE data_generation SET generation = generation + 1, changed_at = CURRENT_TIMESTAMP")
+    
+    @timed_method(QUERY_METRIC)
+    def get_car_details(self, car_id: int) -> dict:
+        """
+        Détails d'une voiture récupérés sur sa page, avec les autres voitures
+        de même VIN ; None si sa page n'a pas encore été récupérée
+        Sans VIN sur la page de détail, celui de la fiche d'inventaire est retenu
+        """
+        with self.connection() as conn:
+            row = conn.execute('''
+                SELECT status, COALESCE(car_detail.vin, Car.vin), transmission, specs, error, fetched_at
+                FROM car_detail JOIN Car ON Car.id = car_detail.car_id
+                WHERE car_id = ?
+            ''', (car_id,)).fetchone()
+            if row is None:
+                return None
+            status, vin, transmission, specs, error, fetched_at = row
+            same_vin = [other_id for (other_id,) in conn.execute('''
+                SELECT car_id FROM car_detail WHERE vin = ? AND car_id != ?
+                UNION SELECT id FROM Car WHERE vin = ? AND id != ?
+                ORDER BY 1
+            ''', (vin, car_id, vin, car_id))] if vin else []
+        return {
+            'car_id': car_id,
+            'status': status,
+            'vin': vin,
+            'transmission': transmission,
+            'specs': json.loads(specs) if specs else {},
+            'error': error,
+            'fetched_at': fetched_at,
+            'same_vin_car_ids': same_vin
+        }
+    
+    @timed_method(QUERY_METRIC)
+    def get_vin_duplicates(self) -> list[dict]:
+        """
+        VIN publiés sous plusieurs URL, avec les voitures correspondantes
+        (VIN lu sur la fiche d'inventaire ou sur la page de détail)
+        """
+        with self.connection() as conn:
+            rows = conn.execute('''
+                SELECT vin, group_concat(car_id) FROM (
+                    SELECT vin, car_id FROM car_detail WHERE vin IS NOT NULL
+                    UNION SELECT vin, id FROM Car WHERE vin IS NOT NULL
+                    ORDER BY vin, car_id
+                )
+                GROUP BY vin HAVING COUNT(*) > 1
+                ORDER BY vin
+            ''').fetchall()
+        return [{'vin': vin, 'car_ids': [int(car_id) for car_id in car_ids.split(',')]} for vin, car_ids in rows]
+    
+    @timed_method(QUERY_METRIC)
+    def get_snapshots(self) -> list[dict]:
+        """
+        Retourne un instantané par contenu distinct, du plus ancien au plus récent
+        (dernière date de récupération), pour rejouer l'extraction dans l'ordre
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            # Avec un seul MAX(), SQLite prend les autres colonnes sur la ligne du maximum
+            cursor.execute('''
+                SELECT content_hash, codec, base_url, page_number, fetched_at, MAX(id) AS last_id
+                FROM page_snapshot
+                GROUP BY content_hash
+                ORDER BY last_id
+            ''')
+            return [
+                {'content_hash': row[0], 'codec': row[1], 'base_url': row[2],
+                 'page_number': row[3], 'fetched_at': row[4]}
+                for row in cursor.fetchall()
+            ]
+    
+    @timed_method(QUERY_METRIC)
+    def get_option_counts(self) -> list[dict]:
+        """Retourne les options présentes et leur nombre de voitures, de la plus fréquente à la plus rare"""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT name, car_count FROM option WHERE car_count > 0 ORDER BY car_count DESC, name"
+            ).fetchall()
+        return [{'name': name, 'count': count} for name, count in rows]
+    
+    @timed_method(QUERY_METRIC)
+    def get_stats(self) -> dict:
+        """
+        Retourne les statistiques globales à partir de la table d'agrégats car_stats
+        (nombre total, répartition par marque et par carburant, moyennes)
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT make, SUM(car_count) FROM car_stats GROUP BY make ORDER BY make")
+            makes = dict(cursor.fetchall())
+            
+            fuels = {'Essence': 0, 'Électrique': 0}
+            cursor.execute("SELECT fuel, SUM(car_count) FROM car_stats GROUP BY fuel")
+            fuels.update(cursor.fetchall())
+            
+            cursor.execute("""
+                SELECT COALESCE(SUM(car_count), 0), SUM(price_sum), SUM(mileage_sum), SUM(year_sum)
+                FROM car_stats
+            """)
+            total_cars, price_sum, mileage_sum, year_sum = cursor.fetchone()
+            
+            return {
+                'total_cars': total_cars,
+                'makes': makes,
+                'fuels': fuels,
+                'averages': {
+                    'price': round(price_sum / total_cars, 2) if total_cars else 0,
+                    'mileage': round(mileage_sum / total_cars, 2) if total_cars else 0,
+                    'year': round(year_sum / total_cars, 1) if total_cars else 0
+                }
+            }
+    
+    @timed_method(QUERY_METRIC)
+    def search_cars(self, query: str, filters: dict = None, page: int = 1,
+                    per_page: int = 20) -> tuple[list[Car], int]:
+        """
+        Recherche plein texte (FTS5) dans la marque, le modèle, le carburant,
+        la localisation et les options, classée par pertinence (BM25)
+        Chaque mot est cherché par préfixe et tous doivent être présents
+        Les filtres de get_cars_with_filters s'appliquent dans la même requête
+        Retourne (voitures, total_count)
+        """
+        match_query = self.build_match_query(query)
+        if not match_query:
+            raise ValueError("La recherche doit contenir au moins un mot")
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            where_clause, params = self.build_where_clause(filters or {})
+            where_clause = where_clause.replace("WHERE", "AND", 1)
+            
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM car_fts JOIN Car ON Car.id = car_fts.rowid
+                WHERE car_fts MATCH ? {where_clause}
+            """, [match_query] + params)
+            total_count = cursor.fetchone()[0]
+            
+            # car_fts.rank applique la pondération BM25 configurée à la migration
+            cursor.execute(f"""
+                SELECT Car.id, Car.make, Car.model, Car.year, Car.price, Car.mileage,
+                       Car.fuel, Car.location, Car.options, Car.detail_url
+                FROM car_fts JOIN Car ON Car.id = car_fts.rowid
+                WHERE car_fts MATCH ? {where_clause}
+                ORDER BY car_fts.rank
+                LIMIT ? OFFSET ?
+            """, [match_query] + params + [per_page, (page - 1) * per_page])
+            
+            cars = [self._row_to_car(row) for row in cursor.fetchall()]
+            return cars, total_count
+    
+    @staticmethod
+    def build_match_query(query: str) -> str:
+        """
+        Transforme une saisie libre en requête FTS5 : chaque mot devient un
+        terme recherché par préfixe ("toit ouvrant" -> "toit"* "ouvrant"*)
+        """
+        words = re.findall(r"\w+", query or '')
+        return " ".join(f'"{word}"*' for word in words)
+    
+    def _row_to_car(self, row: tuple) -> Car:
+        """Convertit une ligne (id, make, ..., options, detail_url) en objet Car"""
+        options = json.loads(row[8]) if row[8] else []
+        car = Car(
+            make=row[1],
+            model=row[2],
+            year=row[3],
+            price=row[4],
+            mileage=row[5],
+            fuel=row[6],
+            location=row[7],
+            options=options,
+            detail_url=row[9],
+            id=row[0]
+        )
+        return car
+    
+    @timed_method(QUERY_METRIC)
     def get_car_by_id(self, car_id: int) -> Car:
         """Récupère une voiture par son ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, make, model, year, price, mileage, fuel, location, options, detail_url 
@@ -142,111 +1382,240 @@ class CarDatabase:
             row = cursor.fetchone()
             
             if row:
-                options = json.loads(row[8]) if row[8] else []
-                car = Car(
-                    make=row[1],
-                    model=row[2],
-                    year=row[3],
-                    price=row[4],
-                    mileage=row[5],
-                    fuel=row[6],
-                    location=row[7],
-                    options=options,
-                    detail_url=row[9]
-                )
-                # Ajouter l'ID à l'objet car
-                car.id = row[0]
-                return car
+                return self._row_to_car(row)
             
             return None
     
+    @timed_method(QUERY_METRIC)
+    def match_text_values(self, field: str, text: str) -> list[str]:
+        """
+        Valeurs normalisées de `field` (make, model ou fuel) contenant `text`
+        (déjà normalisé), lues dans le dictionnaire car_text_value
+        """
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT value FROM car_text_value WHERE field = ? AND car_count > 0 AND instr(value, ?) > 0",
+                (field, text)
+            ).fetchall()
+        return [value for (value,) in rows]
+    
+    def build_where_clause(self, filters: dict) -> tuple[str, list]:
+        """
+        Construit la clause WHERE et ses paramètres à partir des filtres
+        Marque, modèle et carburant sont cherchés sur les colonnes normalisées
+        selon filters['match'] (voir TEXT_MATCH_MODES), toujours via les index
+        (<champ>_norm, ...) : sous-chaîne par défaut (valeurs du dictionnaire
+        car_text_value, voir match_text_values), début du nom (plage) ou nom
+        exact ; prix et année par
+        plage, options par nom exact (sans casse ni accents) via l'index de
+        car_option
+        """
+        where_conditions = []
+        params = []
+        
+        # Filtres textuels : insensibles à la casse et aux accents
+        match = filters.get('match') or 'contains'
+        if match not in TEXT_MATCH_MODES:
+            raise ValueError(f"Correspondance inconnue: {match} (attendu: {', '.join(TEXT_MATCH_MODES)})")
+        for field in TEXT_FIELDS:
+            value = normalize_text(filters.get(field) or '')
+            if not value:
+                continue
+            if match == 'exact':
+                where_conditions.append(f"{field}_norm = ?")
+                params.append(value)
+            elif match == 'prefix':
+                where_conditions.append(f"{field}_norm >= ? AND {field}_norm < ?")
+                params.extend([value, prefix_upper_bound(value)])
+            else:
+                # Valeurs lues dans le dictionnaire : liste connue du planificateur
+                values = self.match_text_values(field, value)
+                if not values:
+                    where_conditions.append("0")
+                    continue
+                placeholders = ", ".join("?" * len(values))
+                where_conditions.append(f"{field}_norm IN ({placeholders})")
+                params.extend(values)
+        
+        if filters.get('price_lt') is not None:
+            where_conditions.append("price < ?")
+            params.append(filters['price_lt'])
+        
+        if filters.get('price_gt') is not None:
+            where_conditions.append("price > ?")
+            params.append(filters['price_gt'])
+        
+        if filters.get('year_lt') is not None:
+            where_conditions.append("year < ?")
+            params.append(filters['year_lt'])
+        
+        if filters.get('year_gt') is not None:
+            where_conditions.append("year > ?")
+            params.append(filters['year_gt'])
+        
+        # Options : la voiture doit avoir toutes les options demandées
+        if filters.get('options'):
+            for name in filters['options']:
+                where_conditions.append(
+                    "id IN (SELECT car_id FROM car_option WHERE option_id IN "
+                    "(SELECT id FROM option WHERE name_norm = ?))"
+                )
+                params.append(normalize_text(name))
+        
+        # Construire la clause WHERE
+        where_clause = ""
+        if where_conditions:
+            where_clause = "WHERE " + " AND ".join(where_conditions)
+        
+        return where_clause, params
+    
+    def order_clause(self, sort_by: str, sort_order: str) -> tuple[str, str, str]:
+        """
+        Valide le tri et retourne (sort_by, sort_order, clause ORDER BY),
+        id départageant les égalités
+        """
+        if sort_by not in self.SORT_FIELDS:
+            sort_by = 'id'
+        sort_order = 'DESC' if sort_order.lower() == 'desc' else 'ASC'
+        if sort_by == 'id':
+            return sort_by, sort_order, f"ORDER BY id {sort_order}"
+        return sort_by, sort_order, f"ORDER BY {sort_by} {sort_order}, id {sort_order}"
+    
+    def build_page_query(self, where_clause: str, params: list, sort_by: str = 'id', sort_order: str = 'asc',
+                         page: int = 1, per_page: int = 20, cursor: str = None) -> tuple[str, list]:
+        """
+        Requête d'une page de get_cars_with_filters et ses paramètres, à partir
+        de la clause de build_where_clause (aussi utilisée par check_query_plans)
+        Avec `cursor`, la page commence après la position du curseur (keyset)
+        et `page` est ignoré
+        """
+        sort_by, sort_order, order_clause = self.order_clause(sort_by, sort_order)
+        
+        # Pagination par curseur (keyset) ou par OFFSET
+        page_conditions = []
+        page_params = []
+        offset = (page - 1) * per_page
+        if cursor:
+            cursor_value, cursor_id = decode_cursor(cursor, sort_by, sort_order)
+            operator = '<' if sort_order == 'DESC' else '>'
+            if sort_by == 'id':
+                page_conditions.append(f"id {operator} ?")
+                page_params.append(cursor_id)
+            else:
+                page_conditions.append(f"({sort_by}, id) {operator} (?, ?)")
+                page_params.extend([cursor_value, cursor_id])
+            offset = 0
+        
+        if page_conditions:
+            keyword = "AND" if where_clause else "WHERE"
+            where_clause = f"{where_clause} {keyword} " + " AND ".join(page_conditions)
+        
+        query = f"""
+            SELECT id, make, model, year, price, mileage, fuel, location, options, detail_url 
+            FROM Car {where_clause} {order_clause} LIMIT ? OFFSET ?
+        """
+        return query, params + page_params + [per_page, offset]
+    
+    @timed_method(QUERY_METRIC)
     def get_cars_with_filters(self, filters: dict, sort_by: str = 'id', sort_order: str = 'asc', 
-                             page: int = 1, per_page: int = 20) -> tuple[list[Car], int]:
+                             page: int = 1, per_page: int = 20, cursor: str = None,
+                             count_mode: str = 'exact', row_factory=None) -> tuple[list[Car], int]:
         """
         Récupère les voitures avec filtres, tri et pagination directement en SQL
+        
+        Avec `cursor` (voir encode_cursor), la page est obtenue par recherche
+        dans l'index (sort_col, id) > (valeur, id) au lieu d'un OFFSET, et
+        `page` est ignoré.
+        `count_mode` : 'exact' (COUNT(*)), 'estimate' (comptage borné à
+        ESTIMATE_CAP, total_count vaut None au-delà) ou 'none' (pas de
+        comptage, total_count vaut None).
+        `row_factory` (ex: serialization.car_json_row) remplace la conversion
+        en objets Car : les voitures sont alors retournées sous cette forme.
+        
         Retourne (voitures, total_count)
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self.connection() as conn:
+            db_cursor = conn.cursor()
             
             # Construire la requête SQL avec filtres
-            where_conditions = []
-            params = []
-            
-            # Filtres
-            if filters.get('make'):
-                where_conditions.append("LOWER(make) LIKE LOWER(?)")
-                params.append(f"%{filters['make']}%")
-            
-            if filters.get('model'):
-                where_conditions.append("LOWER(model) LIKE LOWER(?)")
-                params.append(f"%{filters['model']}%")
-            
-            if filters.get('fuel'):
-                where_conditions.append("LOWER(fuel) LIKE LOWER(?)")
-                params.append(f"%{filters['fuel']}%")
-            
-            if filters.get('price_lt') is not None:
-                where_conditions.append("price < ?")
-                params.append(filters['price_lt'])
-            
-            if filters.get('price_gt') is not None:
-                where_conditions.append("price > ?")
-                params.append(filters['price_gt'])
-            
-            if filters.get('year_lt') is not None:
-                where_conditions.append("year < ?")
-                params.append(filters['year_lt'])
-            
-            if filters.get('year_gt') is not None:
-                where_conditions.append("year > ?")
-                params.append(filters['year_gt'])
-            
-            # Construire la clause WHERE
-            where_clause = ""
-            if where_conditions:
-                where_clause = "WHERE " + " AND ".join(where_conditions)
-            
-            # Validation du champ de tri
-            valid_sort_fields = ['id', 'make', 'model', 'year', 'price', 'mileage', 'fuel', 'location']
-            if sort_by not in valid_sort_fields:
-                sort_by = 'id'
-            
-            # Construire la clause ORDER BY
-            order_clause = f"ORDER BY {sort_by} {sort_order.upper()}"
-            
-            # Requête pour compter le total
-            count_query = f"SELECT COUNT(*) FROM Car {where_clause}"
-            cursor.execute(count_query, params)
-            total_count = cursor.fetchone()[0]
+            where_clause, params = self.build_where_clause(filters)
             
-            # Requête pour récupérer les données avec pagination
-            limit = per_page
-            offset = (page - 1) * per_page
+            # Compter le total selon le mode demandé
+            if count_mode == 'none':
+                total_count = None
+            elif count_mode == 'estimate':
+                total_count = self._estimate_count(db_cursor, where_clause, params)
+            else:
+                db_cursor.execute(f"SELECT COUNT(*) FROM Car {where_clause}", params)
+                total_count = db_cursor.fetchone()[0]
             
-            data_query = f"""
-                SELECT id, make, model, year, price, mileage, fuel, location, options, detail_url 
-                FROM Car {where_clause} {order_clause} LIMIT ? OFFSET ?
-            """
-            cursor.execute(data_query, params + [limit, offset])
-            rows = cursor.fetchall()
+            data_query, data_params = self.build_page_query(where_clause, params, sort_by, sort_order,
+                                                            page, per_page, cursor)
+            if row_factory is not None:
+                db_cursor.row_factory = row_factory
+                db_cursor.execute(data_query, data_params)
+                return db_cursor.fetchall(), total_count
+            
+            db_cursor.execute(data_query, data_params)
+            rows = db_cursor.fetchall()
             
             # Convertir les résultats en objets Car
-            cars = []
-            for row in rows:
-                options = json.loads(row[8]) if row[8] else []
-                car = Car(
-                    make=row[1],
-                    model=row[2],
-                    year=row[3],
-                    price=row[4],
-                    mileage=row[5],
-                    fuel=row[6],
-                    location=row[7],
-                    options=options,
-                    detail_url=row[9]
-                )
-                car.id = row[0]
-                cars.append(car)
+            cars = [self._row_to_car(row) for row in rows]
             
-            return cars, total_count 
\ No newline at end of file
+            return cars, total_count
+    
+    def iter_cars(self, filters: dict = None, sort_by: str = 'id', sort_order: str = 'asc',
+                  batch_size: int = 500, row_factory=None):
+        """
+        Parcourt les voitures correspondant aux filtres (mêmes règles que
+        get_cars_with_filters) sans les charger toutes en mémoire : les lignes
+        sont lues par paquets de `batch_size` avec fetchmany
+        La connexion reste empruntée au pool jusqu'à la fin du parcours
+        `row_factory` remplace la conversion en objets Car (voir get_cars_with_filters)
+        """
+        where_clause, params = self.build_where_clause(filters or {})
+        _, _, order_clause = self.order_clause(sort_by, sort_order)
+        
+        with self.connection() as conn:
+            db_cursor = conn.cursor()
+            db_cursor.row_factory = row_factory
+            db_cursor.execute(f"""
+                SELECT id, make, model, year, price, mileage, fuel, location, options, detail_url
+                FROM Car {where_clause} {order_clause}
+            """, params)
+            while True:
+                rows = db_cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if row_factory is not None:
+                    yield from rows
+                else:
+                    for row in rows:
+                        yield self._row_to_car(row)
+    
+    def _estimate_count(self, cursor: sqlite3.Cursor, where_clause: str, params: list) -> int:
+        """
+        Estimation peu coûteuse du nombre de voitures correspondant aux filtres
+        Sans filtre : plus grand id (recherche directe dans la clé primaire)
+        Avec filtres : comptage exact jusqu'à ESTIMATE_CAP résultats, None au-delà
+        (le total est inconnu plutôt que tronqué)
+        """
+        if not where_clause:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM Car")
+            return cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM Car {where_clause} LIMIT ?)",
+            params + [self.ESTIMATE_CAP + 1]
+        )
+        count = cursor.fetchone()[0]
+        return count if count <= self.ESTIMATE_CAP else None
+    
+    def make_cursor(self, car, sort_by: str = 'id', sort_order: str = 'asc') -> str:
+        """
+        Construit le curseur désignant la position juste après `car` pour ce tri
+        `car` est un objet Car ou un dictionnaire de ses champs (JSON décodé)
+        """
+        sort_by, sort_order, _ = self.order_clause(sort_by, sort_order)
+        if isinstance(car, dict):
+            return encode_cursor(sort_by, sort_order, car[sort_by], car['id'])
+        return encode_cursor(sort_by, sort_order, getattr(car, sort_by), car.id) 
\ No newline at end of file
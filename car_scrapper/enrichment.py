@@ -0,0 +1,175 @@
+"""
+Enrichissement des voitures à partir de leur page de détail
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+from .database import CarDatabase
+from .http_navigator import HTTP2_AVAILABLE, AlbiHttpNavigator
+from .metrics import DETAILS_METRIC, METRICS, PHASE_METRIC
+
+
+# Seules les métadonnées schema.org (meta itemprop) sont analysées
+DETAIL_META = SoupStrainer('meta', attrs={'itemprop': True})
+
+
+def parse_detail_page(html: str) -> dict:
+    """
+    Extrait les métadonnées schema.org d'une page de détail : VIN,
+    transmission et autres caractéristiques (dict specs, première valeur
+    de chaque itemprop)
+    """
+    soup = BeautifulSoup(html, 'html.parser', parse_only=DETAIL_META)
+    specs = {}
+    for meta in soup.find_all('meta'):
+        value = (meta.get('content') or '').strip()
+        if value:
+            specs.setdefault(meta['itemprop'], value)
+    return {
+        'vin': specs.pop('vehicleIdentificationNumber', None),
+        'transmission': specs.pop('vehicleTransmission', None),
+        'specs': specs,
+    }
+
+
+class HostRateLimiter:
+    """
+    Espace les requêtes vers un même hôte d'au moins 1 / `rate` secondes,
+    tous threads confondus (0 : pas de limite)
+    """
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        """Bloque jusqu'au prochain créneau libre de l'hôte de `url`"""
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class DetailEnricher:
+    """
+    Récupère la page de détail des voitures nouvelles ou dont l'annonce a
+    changé (voir CarDatabase.get_cars_to_enrich) et enregistre le résultat
+    dans car_detail
+
+    `workers` threads partagent un client HTTP à connexions persistantes ;
+    au plus 2 × `workers` récupérations sont en attente et les requêtes vers
+    un même hôte sont limitées à `rate` par seconde. Les résultats sont écrits
+    par lots de `batch_size` (une transaction par lot) ; une page en erreur
+    est retentée aux passages suivants, au plus `max_attempts` fois.
+    """
+    def __init__(self, database: CarDatabase, workers: int = 4, rate: float = 2.0, timeout: float = 30.0,
+                 max_attempts: int = 3, batch_size: int = 50):
+        self.database = database
+        self.workers = workers
+        self.rate = rate
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.rate_limiter = HostRateLimiter(rate)
+        self.client = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"User-Agent": AlbiHttpNavigator.USER_AGENT, "Accept-Language": "fr-CA,fr;q=0.9"},
+            limits=httpx.Limits(max_connections=workers, max_keepalive_connections=workers),
+        )
+
+    def fetch(self, car_id: int, detail_url: str, fingerprint: str) -> dict:
+        """Récupère et analyse la page de détail d'une voiture (exécuté dans un thread du pool)"""
+        detail = {'car_id': car_id, 'listing_fingerprint': fingerprint, 'status': 'failed',
+                  'vin': None, 'transmission': None, 'specs': None, 'error': None}
+        self.rate_limiter.wait(detail_url)
+        try:
+            with METRICS.time(PHASE_METRIC, phase='enrich_fetch'):
+                response = self.client.get(detail_url)
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            detail['error'] = str(e) or type(e).__name__
+            return detail
+
+        parsed = parse_detail_page(response.text)
+        if not parsed['vin'] and not parsed['specs']:
+            detail['error'] = "Aucune métadonnée de véhicule dans la page"
+            return detail
+        detail.update(status='done', vin=parsed['vin'], transmission=parsed['transmission'],
+                      specs=json.dumps(parsed['specs'], ensure_ascii=False))
+        return detail
+
+    def _collect(self, detail: dict, batch: list[dict], totals: dict):
+        """Ajoute un résultat au lot à écrire et le compte"""
+        batch.append(detail)
+        totals[detail['status']] += 1
+        METRICS.inc(DETAILS_METRIC, result=detail['status'])
+
+    def _write(self, batch: list[dict]):
+        with METRICS.time(PHASE_METRIC, phase='enrich_write'):
+            self.database.save_car_details(batch)
+
+    def run(self, limit: int = None) -> dict:
+        """
+        Enrichit les voitures à traiter (au plus `limit`)
+        Retourne les compteurs {'queued', 'done', 'failed'}
+        """
+        cars = self.database.get_cars_to_enrich(self.max_attempts, limit)
+        totals = {'queued': len(cars), 'done': 0, 'failed': 0}
+        if not cars:
+            print("Aucune voiture à enrichir")
+            return totals
+
+        rate = f"{self.rate:g} requêtes/s par site" if self.rate > 0 else "sans limite de débit"
+        print(f"Enrichissement de {len(cars)} voitures nouvelles ou modifiées ({self.workers} threads, {rate})")
+        start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='enrich')
+        remaining = iter(cars)
+        pending = set()
+        batch = []
+        try:
+            while True:
+                # Garder au plus 2 × workers récupérations en attente
+                for car in remaining:
+                    pending.add(executor.submit(self.fetch, *car))
+                    if len(pending) >= 2 * self.workers:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    self._collect(future.result(), batch, totals)
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+        finally:
+            # Ctrl-C : abandonner les récupérations non commencées, écrire les résultats obtenus
+            executor.shutdown(wait=True, cancel_futures=True)
+            for future in pending:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    self._collect(future.result(), batch, totals)
+            self._write(batch)
+
+        elapsed = time.perf_counter() - start
+        print(f"=== ENRICHISSEMENT ({elapsed:.2f} s) ===")
+        print(f"Pages de détail récupérées: {totals['done']}")
+        print(f"Pages en erreur: {totals['failed']}")
+        print(f"Débit: {(totals['done'] + totals['failed']) / elapsed:.1f} pages/s")
+        duplicates = self.database.get_vin_duplicates()
+        if duplicates:
+            print(f"VIN publiés sous plusieurs URL: {len(duplicates)}")
+        return totals
+
+    def close(self):
+        """Ferme le client HTTP"""
+        self.client.close()
@@ -3,112 +3,199 @@ Extracteur de données pour les pages web
 """
 
 import re
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from .models import Car
 
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+def _class_xpath(tag: str, class_name: str) -> str:
+    """Expression XPath d'un élément portant la classe CSS donnée (comme class_= de BeautifulSoup)"""
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+# Expressions XPath précompilées pour le moteur lxml
+if LXML_AVAILABLE:
+    XPATH_CAR_ELEMENTS = etree.XPath("//" + _class_xpath("a", "promotion-item"))
+    XPATH_METAS = {
+        itemprop: etree.XPath(f"(.//meta[@itemprop='{itemprop}'])[1]")
+        for itemprop in ('brand', 'model', 'vehicleModelDate', 'price', 'vehicleIdentificationNumber')
+    }
+    XPATH_KM_BLOCK = etree.XPath("(.//" + _class_xpath("div", "km-block") + ")[1]")
+    XPATH_DISTANCE_CONTAINER = etree.XPath("(.//" + _class_xpath("div", "distance-container") + ")[1]")
+    XPATH_OPTION_ITEMS = etree.XPath("(.//" + _class_xpath("div", "option-container") + ")[1]//li")
+    XPATH_OVERLAY_GOUV_REBATE = etree.XPath("(.//" + _class_xpath("div", "overlay-gouv-rebate") + ")[1]")
+
+KM_PATTERN = re.compile(r'(\d+)')
+
+# Le filtre SoupStrainer voit l'attribut class brut ("promotion-item featured")
+PROMOTION_ITEM_CLASS = re.compile(r'(^|\s)promotion-item(\s|$)')
+
 
 class AlbiPageExtractor:
     """
     Extractor pour Albi.ca
+
+    Moteurs d'extraction (paramètre `backend`) :
+    - 'html.parser' : BeautifulSoup sur tout le document (par défaut)
+    - 'strainer' : BeautifulSoup limité aux sous-arbres a.promotion-item (SoupStrainer)
+    - 'lxml' : lxml avec expressions XPath précompilées (nécessite le paquet lxml)
+    Tous les moteurs produisent les mêmes objets Car.
     """
-    def __init__(self, html: str, base_url: str):
+    BACKENDS = ('html.parser', 'strainer', 'lxml')
+
+    def __init__(self, html: str, base_url: str, backend: str = 'html.parser'):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Moteur d'extraction inconnu: {backend} (attendu: {', '.join(self.BACKENDS)})")
+        if backend == 'lxml' and not LXML_AVAILABLE:
+            raise ImportError("Le moteur 'lxml' nécessite le paquet lxml (pip install lxml)")
+
         self.html = html
         self.base_url = base_url
-        self.soup = BeautifulSoup(self.html, "html.parser")
-        self.cars = self.parse_cars()
-        
+        self.backend = backend
+        self.soup = None
+        if backend == 'lxml':
+            self.cars = self.parse_cars_lxml()
+        else:
+            parse_only = SoupStrainer('a', class_=PROMOTION_ITEM_CLASS) if backend == 'strainer' else None
+            self.soup = BeautifulSoup(self.html, "html.parser", parse_only=parse_only)
+            self.cars = self.parse_cars()
+
     def parse_cars(self):
         """
         Parse les voitures à partir du HTML
         """
         cars = []
-        
+
         # Chercher tous les éléments de voiture (liens avec classe promotion-item)
         car_elements = self.soup.find_all('a', class_='promotion-item')
-        
+
         for car_element in car_elements:
             try:
-                # Extraire l'URL de détail
-                detail_url = car_element.get('href', '')
-                # Si l'URL est relative, la rendre absolue
-                if detail_url.startswith('/'):
-                    detail_url = f"{self.base_url}{detail_url}"
-                
                 # Extraire les métadonnées structurées
-                name_meta = car_element.find('meta', {'itemprop': 'name'})
                 brand_meta = car_element.find('meta', {'itemprop': 'brand'})
                 model_meta = car_element.find('meta', {'itemprop': 'model'})
                 year_meta = car_element.find('meta', {'itemprop': 'vehicleModelDate'})
-                config_meta = car_element.find('meta', {'itemprop': 'vehicleConfiguration'})
                 vin_meta = car_element.find('meta', {'itemprop': 'vehicleIdentificationNumber'})
-                
+
                 # Extraire le prix
                 price_meta = car_element.find('meta', {'itemprop': 'price'})
-                price_currency_meta = car_element.find('meta', {'itemprop': 'priceCurrency'})
-                
+
                 # Extraire le kilométrage
                 km_block = car_element.find('div', class_='km-block')
-                
+
                 # Extraire la localisation
                 distance_container = car_element.find('div', class_='distance-container')
-                
+
                 # Extraire les options
                 option_container = car_element.find('div', class_='option-container')
-                
-                # Traitement des données
-                make = brand_meta.get('content', '') if brand_meta else ''
-                model = model_meta.get('content', '') if model_meta else ''
-                year = int(year_meta.get('content', 0)) if year_meta else 0
-                price = int(price_meta.get('content', 0)) if price_meta else 0
-                
-                # Extraire le kilométrage
-                mileage = 0
-                if km_block:
-                    km_text = km_block.get_text(strip=True)
-                    # Extraire les chiffres du texte "62318 km"
-                    km_match = re.search(r'(\d+)', km_text)
-                    if km_match:
-                        mileage = int(km_match.group(1))
-                
-                # Extraire la localisation
-                location = ''
-                if distance_container:
-                    location_text = distance_container.get_text(strip=True)
-                    # Nettoyer le texte de localisation
-                    location = location_text.replace('\n', ' ').strip()
-                
-                # Extraire les options
-                options = []
-                if option_container:
-                    option_items = option_container.find_all('li')
-                    options = [item.get_text(strip=True) for item in option_items]
-                
-                # Déterminer le type de carburant
-                fuel = 'Essence'  # Par défaut
-                # Chercher l'indicateur de véhicule électrique
+
+                # Indicateur de véhicule électrique
                 overlay_gouv_rebate = car_element.find('div', class_='overlay-gouv-rebate')
-                if overlay_gouv_rebate:
-                    overlay_text = overlay_gouv_rebate.get_text(strip=True)
-                    if 'Véhicule électrique' in overlay_text or 'électrique' in overlay_text.lower():
-                        fuel = 'Électrique'
-                
-                # Créer l'objet Car
-                car = Car(
-                    make=make,
-                    model=model,
-                    year=year,
-                    price=price,
-                    mileage=mileage,
-                    fuel=fuel,
-                    location=location,
-                    options=options,
-                    detail_url=detail_url
-                )
-                
-                cars.append(car)
-                
+
+                cars.append(self.build_car(
+                    href=car_element.get('href', ''),
+                    make=brand_meta.get('content', '') if brand_meta else '',
+                    model=model_meta.get('content', '') if model_meta else '',
+                    year=year_meta.get('content', 0) if year_meta else 0,
+                    price=price_meta.get('content', 0) if price_meta else 0,
+                    km_text=km_block.get_text(strip=True) if km_block else None,
+                    location_text=distance_container.get_text(strip=True) if distance_container else None,
+                    options=[item.get_text(strip=True) for item in option_container.find_all('li')]
+                    if option_container else [],
+                    overlay_text=overlay_gouv_rebate.get_text(strip=True) if overlay_gouv_rebate else None,
+                    vin=vin_meta.get('content') if vin_meta else None
+                ))
+
+            except Exception as e:
+                print(f"Erreur lors du parsing d'une voiture: {e}")
+                continue
+
+        return cars
+
+    def parse_cars_lxml(self):
+        """
+        Parse les voitures avec lxml et les expressions XPath précompilées
+        """
+        cars = []
+        tree = lxml.html.fromstring(self.html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+
+        for car_element in XPATH_CAR_ELEMENTS(tree):
+            try:
+                metas = {itemprop: xpath(car_element) for itemprop, xpath in XPATH_METAS.items()}
+                km_block = XPATH_KM_BLOCK(car_element)
+                distance_container = XPATH_DISTANCE_CONTAINER(car_element)
+                overlay_gouv_rebate = XPATH_OVERLAY_GOUV_REBATE(car_element)
+
+                cars.append(self.build_car(
+                    href=car_element.get('href', ''),
+                    make=metas['brand'][0].get('content', '') if metas['brand'] else '',
+                    model=metas['model'][0].get('content', '') if metas['model'] else '',
+                    year=metas['vehicleModelDate'][0].get('content', 0) if metas['vehicleModelDate'] else 0,
+                    price=metas['price'][0].get('content', 0) if metas['price'] else 0,
+                    km_text=self._lxml_text(km_block[0]) if km_block else None,
+                    location_text=self._lxml_text(distance_container[0]) if distance_container else None,
+                    options=[self._lxml_text(item) for item in XPATH_OPTION_ITEMS(car_element)],
+                    overlay_text=self._lxml_text(overlay_gouv_rebate[0]) if overlay_gouv_rebate else None,
+                    vin=metas['vehicleIdentificationNumber'][0].get('content')
+                    if metas['vehicleIdentificationNumber'] else None
+                ))
+
             except Exception as e:
                 print(f"Erreur lors du parsing d'une voiture: {e}")
                 continue
-        
-        return cars 
\ No newline at end of file
+
+        return cars
+
+    @staticmethod
+    def _lxml_text(element) -> str:
+        """Équivalent lxml de get_text(strip=True) de BeautifulSoup"""
+        return ''.join(text.strip() for text in element.itertext())
+
+    def build_car(self, href: str, make: str, model: str, year, price, km_text: str,
+                  location_text: str, options: list, overlay_text: str, vin: str = None) -> Car:
+        """
+        Construit l'objet Car à partir des valeurs brutes d'une annonce
+        (commun à tous les moteurs d'extraction)
+        """
+        # Si l'URL est relative, la rendre absolue
+        detail_url = href
+        if detail_url.startswith('/'):
+            detail_url = f"{self.base_url}{detail_url}"
+
+        # Extraire les chiffres du texte "62318 km"
+        mileage = 0
+        if km_text is not None:
+            km_match = KM_PATTERN.search(km_text)
+            if km_match:
+                mileage = int(km_match.group(1))
+
+        # Nettoyer le texte de localisation
+        location = ''
+        if location_text is not None:
+            location = location_text.replace('\n', ' ').strip()
+
+        # Déterminer le type de carburant
+        fuel = 'Essence'  # Par défaut
+        if overlay_text is not None:
+            if 'Véhicule électrique' in overlay_text or 'électrique' in overlay_text.lower():
+                fuel = 'Électrique'
+
+        return Car(
+            make=make,
+            model=model,
+            year=int(year),
+            price=int(price),
+            mileage=mileage,
+            fuel=fuel,
+            location=location,
+            options=options,
+            detail_url=detail_url,
+            # VIN publié sur la fiche (meta vehicleIdentificationNumber), None s'il est absent ou vide
+            vin=(vin.strip() or None) if vin else None
+        )
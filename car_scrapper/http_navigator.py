@@ -0,0 +1,118 @@
+"""
+Navigateur HTTP sans navigateur pour le scraping
+"""
+
+import time
+import httpx
+from .navigator import AlbiNavigator, parse_page_infos
+from .models import PageInfo
+
+try:
+    import h2  # noqa: F401  (active HTTP/2 dans httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class AlbiHttpNavigator:
+    """
+    Navigateur HTTP pour Albi.ca
+
+    Même interface que AlbiNavigator, mais les pages d'inventaire sont
+    récupérées avec un client HTTP à connexions persistantes (HTTP/2 si le
+    paquet h2 est installé) : les annonces sont présentes dans le HTML rendu
+    côté serveur. Si une page ne contient pas le balisage attendu, elle est
+    rechargée avec Playwright (navigateur lancé seulement à ce moment-là).
+    """
+    # Marqueurs du HTML d'une page d'inventaire complète
+    EXPECTED_MARKERS = ('promotion-item', 'InventoryPaging')
+
+    USER_AGENT = (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    )
+
+    def __init__(self, base_url: str = AlbiNavigator.BASE_URL, timeout: float = 30.0,
+                 fallback: bool = True, max_connections: int = 10, browser_options: dict = None):
+        self.base_url = base_url
+        self.fallback = fallback
+        # Réglages du navigateur Playwright de repli (headless, user_data_dir, cdp_endpoint)
+        self.browser_options = browser_options or {}
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.client = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"User-Agent": self.USER_AGENT, "Accept-Language": "fr-CA,fr;q=0.9"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self.html = ""
+        self.timings = []
+        self.fallback_count = 0
+        self._browser_navigator = None
+
+    def get_inventory_url(self, page_number: int):
+        return f"{self.base_url}/fr/inventaire/?page={page_number}"
+
+    def get_html(self):
+        return self.html
+
+    def has_expected_markup(self, html: str) -> bool:
+        """Vérifie que le HTML contient les annonces et la pagination"""
+        return all(marker in html for marker in self.EXPECTED_MARKERS)
+
+    def get_page_infos(self) -> PageInfo:
+        """
+        Récupère les informations de pagination
+        """
+        try:
+            # Aucune page chargée : utiliser la première page d'inventaire
+            if not self.html:
+                self.go_to_page(self.get_inventory_url(1))
+            return parse_page_infos(self.html)
+
+        except Exception as e:
+            print(f"Erreur lors de la récupération des informations de pagination: {e}")
+            return PageInfo(current_page=1, total_pages=1)
+
+    def go_to_page(self, page_url: str):
+        start = time.perf_counter()
+        try:
+            response = self.client.get(page_url)
+            response.raise_for_status()
+            html = response.text
+        except httpx.HTTPError as e:
+            print(f"Erreur HTTP sur {page_url}: {e}")
+            html = ""
+
+        # Repli sur Playwright si le balisage attendu est absent
+        if self.fallback and not self.has_expected_markup(html):
+            self.fallback_count += 1
+            navigator = self._get_browser_navigator()
+            navigator.go_to_page(page_url)
+            html = navigator.get_html()
+
+        self.html = html
+        self.timings.append({
+            'page_url': page_url,
+            'total_ms': round((time.perf_counter() - start) * 1000, 1),
+        })
+
+    def _get_browser_navigator(self) -> AlbiNavigator:
+        """Lance le navigateur Playwright à la première page qui en a besoin"""
+        if self._browser_navigator is None:
+            self._browser_navigator = AlbiNavigator(base_url=self.base_url, **self.browser_options)
+        return self._browser_navigator
+
+    def clone(self) -> 'AlbiHttpNavigator':
+        """Nouveau navigateur de mêmes réglages (récupération en parallèle)"""
+        options = {key: value for key, value in self.browser_options.items() if key != 'user_data_dir'}
+        return AlbiHttpNavigator(base_url=self.base_url, timeout=self.timeout, fallback=self.fallback,
+                                 max_connections=self.max_connections, browser_options=options)
+
+    def close(self):
+        """Ferme le client HTTP et, s'il a été lancé, le navigateur de repli"""
+        self.client.close()
+        if self._browser_navigator is not None:
+            self._browser_navigator.close()
@@ -0,0 +1,237 @@
+"""
+Instrumentation légère : compteurs et histogrammes de latence
+"""
+
+import functools
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+
+# Bornes supérieures des classes des histogrammes de latence (secondes)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Noms des métriques
+PHASE_METRIC = 'car_scrapper_scrape_phase_seconds'
+PAGES_METRIC = 'car_scrapper_scrape_pages_total'
+CARS_METRIC = 'car_scrapper_scrape_cars_total'
+DETAILS_METRIC = 'car_scrapper_enrich_details_total'
+QUERY_METRIC = 'car_scrapper_db_query_seconds'
+REQUEST_METRIC = 'car_scrapper_http_request_seconds'
+REQUESTS_METRIC = 'car_scrapper_http_requests_total'
+
+# Description des métriques (ligne HELP du format Prometheus)
+DESCRIPTIONS = {
+    PHASE_METRIC: "Durée de chaque phase du scraping",
+    PAGES_METRIC: "Pages traitées par le scraping, par résultat",
+    CARS_METRIC: "Voitures traitées par le scraping, par résultat",
+    DETAILS_METRIC: "Pages de détail récupérées par l'enrichissement, par résultat",
+    QUERY_METRIC: "Durée des méthodes SQL de CarDatabase, par méthode",
+    REQUEST_METRIC: "Durée des requêtes HTTP de l'API, par route",
+    REQUESTS_METRIC: "Requêtes HTTP de l'API, par route et statut",
+}
+
+# Contexte vide partagé, retourné par time() quand les métriques sont désactivées
+NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    """Histogramme cumulatif à classes fixes (nombre, somme et maximum des valeurs)"""
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        index = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estime le quantile q (0 à 1) par interpolation linéaire dans sa classe"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, count in enumerate(self.counts):
+            upper = self.buckets[index] if index < len(self.buckets) else self.max
+            if count and seen + count >= rank:
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = upper
+        return self.max
+
+
+class _Timer:
+    """Contexte qui enregistre sa durée dans un histogramme"""
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Registre des compteurs et histogrammes, identifiés par un nom et des
+    étiquettes (ex: phase="get_html")
+
+    Désactivé par défaut : chaque point de mesure se réduit alors à un test
+    de `enabled`, sans lecture de l'horloge ni verrou.
+    """
+    def __init__(self):
+        self.enabled = False
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Incrémente un compteur"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Enregistre une durée dans un histogramme"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def time(self, name: str, **labels):
+        """Contexte mesurant la durée du bloc : `with METRICS.time('...', phase='x'):`"""
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self, name, labels)
+
+    @staticmethod
+    def format_labels(labels: tuple, extra: tuple = ()) -> str:
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (
+            (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for name, value in pairs
+        )
+        return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+    def render_prometheus(self) -> str:
+        """Exporte les métriques au format texte de Prometheus"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            lines = []
+            declared = set()
+
+            def declare(name: str, metric_type: str):
+                if name not in declared:
+                    declared.add(name)
+                    lines.append(f"# HELP {name} {DESCRIPTIONS.get(name, name)}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+
+            for (name, labels), value in counters:
+                declare(name, 'counter')
+                lines.append(f"{name}{self.format_labels(labels)} {value}")
+
+            for (name, labels), histogram in histograms:
+                declare(name, 'histogram')
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self.format_labels(labels, (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{self.format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{self.format_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def report(self) -> dict:
+        """
+        Résumé JSON : valeur des compteurs et, pour chaque histogramme, nombre,
+        durée totale, moyenne, maximum et centiles estimés (millisecondes)
+        """
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+
+            histograms = {}
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                histograms.setdefault(name, []).append({
+                    'labels': dict(labels),
+                    'count': histogram.count,
+                    'total_s': round(histogram.sum, 4),
+                    'mean_ms': round(histogram.sum / histogram.count * 1000, 3) if histogram.count else 0.0,
+                    'p50_ms': round(histogram.quantile(0.50) * 1000, 3),
+                    'p95_ms': round(histogram.quantile(0.95) * 1000, 3),
+                    'p99_ms': round(histogram.quantile(0.99) * 1000, 3),
+                    'max_ms': round(histogram.max * 1000, 3),
+                })
+        return {'counters': counters, 'histograms': histograms}
+
+    def write_report(self, path: str, **extra):
+        """Écrit le résumé JSON (voir report), complété par `extra`, dans un fichier"""
+        report = self.report()
+        report.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+# Registre partagé par le scraper, la base de données et l'API
+METRICS = MetricsRegistry()
+
+
+def timed_method(metric: str):
+    """
+    Décorateur de méthode : enregistre la durée de chaque appel dans
+    l'histogramme `metric`, avec le nom de la méthode en étiquette
+    """
+    def decorator(function):
+        method = function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                METRICS.observe(metric, time.perf_counter() - start, method=method)
+        return wrapper
+    return decorator
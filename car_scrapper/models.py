@@ -2,6 +2,8 @@
 Modèles de données pour le car scrapper
 """
 
+import hashlib
+import json
 from dataclasses import dataclass
 from typing import Optional
 
@@ -9,8 +11,13 @@ from typing import Optional
 class Car:
     """
     Classe représentant une voiture
+    `id` vaut None tant que la voiture n'est pas lue depuis la base
+    `vin` vaut None si la fiche d'inventaire ne le publie pas
     """
-    def __init__(self, make: str, model: str, year: int, price: int, mileage: int, fuel: str, location: str, options: list, detail_url: str = ""):
+    __slots__ = ('id', 'make', 'model', 'year', 'price', 'mileage', 'fuel', 'location', 'options', 'detail_url', 'vin')
+    
+    def __init__(self, make: str, model: str, year: int, price: int, mileage: int, fuel: str, location: str, options: list, detail_url: str = "", id: int = None, vin: str = None):
+        self.id = id
         self.make = make
         self.model = model
         self.year = year
@@ -20,12 +27,32 @@ class Car:
         self.location = location
         self.options = options
         self.detail_url = detail_url
+        self.vin = vin
     
     def __str__(self):
         return f"{self.year} {self.make} {self.model} ({self.fuel}) - ${self.price:,} - {self.mileage:,} km - {self.location} - URL: {self.detail_url}"
     
     def __repr__(self):
         return self.__str__()
+    
+    def fingerprint(self) -> str:
+        """
+        Empreinte des valeurs de l'annonce (hors detail_url et vin), pour
+        détecter une voiture inchangée sans comparer chaque champ
+        """
+        values = [self.make, self.model, self.year, self.price, self.mileage,
+                  self.fuel, self.location, self.options]
+        payload = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def listing_fingerprint(cars: list[Car]) -> str:
+    """
+    Empreinte d'une page d'inventaire : ensemble de ses annonces (URL et
+    valeurs), indépendamment de leur ordre d'affichage
+    """
+    entries = sorted(f"{car.detail_url}:{car.fingerprint()}" for car in cars)
+    return hashlib.sha1("\n".join(entries).encode('utf-8')).hexdigest()
 
 
 @dataclass
@@ -3,25 +3,130 @@ Navigateur web pour le scraping
 """
 
 import time
-from playwright.sync_api import sync_playwright
+from urllib.parse import urlparse
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 from bs4 import BeautifulSoup
 from .models import PageInfo
 
 
+def parse_page_infos(html: str) -> PageInfo:
+    """
+    Extrait les informations de pagination d'un HTML de page d'inventaire
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    
+    # Extraire la page courante
+    current_page_element = soup.find("span", {"id": "cph_ContainerLarger_pgr_Lower_ctl00_CurrentPageLabel"})
+    current_page = int(current_page_element.text) if current_page_element else 1
+    
+    # Extraire le nombre total de pages
+    total_pages_element = soup.find("span", {"id": "cph_ContainerLarger_pgr_Lower_ctl00_TotalPagesLabel"})
+    total_pages = int(total_pages_element.text) if total_pages_element else 1
+    
+    return PageInfo(
+        current_page=current_page,
+        total_pages=total_pages,
+    )
+
+
+def should_block_request(resource_type: str, url: str) -> bool:
+    """
+    Indique si une requête est inutile au scraping (images, polices, médias,
+    outils d'analyse tiers) et peut être bloquée
+    """
+    if resource_type in AlbiNavigator.BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlparse(url).hostname or ''
+    return any(host == blocked or host.endswith(f".{blocked}") for blocked in AlbiNavigator.BLOCKED_HOSTS)
+
+
 class AlbiNavigator:
     """
     Navigateur pour Albi.ca
+    
+    Une page est considérée prête dès que les annonces et la pagination sont
+    présentes dans le DOM (au plus `ready_timeout` ms), sans attendre la fin de
+    l'activité réseau. Les ressources inutiles au scraping sont bloquées.
+    La durée de chaque chargement est conservée dans `timings`.
+    
+    Chromium n'est lancé qu'au premier accès à `page` (durée dans `launch_ms`),
+    sans interface par défaut. Avec `user_data_dir`, le profil (cache HTTP,
+    cookies) est conservé d'un lancement à l'autre ; avec `cdp_endpoint`, le
+    navigateur se connecte à un navigateur permanent (voir browser_daemon)
+    au lieu d'en lancer un, et prend alors le pas sur `user_data_dir`.
     """
-    def __init__(self):
-        self.base_url = "https://www.albioccasion.com"
+    BASE_URL = "https://www.albioccasion.com"
+    
+    # Sélecteurs attendus, dans l'ordre, avant de lire une page d'inventaire
+    READY_SELECTORS = ("a.promotion-item", ".InventoryPaging > .pagination-container")
+    
+    # Ressources bloquées : types Playwright et domaines d'analyse tiers
+    BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+    BLOCKED_HOSTS = (
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+        "facebook.net", "facebook.com", "hotjar.com", "clarity.ms", "bing.com", "tiktok.com",
+    )
+    
+    def __init__(self, base_url: str = BASE_URL, ready_timeout: int = 15000, block_resources: bool = True,
+                 headless: bool = True, user_data_dir: str = None, cdp_endpoint: str = None):
+        self.base_url = base_url
+        self.ready_timeout = ready_timeout
+        self.block_resources = block_resources
+        self.headless = headless
+        self.user_data_dir = user_data_dir
+        self.cdp_endpoint = cdp_endpoint
+        self.timings = []
+        self.blocked_requests = 0
+        self.launch_ms = None
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self._page = None
+    
+    @property
+    def page(self):
+        """Page Playwright, le navigateur étant lancé au premier accès"""
+        if self._page is None:
+            self._launch()
+        return self._page
+    
+    def _launch(self):
+        """Démarre Playwright et ouvre une page (navigateur lancé, profil persistant ou connexion)"""
+        start = time.perf_counter()
         self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(headless=False)
-        self.page = self.browser.new_page()
-        self.page.goto(self.base_url)
-        # Attendre que la page soit complètement chargée
-        self.page.wait_for_load_state("networkidle")
-        # Attendre un peu plus pour s'assurer que tous les scripts sont exécutés
-        self.page.wait_for_timeout(3000)
+        chromium = self.playwright.chromium
+        if self.cdp_endpoint:
+            # Le contexte par défaut du navigateur permanent partage son profil
+            self.browser = chromium.connect_over_cdp(self.cdp_endpoint)
+            self.context = self.browser.contexts[0] if self.browser.contexts else self.browser.new_context()
+            page = self.context.new_page()
+        elif self.user_data_dir:
+            self.context = chromium.launch_persistent_context(self.user_data_dir, headless=self.headless)
+            page = self.context.pages[0] if self.context.pages else self.context.new_page()
+        else:
+            self.browser = chromium.launch(headless=self.headless)
+            page = self.browser.new_page()
+        if self.block_resources:
+            page.route("**/*", self._route_request)
+        self._page = page
+        self.launch_ms = round((time.perf_counter() - start) * 1000, 1)
+    
+    def clone(self) -> 'AlbiNavigator':
+        """
+        Nouveau navigateur de mêmes réglages (récupération en parallèle)
+        Un profil persistant ne s'ouvre qu'une fois : le clone n'en a pas
+        """
+        return AlbiNavigator(base_url=self.base_url, ready_timeout=self.ready_timeout,
+                             block_resources=self.block_resources, headless=self.headless,
+                             cdp_endpoint=self.cdp_endpoint)
+    
+    def _route_request(self, route):
+        """Bloque les ressources inutiles, laisse passer les autres"""
+        if should_block_request(route.request.resource_type, route.request.url):
+            self.blocked_requests += 1
+            route.abort()
+        else:
+            route.continue_()
 
     def get_inventory_url(self, page_number: int):
         return f"{self.base_url}/fr/inventaire/?page={page_number}"
@@ -34,38 +139,64 @@ class AlbiNavigator:
         Récupère les informations de pagination
         """
         try:
-            # Attendre que la page soit complètement chargée
-            self.page.wait_for_load_state("networkidle")
+            # Aucune page chargée : utiliser la première page d'inventaire
+            if self.page.url == "about:blank":
+                self.go_to_page(self.get_inventory_url(1))
             
-            # Attendre que l'élément de pagination soit visible
-            self.page.wait_for_selector(".InventoryPaging > .pagination-container", timeout=10000)
+            # Attendre que l'élément de pagination soit présent
+            self.page.wait_for_selector(".InventoryPaging > .pagination-container",
+                                        state="attached", timeout=self.ready_timeout)
             
             # Récupérer le HTML de la pagination (utiliser le premier élément)
             pagination_html = self.page.locator(".InventoryPaging > .pagination-container").first.inner_html()
             
             # Parser le HTML avec BeautifulSoup
-            soup = BeautifulSoup(pagination_html, "html.parser")
-            
-            # Extraire la page courante
-            current_page_element = soup.find("span", {"id": "cph_ContainerLarger_pgr_Lower_ctl00_CurrentPageLabel"})
-            current_page = int(current_page_element.text) if current_page_element else 1
-            
-            # Extraire le nombre total de pages
-            total_pages_element = soup.find("span", {"id": "cph_ContainerLarger_pgr_Lower_ctl00_TotalPagesLabel"})
-            total_pages = int(total_pages_element.text) if total_pages_element else 1
-        
-            return PageInfo(
-                current_page=current_page,
-                total_pages=total_pages,
-            )
+            return parse_page_infos(pagination_html)
             
         except Exception as e:
             print(f"Erreur lors de la récupération des informations de pagination: {e}")
             return PageInfo(current_page=1, total_pages=1)
     
+    def wait_until_ready(self):
+        """
+        Attend que les sélecteurs de READY_SELECTORS soient présents,
+        dans la limite de ready_timeout ms au total
+        """
+        deadline = time.perf_counter() + self.ready_timeout / 1000
+        for selector in self.READY_SELECTORS:
+            remaining_ms = max(1, (deadline - time.perf_counter()) * 1000)
+            try:
+                self.page.wait_for_selector(selector, state="attached", timeout=remaining_ms)
+            except PlaywrightTimeoutError:
+                print(f"Page incomplète après {self.ready_timeout} ms (sélecteur {selector} absent)")
+                return
+    
     def go_to_page(self, page_url: str):
         # Aller à la page suivante
-        current_url = self.page.url
-        self.page.goto(page_url)
-        self.page.wait_for_load_state("networkidle")
-        self.page.wait_for_timeout(3000) 
\ No newline at end of file
+        start = time.perf_counter()
+        self.page.goto(page_url, wait_until="domcontentloaded")
+        navigated = time.perf_counter()
+        self.wait_until_ready()
+        ready = time.perf_counter()
+        
+        self.timings.append({
+            'page_url': page_url,
+            'navigation_ms': round((navigated - start) * 1000, 1),
+            'ready_ms': round((ready - navigated) * 1000, 1),
+            'total_ms': round((ready - start) * 1000, 1),
+        })
+    
+    def close(self):
+        """Ferme le navigateur et Playwright (rien à faire s'il n'a pas été lancé)"""
+        if self.playwright is None:
+            return
+        if self.cdp_endpoint:
+            # Fermer seulement notre page, puis se déconnecter du navigateur permanent
+            self._page.close()
+            self.browser.close()
+        elif self.user_data_dir:
+            self.context.close()
+        else:
+            self.browser.close()
+        self.playwright.stop()
+        self.playwright = self.browser = self.context = self._page = None
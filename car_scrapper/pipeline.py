@@ -0,0 +1,351 @@
+"""
+Pipeline de scraping en étapes : récupération → extraction → écriture
+"""
+
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .database import CarDatabase
+from .extractor import AlbiPageExtractor
+from .metrics import CARS_METRIC, METRICS, PAGES_METRIC, PHASE_METRIC
+from .models import Car, listing_fingerprint
+from .snapshots import SnapshotStore
+
+
+# Marqueur de fin de flux entre deux étapes
+END = None
+
+
+def extract_page(html: str, base_url: str, extractor_backend: str) -> tuple[list[Car], float]:
+    """
+    Extrait les voitures d'une page (exécuté dans un processus du pool)
+    Retourne (voitures, durée de l'extraction en secondes)
+    """
+    start = time.perf_counter()
+    cars = AlbiPageExtractor(html, base_url, backend=extractor_backend).cars
+    return cars, time.perf_counter() - start
+
+
+def ignore_interrupt():
+    """Les processus d'extraction ignorent Ctrl-C : l'arrêt est piloté par le processus principal"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class StageCounter:
+    """
+    Compteurs d'une étape du pipeline : éléments traités, temps de travail
+    et temps passé bloqué par l'étape suivante (contre-pression)
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy_s = 0.0
+        self.blocked_s = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items: int, busy_s: float, blocked_s: float = 0.0):
+        with self._lock:
+            self.items += items
+            self.busy_s += busy_s
+            self.blocked_s += blocked_s
+
+    def report(self, elapsed_s: float) -> str:
+        rate = self.items / elapsed_s if elapsed_s else 0.0
+        return (f"{self.name:<12} {self.items:>6} éléments  {rate:>8.1f} /s  "
+                f"travail {self.busy_s:>6.2f} s  bloqué {self.blocked_s:>6.2f} s")
+
+
+class ScrapePipeline:
+    """
+    Pipeline de scraping à files bornées
+
+    - récupération : `fetch_workers` navigateurs chargent les pages (le premier
+      dans le thread appelant, les autres dans des threads dédiés)
+    - extraction : un pool de processus exécute AlbiPageExtractor (CPU)
+    - écriture : un seul thread regroupe les voitures en lots de `batch_size`
+      et les enregistre (une transaction par lot), avec les instantanés et
+      les empreintes de pages
+
+    Les files entre étapes sont bornées : une étape en retard bloque la
+    précédente au lieu d'accumuler les pages en mémoire. Sur Ctrl-C, plus
+    aucune page n'est chargée, les pages déjà récupérées sont extraites et
+    le dernier lot partiel est écrit avant de rendre la main.
+    Avec `run_id` (voir CarDatabase.create_crawl_run), le statut de chaque
+    page est enregistré comme point de reprise, dans la même transaction
+    que ses voitures.
+    L'arrêt anticipé (`incremental` et `stop_after`) est décidé par
+    l'écriture : le nombre de pages récupérées mais pas encore écrites est
+    alors limité à `stop_after`, pour ne pas charger des pages qui seront
+    jetées.
+    """
+    def __init__(self, database: CarDatabase, extractor_backend: str = "html.parser",
+                 snapshot_store: SnapshotStore = None, parse_workers: int = None, batch_size: int = 200,
+                 queue_size: int = 4, flush_interval: float = 1.0, incremental: bool = False,
+                 stop_after: int = 0, run_id: int = None):
+        self.database = database
+        self.extractor_backend = extractor_backend
+        self.snapshot_store = snapshot_store
+        self.parse_workers = parse_workers or multiprocessing.cpu_count()
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.incremental = incremental
+        self.stop_after = stop_after
+        self.run_id = run_id
+        self.counters = {name: StageCounter(name) for name in ('récupération', 'extraction', 'écriture')}
+        self.stop_event = threading.Event()
+        # Pages récupérées mais pas encore traitées par l'écriture (limitées avec l'arrêt anticipé)
+        self.in_flight = None
+        self.interrupted = False
+        self.stopped_early = False
+        self.elapsed_s = 0.0
+
+    def run(self, navigator, page_numbers: list[int], totals: dict, navigator_factory=None,
+            fetch_workers: int = 1) -> dict:
+        """
+        Fait passer les pages dans le pipeline et met à jour `totals`
+        (voir AlbiScraper.new_totals)
+        `navigator_factory` crée les navigateurs des threads de récupération
+        supplémentaires (nécessaire si fetch_workers > 1)
+        """
+        start = time.perf_counter()
+        pages_queue = queue.Queue()
+        for page_number in page_numbers:
+            pages_queue.put(page_number)
+
+        html_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        # L'arrêt anticipé suppose des pages traitées dans l'ordre
+        stop_after = self.stop_after if fetch_workers == 1 else 0
+        if self.incremental and stop_after:
+            self.in_flight = threading.BoundedSemaphore(stop_after)
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=ignore_interrupt
+        )
+        parser_thread = threading.Thread(target=self._parse_stage, args=(executor, html_queue, write_queue),
+                                         name="pipeline-extraction")
+        writer_thread = threading.Thread(target=self._write_stage, args=(write_queue, totals, stop_after),
+                                         name="pipeline-écriture")
+        fetch_threads = [
+            threading.Thread(target=self._fetch_thread, args=(navigator_factory, pages_queue, html_queue),
+                             name=f"pipeline-récupération-{i}")
+            for i in range(1, fetch_workers)
+        ]
+        parser_thread.start()
+        writer_thread.start()
+        for thread in fetch_threads:
+            thread.start()
+
+        try:
+            self._fetch_stage(navigator, pages_queue, html_queue)
+            for thread in fetch_threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.interrupted = True
+            self.stop_event.set()
+            print("\nInterruption : arrêt de la récupération, écriture des pages déjà récupérées...")
+            for thread in fetch_threads:
+                thread.join()
+        finally:
+            # Fin du flux : l'extraction puis l'écriture se vident avant de s'arrêter
+            html_queue.put(END)
+            parser_thread.join()
+            writer_thread.join()
+            executor.shutdown()
+            self.elapsed_s = time.perf_counter() - start
+
+        return totals
+
+    def _fetch_thread(self, navigator_factory, pages_queue: queue.Queue, html_queue: queue.Queue):
+        """Thread de récupération avec son propre navigateur"""
+        navigator = navigator_factory()
+        try:
+            self._fetch_stage(navigator, pages_queue, html_queue)
+        finally:
+            navigator.close()
+
+    def _fetch_stage(self, navigator, pages_queue: queue.Queue, html_queue: queue.Queue):
+        """Charge les pages de la file tant qu'il en reste et que l'arrêt n'est pas demandé"""
+        counter = self.counters['récupération']
+        while not self.stop_event.is_set():
+            if not self._acquire_slot():
+                return
+            try:
+                page_number = pages_queue.get_nowait()
+            except queue.Empty:
+                self._release_slot()
+                return
+
+            started = time.perf_counter()
+            try:
+                with METRICS.time(PHASE_METRIC, phase='go_to_page'):
+                    navigator.go_to_page(navigator.get_inventory_url(page_number))
+                with METRICS.time(PHASE_METRIC, phase='get_html'):
+                    html = navigator.get_html()
+            except Exception as e:
+                print(f"Erreur lors du chargement de la page {page_number}: {e}")
+                METRICS.inc(PAGES_METRIC, result='fetch_error')
+                self._mark_failed(page_number)
+                self._release_slot()
+                continue
+            fetched = time.perf_counter()
+
+            # File pleine : on attend que l'extraction rattrape son retard
+            html_queue.put((page_number, navigator.base_url, html))
+            counter.add(1, fetched - started, time.perf_counter() - fetched)
+
+    def _parse_stage(self, executor: ProcessPoolExecutor, html_queue: queue.Queue, write_queue: queue.Queue):
+        """
+        Soumet les pages au pool de processus et transmet les résultats à
+        l'écriture dans l'ordre de soumission (au plus 2 pages en cours par
+        processus, et pas plus que les pages autorisées avant l'écriture)
+        """
+        counter = self.counters['extraction']
+        pending = deque()
+        max_pending = self.parse_workers * 2
+        if self.in_flight is not None:
+            # Sinon l'extraction attendrait des pages que la récupération ne peut plus charger
+            max_pending = min(max_pending, self.stop_after)
+
+        def forward_oldest():
+            page_number, base_url, html, future, submitted = pending.popleft()
+            try:
+                cars, extract_s = future.result()
+            except Exception as e:
+                print(f"Erreur lors de l'extraction de la page {page_number}: {e}")
+                METRICS.inc(PAGES_METRIC, result='extract_error')
+                self._mark_failed(page_number)
+                self._release_slot()
+                return
+            # Durée mesurée dans le processus d'extraction (sans l'attente dans le pool)
+            METRICS.observe(PHASE_METRIC, extract_s, phase='extract')
+            extracted = time.perf_counter()
+            write_queue.put((page_number, base_url, html, cars))
+            counter.add(1, extracted - submitted, time.perf_counter() - extracted)
+
+        while True:
+            item = html_queue.get()
+            if item is END:
+                break
+            page_number, base_url, html = item
+            future = executor.submit(extract_page, html, base_url, self.extractor_backend)
+            pending.append((page_number, base_url, html, future, time.perf_counter()))
+            if len(pending) >= max_pending:
+                forward_oldest()
+
+        while pending:
+            forward_oldest()
+        write_queue.put(END)
+
+    def _write_stage(self, write_queue: queue.Queue, totals: dict, stop_after: int):
+        """
+        Regroupe les voitures des pages reçues en lots et les enregistre
+        Un lot est écrit quand il atteint batch_size voitures, quand aucune
+        page n'arrive pendant flush_interval secondes, ou en fin de flux
+        """
+        counter = self.counters['écriture']
+        batch = []
+        batch_pages = []
+        unchanged_streak = 0
+
+        def flush():
+            if not batch_pages:
+                return
+            started = time.perf_counter()
+            # Voitures, empreintes des pages et point de reprise dans une même transaction
+            with METRICS.time(PHASE_METRIC, phase='write'):
+                counts = self.database.save_pages(batch, batch_pages, run_id=self.run_id)
+            for key in ('inserted', 'updated', 'unchanged', 'errors'):
+                totals[key] += counts[key]
+                METRICS.inc(CARS_METRIC, counts[key], result=key)
+            if counts['errors']:
+                print(f"✗ Lot de {len(batch)} voitures: erreur lors de l'enregistrement")
+            else:
+                print(f"✓ Lot de {len(batch)} voitures ({len(batch_pages)} pages): {counts['inserted']} nouvelles, "
+                      f"{counts['updated']} mises à jour, {counts['unchanged']} inchangées")
+            counter.add(len(batch), time.perf_counter() - started)
+            batch.clear()
+            batch_pages.clear()
+
+        while True:
+            try:
+                item = write_queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                flush()
+                continue
+            if item is END:
+                break
+
+            page_number, base_url, html, cars = item
+            if self.snapshot_store is not None:
+                with METRICS.time(PHASE_METRIC, phase='snapshot'):
+                    self.snapshot_store.save(html, base_url, page_number)
+            totals['processed'] += len(cars)
+
+            fingerprint = listing_fingerprint(cars)
+            unchanged_page = bool(cars) and self.database.get_page_fingerprint(base_url, page_number) == fingerprint
+            unchanged_streak = unchanged_streak + 1 if unchanged_page else 0
+
+            if self.incremental and unchanged_page:
+                totals['unchanged'] += len(cars)
+                totals['unchanged_pages'] += 1
+                METRICS.inc(PAGES_METRIC, result='unchanged')
+                METRICS.inc(CARS_METRIC, len(cars), result='unchanged')
+                if self.run_id is not None:
+                    self.database.set_crawl_page_status(self.run_id, page_number, 'unchanged', fingerprint, len(cars))
+                print(f"= Page {page_number}: inchangée depuis le dernier passage ({len(cars)} voitures)")
+                if stop_after and unchanged_streak >= stop_after and not self.stop_event.is_set():
+                    print(f"Arrêt anticipé: {unchanged_streak} pages consécutives inchangées depuis le dernier passage")
+                    self.stopped_early = True
+                    self.stop_event.set()
+                self._release_slot()
+                continue
+
+            METRICS.inc(PAGES_METRIC, result='written')
+            batch.extend(cars)
+            batch_pages.append((base_url, page_number, fingerprint, len(cars)))
+            self._release_slot()
+            if len(batch) >= self.batch_size:
+                flush()
+
+        flush()
+
+    def _acquire_slot(self) -> bool:
+        """
+        Réserve une place pour une nouvelle page (attend que l'écriture en
+        libère une si le nombre de pages en cours est limité)
+        Retourne False si l'arrêt est demandé pendant l'attente
+        """
+        if self.in_flight is None:
+            return True
+        while not self.in_flight.acquire(timeout=0.1):
+            if self.stop_event.is_set():
+                return False
+        # Place libérée par la page qui a déclenché l'arrêt
+        if self.stop_event.is_set():
+            self.in_flight.release()
+            return False
+        return True
+
+    def _release_slot(self):
+        """Libère la place d'une page traitée (écrite, inchangée ou en échec)"""
+        if self.in_flight is not None:
+            self.in_flight.release()
+
+    def _mark_failed(self, page_number: int):
+        """Page en échec : elle sera reprise par --resume"""
+        if self.run_id is not None:
+            self.database.set_crawl_page_status(self.run_id, page_number, 'failed')
+
+    def print_stats(self):
+        """Affiche le débit de chaque étape"""
+        print(f"\n=== PIPELINE ({self.elapsed_s:.2f} s{', interrompu' if self.interrupted else ''}) ===")
+        for counter in self.counters.values():
+            print(counter.report(self.elapsed_s))
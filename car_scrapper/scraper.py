@@ -2,20 +2,38 @@
 Scraper principal pour les sites de vente de voitures
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from tabulate import tabulate
-from .models import Car
+from .models import Car, listing_fingerprint
 from .database import CarDatabase
 from .extractor import AlbiPageExtractor
+from .metrics import CARS_METRIC, METRICS, PAGES_METRIC, PHASE_METRIC
 from .navigator import AlbiNavigator
+from .crawler import AlbiConcurrentCrawler
+from .snapshots import SnapshotStore, read_snapshot
+from .enrichment import DetailEnricher
+from .pipeline import ScrapePipeline
+
+
+def extract_snapshot(snapshot_dir: str, snapshot: dict, extractor_backend: str) -> list[Car]:
+    """Relit un instantané et en extrait les voitures (exécuté dans un processus du pool)"""
+    html = read_snapshot(snapshot_dir, snapshot['content_hash'], snapshot['codec'])
+    return AlbiPageExtractor(html, snapshot['base_url'], backend=extractor_backend).cars
 
 
 class AlbiScraper:
     """
     Scraper pour Albi.ca
     """
-    def __init__(self, db_path: str = "cars.db"):
-        self.navigator = AlbiNavigator()
+    def __init__(self, db_path: str = "cars.db", navigator=None, extractor_backend: str = "html.parser",
+                 snapshot_dir: str = None):
+        # Navigateur Playwright par défaut, ou tout objet de même interface (ex: AlbiHttpNavigator)
+        self.navigator = navigator if navigator is not None else AlbiNavigator()
         self.database = CarDatabase(db_path)
+        # Moteur d'extraction (voir AlbiPageExtractor.BACKENDS)
+        self.extractor_backend = extractor_backend
+        # Instantanés HTML des pages récupérées (désactivés si snapshot_dir est None)
+        self.snapshot_store = SnapshotStore(snapshot_dir, self.database) if snapshot_dir else None
 
 
     def display_cars(self, cars: list[Car]):
@@ -48,56 +66,298 @@ class AlbiScraper:
             print(tabulate(card_data, tablefmt="simple", colalign=("right", "left")))
             print()
 
-    def scrap_from_page(self, start_page_number: int = 1, number_of_pages_to_scrap: int = 2):
-        # Vérifier si les exigences de scraping sont conformes avec le nombre de pages disponibles
-        page_info = self.navigator.get_page_infos()
-        total_pages = page_info.total_pages
-        
+    @staticmethod
+    def check_page_range(total_pages: int, start_page_number: int, number_of_pages_to_scrap: int) -> int:
+        """
+        Vérifie la plage de pages demandée par rapport au nombre de pages disponibles
+        Retourne le nombre de pages à scraper (0 si la plage est invalide)
+        """
         if total_pages == 0:
             print("Aucune page trouvée")
-            return
+            return 0
         
         if total_pages < start_page_number:
             print(f"Le numéro de page de départ ({start_page_number}) est supérieur au nombre total de pages ({total_pages})")
-            return
+            return 0
         
         if start_page_number + number_of_pages_to_scrap > total_pages:
             number_of_pages_to_scrap = total_pages - start_page_number + 1
             print(f"Le nombre de pages à scraper dépasse le nombre total de pages, {number_of_pages_to_scrap} pages seront scrapées")
         
-        # Scraper les pages suivantes
-        total_cars_processed = 0
-        total_cars_inserted = 0
-        total_cars_updated = 0
+        return number_of_pages_to_scrap
+    
+    @staticmethod
+    def new_totals() -> dict:
+        """Compteurs du résumé de scraping"""
+        return {'processed': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': 0, 'unchanged_pages': 0}
+    
+    def save_page(self, page_number: int, html: str, base_url: str, totals: dict, incremental: bool = False,
+                  run_id: int = None) -> bool:
+        """
+        Extrait les voitures d'une page et les enregistre avec l'empreinte de
+        la page (et son statut dans le scraping `run_id`) en une seule
+        transaction (voir CarDatabase.save_pages)
+        Le HTML est conservé dans le stockage d'instantanés s'il est activé
+        En mode incrémental, une page dont les annonces sont identiques à celles
+        du dernier passage n'est pas réécrite
+        Retourne True si la page est inchangée depuis le dernier passage
+        """
+        if self.snapshot_store is not None:
+            with METRICS.time(PHASE_METRIC, phase='snapshot'):
+                self.snapshot_store.save(html, base_url, page_number)
         
-        for i in range(start_page_number, start_page_number + number_of_pages_to_scrap):
-            page_url = self.navigator.get_inventory_url(i)
-            self.navigator.go_to_page(page_url)
-            content = self.navigator.get_html()
-            extractor = AlbiPageExtractor(content, self.navigator.base_url)
-            
-            # Sauvegarder les voitures dans la base de données
-            for car in extractor.cars:
-                total_cars_processed += 1
-                if self.database.car_exists(car.detail_url):
-                    if self.database.update_car(car):
-                        total_cars_updated += 1
-                        print(f"✓ Voiture mise à jour: {car.make} {car.model} ({car.fuel})")
-                    else:
-                        print(f"✗ Erreur lors de la mise à jour: {car.make} {car.model}")
-                else:
-                    if self.database.insert_car(car):
-                        total_cars_inserted += 1
-                        print(f"✓ Nouvelle voiture ajoutée: {car.make} {car.model} ({car.fuel})")
-                    else:
-                        print(f"✗ Erreur lors de l'insertion: {car.make} {car.model}")
-
-        # Afficher le résumé
+        with METRICS.time(PHASE_METRIC, phase='extract'):
+            extractor = AlbiPageExtractor(html, base_url, backend=self.extractor_backend)
+        totals['processed'] += len(extractor.cars)
+        
+        # Comparer l'empreinte de la page avec celle du dernier passage
+        fingerprint = listing_fingerprint(extractor.cars)
+        unchanged_page = bool(extractor.cars) and self.database.get_page_fingerprint(base_url, page_number) == fingerprint
+        
+        if incremental and unchanged_page:
+            totals['unchanged'] += len(extractor.cars)
+            totals['unchanged_pages'] += 1
+            METRICS.inc(PAGES_METRIC, result='unchanged')
+            METRICS.inc(CARS_METRIC, len(extractor.cars), result='unchanged')
+            if run_id is not None:
+                self.database.set_crawl_page_status(run_id, page_number, 'unchanged', fingerprint,
+                                                    len(extractor.cars))
+            print(f"= Page {page_number}: inchangée depuis le dernier passage ({len(extractor.cars)} voitures)")
+            return True
+        
+        with METRICS.time(PHASE_METRIC, phase='write'):
+            counts = self.database.save_pages(
+                extractor.cars, [(base_url, page_number, fingerprint, len(extractor.cars))], run_id=run_id
+            )
+        for key in ('inserted', 'updated', 'unchanged', 'errors'):
+            totals[key] += counts[key]
+            METRICS.inc(CARS_METRIC, counts[key], result=key)
+        METRICS.inc(PAGES_METRIC, result='written')
+        
+        if counts['errors']:
+            print(f"✗ Page {page_number}: erreur lors de l'enregistrement de {counts['errors']} voitures")
+            return False
+        
+        print(f"✓ Page {page_number}: {counts['inserted']} nouvelles, {counts['updated']} mises à jour, "
+              f"{counts['unchanged']} inchangées")
+        return unchanged_page
+    
+    def print_summary(self, totals: dict, timings: list = None):
+        """Affiche le résumé du scraping (et le temps de chargement par page si mesuré)"""
         print(f"\n=== RÉSUMÉ DU SCRAPING ===")
-        print(f"Voitures traitées: {total_cars_processed}")
-        print(f"Nouvelles voitures ajoutées: {total_cars_inserted}")
-        print(f"Voitures mises à jour: {total_cars_updated}")
+        print(f"Voitures traitées: {totals['processed']}")
+        print(f"Nouvelles voitures ajoutées: {totals['inserted']}")
+        print(f"Voitures mises à jour: {totals['updated']}")
+        print(f"Voitures inchangées: {totals['unchanged']}")
+        if totals['unchanged_pages']:
+            print(f"Pages inchangées (non réécrites): {totals['unchanged_pages']}")
+        if totals['errors']:
+            print(f"Voitures en erreur: {totals['errors']}")
         print(f"Total dans la base de données: {self.database.get_car_count()}")
+        if timings:
+            average_ms = sum(timing['total_ms'] for timing in timings) / len(timings)
+            slowest_ms = max(timing['total_ms'] for timing in timings)
+            print(f"Chargement des pages: {average_ms:.0f} ms en moyenne, {slowest_ms:.0f} ms au maximum "
+                  f"({len(timings)} pages)")
+    
+    def scrap_from_page(self, start_page_number: int = 1, number_of_pages_to_scrap: int = 2,
+                        incremental: bool = False, stop_after: int = 2, fetch_workers: int = 1,
+                        parse_workers: int = None, batch_size: int = 200):
+        """
+        Scrape les pages [start, start + n) avec le pipeline récupération →
+        extraction (pool de processus) → écriture par lots (voir ScrapePipeline)
+        En mode incrémental, les pages inchangées ne sont pas réécrites et le
+        scraping s'arrête après `stop_after` pages inchangées consécutives
+        (0 pour ne jamais s'arrêter avant la fin ; une seule récupération à la fois)
+        Les `fetch_workers - 1` navigateurs supplémentaires sont des clones
+        de celui du scraper (voir AlbiNavigator.clone)
+        Le scraping est enregistré dans crawl_run : s'il est interrompu,
+        resume_last_run reprend les pages restantes
+        """
+        # Vérifier si les exigences de scraping sont conformes avec le nombre de pages disponibles
+        page_info = self.navigator.get_page_infos()
+        number_of_pages_to_scrap = self.check_page_range(
+            page_info.total_pages, start_page_number, number_of_pages_to_scrap
+        )
+        if not number_of_pages_to_scrap:
+            return
+        
+        page_numbers = list(range(start_page_number, start_page_number + number_of_pages_to_scrap))
+        params = {
+            'start_page': start_page_number,
+            'pages': number_of_pages_to_scrap,
+            'incremental': incremental,
+            'stop_after': stop_after,
+            'extractor': self.extractor_backend,
+        }
+        run_id = self.database.create_crawl_run(self.navigator.base_url, page_numbers, params)
+        print(f"Scraping n°{run_id}: pages {page_numbers[0]} à {page_numbers[-1]}")
+        self._run_pages(run_id, page_numbers, incremental, stop_after, fetch_workers, parse_workers, batch_size)
+    
+    def resume_last_run(self, fetch_workers: int = 1, parse_workers: int = None, batch_size: int = 200) -> bool:
+        """
+        Reprend le dernier scraping s'il n'est pas terminé : seules les pages
+        jamais traitées ou en erreur sont récupérées, avec les paramètres
+        d'origine (mode incrémental, arrêt anticipé)
+        Retourne False s'il n'y a rien à reprendre
+        """
+        run = self.database.get_last_crawl_run()
+        if run is None or run['status'] == 'completed':
+            print("Aucun scraping à reprendre")
+            return False
+        if run['base_url'] != self.navigator.base_url:
+            print(f"Le dernier scraping portait sur {run['base_url']}, pas sur {self.navigator.base_url}")
+            return False
+        
+        page_numbers = self.database.get_unfinished_pages(run['id'])
+        params = run['params']
+        done = sum(count for status, count in run['pages'].items() if status not in ('pending', 'failed'))
+        print(f"Reprise du scraping n°{run['id']} (commencé le {run['started_at']}): "
+              f"{done} pages déjà traitées, {len(page_numbers)} restantes")
+        self.database.resume_crawl_run(run['id'])
+        self._run_pages(run['id'], page_numbers, params['incremental'], params['stop_after'],
+                        fetch_workers, parse_workers, batch_size)
+        return True
+    
+    def _run_pages(self, run_id: int, page_numbers: list[int], incremental: bool, stop_after: int,
+                   fetch_workers: int, parse_workers: int, batch_size: int):
+        """Fait passer les pages d'un scraping dans le pipeline et enregistre son statut final"""
+        totals = self.new_totals()
+        pipeline = ScrapePipeline(
+            self.database,
+            extractor_backend=self.extractor_backend,
+            snapshot_store=self.snapshot_store,
+            parse_workers=parse_workers,
+            batch_size=batch_size,
+            incremental=incremental,
+            stop_after=stop_after,
+            run_id=run_id
+        )
+        navigators = [self.navigator]
+        
+        def navigator_factory():
+            navigator = self.navigator.clone()
+            navigators.append(navigator)
+            return navigator
+        
+        try:
+            pipeline.run(
+                self.navigator,
+                page_numbers,
+                totals,
+                navigator_factory=navigator_factory,
+                fetch_workers=fetch_workers
+            )
+        finally:
+            # Arrêt anticipé du mode incrémental : les pages suivantes ne sont pas à reprendre
+            status = self.database.finish_crawl_run(run_id, skip_pending=pipeline.stopped_early)
+        
+        # Afficher le résumé
+        timings = [timing for navigator in navigators for timing in getattr(navigator, 'timings', [])]
+        self.print_summary(totals, timings)
+        pipeline.print_stats()
+        if status != 'completed':
+            remaining = len(self.database.get_unfinished_pages(run_id))
+            print(f"Scraping n°{run_id} inachevé: {remaining} pages à reprendre avec --resume")
+    
+    @classmethod
+    def scrap_concurrently(cls, db_path: str = "cars.db", start_page_number: int = 1,
+                           number_of_pages_to_scrap: int = 2, concurrency: int = 4,
+                           extractor_backend: str = "html.parser", snapshot_dir: str = None,
+                           incremental: bool = False, headless: bool = True):
+        """
+        Scrape les pages en parallèle avec un pool de contextes de navigateur
+        (sans initialiser le navigateur synchrone du scraper)
+        Les pages sont extraites et enregistrées au fur et à mesure de leur arrivée
+        En mode incrémental, les pages inchangées ne sont pas réécrites (pas
+        d'arrêt anticipé : les pages arrivent dans le désordre)
+        Le scraping est enregistré dans crawl_run comme celui de
+        scrap_from_page : les pages non récupérées se reprennent avec
+        resume_last_run
+        """
+        scraper = cls.__new__(cls)
+        scraper.database = CarDatabase(db_path)
+        scraper.extractor_backend = extractor_backend
+        scraper.snapshot_store = SnapshotStore(snapshot_dir, scraper.database) if snapshot_dir else None
+        crawler = AlbiConcurrentCrawler(concurrency=concurrency, headless=headless)
+        totals = scraper.new_totals()
+        
+        page_numbers = list(range(start_page_number, start_page_number + number_of_pages_to_scrap))
+        params = {
+            'start_page': start_page_number,
+            'pages': number_of_pages_to_scrap,
+            'incremental': incremental,
+            'stop_after': 0,
+            'extractor': extractor_backend,
+        }
+        run_id = scraper.database.create_crawl_run(crawler.base_url, page_numbers, params)
+        print(f"Scraping n°{run_id}: pages {page_numbers[0]} à {page_numbers[-1]}")
+        
+        try:
+            crawled = crawler.run(
+                start_page_number,
+                number_of_pages_to_scrap,
+                lambda page_number, html: scraper.save_page(page_number, html, crawler.base_url, totals,
+                                                            incremental, run_id=run_id)
+            )
+            # Pages au-delà de la dernière page de l'inventaire : rien à reprendre
+            for page_number in page_numbers[crawled:]:
+                scraper.database.set_crawl_page_status(run_id, page_number, 'skipped')
+        finally:
+            status = scraper.database.finish_crawl_run(run_id)
+        
+        scraper.print_summary(totals, crawler.timings)
+        if status != 'completed':
+            remaining = len(scraper.database.get_unfinished_pages(run_id))
+            print(f"Scraping n°{run_id} inachevé: {remaining} pages à reprendre avec --resume")
+    
+    @classmethod
+    def reextract_snapshots(cls, db_path: str = "cars.db", snapshot_dir: str = "snapshots",
+                            workers: int = None, extractor_backend: str = "html.parser"):
+        """
+        Rejoue l'extraction sur les instantanés stockés, sans navigateur
+        Les pages sont extraites en parallèle dans un pool de processus et
+        enregistrées dans l'ordre chronologique des récupérations
+        """
+        scraper = cls.__new__(cls)
+        scraper.database = CarDatabase(db_path)
+        snapshots = scraper.database.get_snapshots()
+        if not snapshots:
+            print("Aucun instantané trouvé")
+            return
+        
+        totals = scraper.new_totals()
+        print(f"Extraction de {len(snapshots)} instantanés...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                extract_snapshot,
+                [snapshot_dir] * len(snapshots),
+                snapshots,
+                [extractor_backend] * len(snapshots)
+            )
+            for cars in results:
+                with METRICS.time(PHASE_METRIC, phase='write'):
+                    counts = scraper.database.upsert_cars(cars)
+                totals['processed'] += len(cars)
+                for key in ('inserted', 'updated', 'unchanged', 'errors'):
+                    totals[key] += counts[key]
+        
+        scraper.print_summary(totals)
+    
+    @classmethod
+    def enrich_details(cls, db_path: str = "cars.db", workers: int = 4, rate: float = 2.0,
+                       limit: int = None) -> dict:
+        """
+        Récupère la page de détail des voitures nouvelles ou modifiées depuis
+        le dernier enrichissement, sans navigateur (voir DetailEnricher)
+        """
+        database = CarDatabase(db_path)
+        enricher = DetailEnricher(database, workers=workers, rate=rate)
+        try:
+            return enricher.run(limit)
+        finally:
+            enricher.close()
+            database.close()
     
     def display_all_cars_from_db(self):
         """Affiche toutes les voitures stockées dans la base de données"""
@@ -0,0 +1,42 @@
+"""
+Sérialisation JSON directe des lignes de la table Car
+"""
+
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Colonnes lues pour une voiture, dans l'ordre attendu par car_json_row
+CAR_COLUMNS = "id, make, model, year, price, mileage, fuel, location, options, detail_url"
+
+
+def dumps(value) -> bytes:
+    """Encode en JSON UTF-8 (orjson si installé, sinon json de la bibliothèque standard)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def car_json_row(cursor, row: tuple) -> bytes:
+    """
+    Fabrique de lignes sqlite3 : convertit une ligne (CAR_COLUMNS) en objet
+    JSON identique à CarAPI.car_to_dict, sans objet Car intermédiaire
+    Les options, déjà stockées en JSON, sont insérées telles quelles
+    """
+    head = dumps({
+        'id': row[0],
+        'make': row[1],
+        'model': row[2],
+        'year': row[3],
+        'price': row[4],
+        'mileage': row[5],
+        'fuel': row[6],
+        'location': row[7],
+        'detail_url': row[9],
+    })
+    return b'%s,"options":%s}' % (head[:-1], (row[8] or '[]').encode('utf-8'))
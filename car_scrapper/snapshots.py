@@ -0,0 +1,90 @@
+"""
+Stockage des instantanés HTML des pages d'inventaire
+"""
+
+import gzip
+import hashlib
+import os
+from .database import CarDatabase
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# Extension des fichiers selon l'algorithme de compression
+CODEC_EXTENSIONS = {'zstd': '.html.zst', 'gzip': '.html.gz'}
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    """Compresse des octets avec l'algorithme donné"""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    """Décompresse des octets avec l'algorithme donné"""
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def snapshot_path(root: str, content_hash: str, codec: str) -> str:
+    """Chemin d'un instantané : <root>/<2 premiers caractères du hash>/<hash><extension>"""
+    return os.path.join(root, content_hash[:2], content_hash + CODEC_EXTENSIONS[codec])
+
+
+def read_snapshot(root: str, content_hash: str, codec: str) -> str:
+    """Lit et décompresse le HTML d'un instantané"""
+    with open(snapshot_path(root, content_hash, codec), 'rb') as f:
+        return decompress(f.read(), codec).decode('utf-8')
+
+
+class SnapshotStore:
+    """
+    Stockage adressé par contenu des pages d'inventaire récupérées
+
+    Chaque HTML est identifié par son SHA-256 et écrit une seule fois sur
+    disque, compressé en zstd (si le paquet zstandard est installé) ou en
+    gzip. Chaque récupération est enregistrée dans la table page_snapshot
+    (URL de base, numéro de page, date, tailles), ce qui permet de rejouer
+    l'extraction sans relancer le navigateur.
+    """
+    def __init__(self, root: str = "snapshots", database: CarDatabase = None, codec: str = None):
+        self.root = root
+        self.database = database
+        self.codec = codec or ('zstd' if ZSTD_AVAILABLE else 'gzip')
+        if self.codec == 'zstd' and not ZSTD_AVAILABLE:
+            raise ImportError("La compression zstd nécessite le paquet zstandard (pip install zstandard)")
+
+    def save(self, html: str, base_url: str, page_number: int) -> str:
+        """
+        Enregistre le HTML d'une page (sans le réécrire s'il est déjà stocké)
+        Retourne le hash du contenu
+        """
+        data = html.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = snapshot_path(self.root, content_hash, self.codec)
+
+        if os.path.exists(path):
+            stored_size = os.path.getsize(path)
+        else:
+            compressed = compress(data, self.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Écriture atomique : fichier temporaire puis renommage
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+            stored_size = len(compressed)
+
+        if self.database is not None:
+            self.database.add_snapshot(content_hash, self.codec, base_url, page_number, len(data), stored_size)
+        return content_hash
+
+    def load(self, content_hash: str, codec: str = None) -> str:
+        """Retourne le HTML d'un instantané"""
+        return read_snapshot(self.root, content_hash, codec or self.codec)
@@ -2,7 +2,7 @@
 Serveur API pour le car scrapper
 """
 
-from car_scrapper import CarAPI
+from car_scrapper import METRICS, AsyncCarAPI, CarAPI
 import argparse
 
 
@@ -39,20 +39,68 @@ def main():
         help="Chemin vers la base de données (défaut: cars.db)"
     )
     
+    parser.add_argument(
+        "--engine",
+        choices=["flask", "asgi"],
+        default="flask",
+        help="Serveur : flask (serveur de développement) ou asgi (uvicorn, requêtes concurrentes)"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Moteur asgi : threads de traitement et connexions SQLite (défaut: 8)"
+    )
+    
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Nombre de réponses en cache (défaut: 1024, 0 pour désactiver)"
+    )
+    
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Mesurer les requêtes (API et SQL) et les exposer sur /metrics"
+    )
+    
     args = parser.parse_args()
     
-    # Créer et lancer l'API
-    api = CarAPI(db_path=args.db_path)
+    # Activer l'instrumentation pour tout le processus (API et requêtes SQL)
+    if args.metrics:
+        METRICS.enable()
+    
+    # Créer l'API avec le moteur choisi
+    if args.engine == "asgi":
+        api = AsyncCarAPI(db_path=args.db_path, workers=args.workers, cache_size=args.cache_size,
+                          metrics=args.metrics)
+    else:
+        api = CarAPI(db_path=args.db_path, cache_size=args.cache_size, metrics=args.metrics)
     
     print(f"🚀 Serveur API démarré sur http://{args.host}:{args.port}")
-    print(f"📊 Base de données: {args.db_path}")
+    print(f"📊 Base de données: {args.db_path} (moteur: {args.engine})")
     print(f"🔗 Endpoints disponibles:")
     print(f"   GET /api/cars - Liste des voitures avec filtres")
+    print(f"   GET /api/cars/export?format=ndjson|csv - Export en flux continu")
     print(f"   GET /api/cars/<id> - Détails d'une voiture")
+    print(f"   GET /api/cars/<id>/history - Historique des prix et kilométrages")
+    print(f"   GET /api/cars/<id>/details - VIN, transmission et caractéristiques (--enrich)")
+    print(f"   GET /api/price-drops?since=... - Baisses de prix récentes")
+    print(f"   GET /api/search?q=... - Recherche plein texte")
     print(f"   GET /api/stats - Statistiques")
+    print(f"   GET /api/options - Options et nombre de voitures par option")
+    print(f"   GET /api/stats/distribution - Histogrammes et centiles")
+    print(f"   GET /api/stats/by-make - Statistiques par marque")
+    if args.metrics:
+        print(f"   GET /metrics - Métriques (format Prometheus)")
     print()
     
-    api.run(host=args.host, port=args.port, debug=args.debug)
+    if args.engine == "asgi":
+        api.run(host=args.host, port=args.port)
+    else:
+        api.run(host=args.host, port=args.port, debug=args.debug)
 
 
 if __name__ == "__main__":
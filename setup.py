@@ -19,7 +19,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/car_scrapper",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -33,6 +33,14 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    # Dépendances optionnelles (voir la section Dépendances du README)
+    extras_require={
+        "analytics": ["numpy"],
+        "lxml": ["lxml"],
+        "http2": ["h2"],
+        "fast-json": ["orjson"],
+        "asgi": ["uvicorn"],
+    },
     entry_points={
         "console_scripts": [
             "car-scrapper=car_scrapper.cli:main",